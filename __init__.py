@@ -1,20 +1,39 @@
-from urllib.parse import urljoin
-
-import requests
-import requests.exceptions as rex
+import importlib
+import time
+from urllib.parse import quote_plus, urljoin
 
+from . import listing
 from .anime import Anime
+from .batch import BatchResult, fetch_many
+from .errors import NoContentError, MALError
+from .lazy import Ref, materialize
 from .manga import Manga
-from .utils.download import download
+from .utils.download import download, head
+from .utils.metrics import Metrics
+from .utils.idmap import IdMap
+from .utils.ratelimit import TokenBucket
+from .utils.records import RecordCache
+from .utils.transport import RetryPolicy, Transport
+
+# Exports whose modules pull in heavy dependencies (asyncio,
+# multiprocessing, sqlite3) are imported on first access. requests and
+# bs4 are only imported by the first request and the first parse.
+_LAZY = {
+    "AsyncMyAnimeList": ".aio",
+    "ingest": ".pipeline",
+    "parse_pages": ".pipeline",
+    "ResponseCache": ".utils.cache",
+    "PageArchive": ".utils.archive",
+    "reparse_archive": ".pipeline",
+}
 
-class NoContentError(Exception):
-    """Error for objects with no data."""
-    pass
 
+def __getattr__(name:str):
+    module = _LAZY.get(name)
+    if module is None: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class MALError(Exception):
-    """All catch all error for MyAnimeList."""
-    pass
+    value = globals()[name] = getattr(importlib.import_module(module, __name__), name)
+    return value
 
 
 class MyAnimeList:
@@ -24,22 +43,214 @@ class MyAnimeList:
     ----------
         base_url (str): The base url for navigating myanimelist.net.
         session (requests.Session): The session used for requests.
-        rate_limit (int/float): The time to wait after each request.
+            Setting it replaces the transport.
+        transport (Transport): The pooled transport wrapping the session.
+        retry (RetryPolicy): How failed requests are retried, or None.
+        rate_limit (int/float): The minimum average time between the start
+            of two requests.
+        limiter (TokenBucket): The rate limiter shared by every request
+            made through this instance.
+        cache (ResponseCache): The on-disk response cache, or None.
+        records (RecordCache): The in-memory cache of parsed records, or None.
+        idmap (IdMap): The ids known to exist or to be missing, or None.
+        archive (PageArchive): Stores every downloaded page, or None.
+        offline (bool): Whether pages are read from the archive instead
+            of the network.
+        parser (str): The parser engine used to build Anime/Manga objects.
+        metrics (Metrics): Receives request, parse and cache events, or None.
+        stream (bool): Whether pages are streamed and cut off after the
+            related entries.
     """
-    __slots__ = ("base_url", "session", "rate_limit")
+    __slots__ = ("base_url", "transport", "retry", "rate_limit", "limiter",
+                "cache", "records", "idmap", "archive", "offline", "parser", "metrics",
+                "stream", "_replay")
 
-    def __init__(self, session=None) -> None:
+    def __init__(self, session=None, rate_limit:float=4.05, burst:int=1, cache=None,
+                parser:str="html.parser", metrics=None, pool_size:int=10,
+                retries:int=3, stream:bool=False, records=None, archive=None,
+                offline:bool=False, idmap=None) -> None:
         """
         The constructor of the MyAnimeList class.
         
         Parameters
         ----------
-            session (requets.Session) (optional): The session used for requests.
+            session (requets.Session) (optional): The session used for
+                requests, left unchanged (see Transport).
+            rate_limit (int/float) (optional): The minimum average time
+                between the start of two requests.
+            burst (int) (optional): The number of requests that may be sent
+                back to back after the client has been idle.
+            cache (ResponseCache) (optional): A cache used to avoid
+                downloading unchanged pages again.
+            parser (str) (optional): The parser engine to use. One of
+                "html.parser", "lxml" or "sidebar" (see utils.parsing).
+            metrics (Metrics) (optional): Collects request, rate limit,
+                parse and cache timings.
+            pool_size (int) (optional): The number of connections kept
+                alive. Batches grow it to their number of workers.
+            retries (int) (optional): How many times connection errors,
+                429s and 5xx responses are retried with a jittered
+                exponential backoff. 0 disables retries.
+            stream (bool) (optional): Whether to stop reading a page and
+                close the connection once the info sidebar and the
+                related entries have been received. Saves bandwidth and parsing time on large pages
+                and builds the same objects.
+            records (RecordCache) (optional): Keeps parsed records in
+                memory and makes concurrent calls for the same id share
+                one request.
+            archive (PageArchive) (optional): Stores the raw page of
+                every request so records can be reparsed later without
+                downloading them again.
+            offline (bool) (optional): Answer every request from the
+                archive, without rate limiting, and treat pages that
+                aren't archived as missing. Nothing is sent or stored.
+            idmap (IdMap) (optional): Records which ids exist as pages
+                and listings are fetched, and answers ids known to be
+                missing with NoContentError without a request, so bulk
+                fetches skip them (see discovery).
         """
+        if offline and archive is None: raise ValueError("offline mode needs an archive")
+
         self.base_url = "https://myanimelist.net"
-        self.session = session if session else requests.session()
-        self.rate_limit = 4.05
+        self.transport = Transport(session, pool_size)
+        self.retry = RetryPolicy(retries + 1) if retries else None
+        self.rate_limit = rate_limit
+        self.limiter = TokenBucket.from_interval(rate_limit, burst)
+        self.cache = cache
+        self.records = records
+        self.idmap = idmap
+        self.archive = archive
+        self.offline = offline
+        self._replay = archive.replay() if offline else None
+        self.parser = parser
+        self.metrics = metrics
+        self.stream = stream
+
+    @property
+    def session(self) -> "requests.Session":
+        """The session used for requests, created on first use."""
+        return self.transport.session
+
+    @session.setter
+    def session(self, session:"requests.Session") -> None:
+        old = self.transport
+        self.transport = Transport(session, old.pool_size, old.compression, old.timeout)
     
+    def get_page(self, kind:str, id):
+        """Downloads the page of an anime or manga without parsing it.
+
+        Parameters
+        ----------
+            kind (str): Either "anime" or "manga".
+            id: An int or int-equivalent object.
+
+        Returns
+        -------
+            requests.Response|Page: The successful response.
+
+        Raises
+        ------
+            NoContentError: The id doesn't exist.
+            MALError: The id is invalid or the request failed.
+        """
+        # Do not allow non-number or negative values for id.
+        try:
+            if int(id) < 0: raise ValueError
+        except (TypeError, ValueError):
+            raise MALError
+
+        if self.idmap is None: return self._fetch(f"{self.base_url}/{kind}/{id}", self.stream)
+        if self.idmap.is_dead(kind, id): raise NoContentError
+
+        try:
+            req = self._fetch(f"{self.base_url}/{kind}/{id}", self.stream)
+        except NoContentError:
+            self.idmap.mark(kind, id, False)
+            raise
+        self.idmap.mark(kind, id, True)
+        return req
+
+    def exists(self, kind:str, id) -> bool:
+        """Whether an anime or manga exists, answered from the id map
+        when it is known and with a HEAD request otherwise, so the page
+        itself isn't downloaded.
+
+        Parameters
+        ----------
+            kind (str): Either "anime" or "manga".
+            id: An int or int-equivalent object.
+
+        Raises
+        ------
+            MALError: The id is invalid or the request failed.
+        """
+        try:
+            if int(id) < 0: raise ValueError
+        except (TypeError, ValueError):
+            raise MALError
+
+        if self.idmap is not None:
+            state = self.idmap.state(kind, id)
+            if state is not None: return state == "valid"
+
+        url = f"{self.base_url}/{kind}/{id}"
+        req = self._head(url)
+        if req.status_code != 404 and not req.ok: raise MALError(f"{req.status_code} for {url}")
+
+        if self.idmap is not None: self.idmap.mark(kind, id, req.ok)
+        return req.ok
+
+    def _head(self, url:str):
+        import requests.exceptions as rex
+
+        try:
+            if self.offline: return head(url, driver=self._replay, metrics=self.metrics)
+            return head(url, driver=self.transport, limiter=self.limiter, metrics=self.metrics, retry=self.retry)
+        except rex.RequestException as e:
+            raise MALError(f"{type(e).__name__} for {url}") from e
+
+    def _fetch(self, url:str, stream:bool=False):
+        import requests.exceptions as rex
+
+        try:
+            if self.offline:
+                req = download(url, driver=self._replay, wait_time=0, metrics=self.metrics)
+            else:
+                req = download(
+                    url, driver=self.transport, limiter=self.limiter, cache=self.cache,
+                    metrics=self.metrics, retry=self.retry, stream=stream, archive=self.archive
+                )
+        except rex.RequestException as e:
+            raise MALError(f"{type(e).__name__} for {url}") from e
+
+        if req.ok:
+            return req
+        elif req.status_code == 404:
+            raise NoContentError
+        else:
+            raise MALError(f"{req.status_code} for {req.url}")
+
+    def _get(self, kind:str, cls, id):
+        if self.records is None: return self._load(kind, cls, id)
+
+        try:
+            key = (kind, int(id))
+        except (TypeError, ValueError):
+            raise MALError
+
+        record, result = self.records.lookup(key, lambda: self._load(kind, cls, id))
+        if self.metrics is not None: self.metrics.emit("records", kind=kind, id=id, result=result)
+        return record
+
+    def _load(self, kind:str, cls, id):
+        req = self.get_page(kind, id)
+        if self.metrics is None: return cls(req, self.parser)
+
+        start = time.perf_counter()
+        record = cls(req, self.parser)
+        self.metrics.emit("parse", kind=kind, id=id, seconds=time.perf_counter() - start)
+        return record
+
     def get_anime(self, id:int) -> Anime:
         """Given an id, return an Anime object using data
         from MyAnimeList.
@@ -54,17 +265,7 @@ class MyAnimeList:
             Anime: An Anime object containing metadata for anime that the
                 given id parameters represents.
         """
-        # Do not allow non-number values for id.
-        if not isinstance(eval(id), int): raise MALError
-
-        req = download(f"{self.base_url}/anime/{id}", driver=self.session, wait_time=self.rate_limit)
-
-        if req.ok:
-            return Anime(req)
-        elif req.status_code == 404:
-            raise NoContentError
-        else:
-            raise MALError
+        return self._get("anime", Anime, id)
 
     def get_manga(self, id:int) -> Manga:
         """Given an id, return a Manga object using data
@@ -80,22 +281,255 @@ class MyAnimeList:
             Manga: A Manga object containing metadata for manga that the
                 given id parameters represents.
         """
-        req = download(
-            f"{self.base_url}/manga/{id}",
-            driver=self.session, wait_time=self.rate_limit
-        )
-
-        if req.ok:
-            return Manga(req)
-        elif req.status_code == 404:
-            raise NoContentError
-        else:
-            raise MALError
+        return self._get("manga", Manga, id)
     
+    def get_anime_many(self, ids, workers:int=4):
+        """Given an iterable of ids, fetch the anime concurrently and
+        yield the results as each one finishes.
+
+        Every request still goes through the instance's rate limiter,
+        so adding workers only overlaps waiting on the network with
+        parsing.
+
+        Parameters
+        ----------
+            ids: An iterable of ints or int-equivalent objects that
+                represent anime from MyAnimeList.
+            workers (int) (optional): The number of concurrent requests.
+
+        Yields
+        ------
+            BatchResult: The id with either its Anime object or the
+                NoContentError/MALError raised for it.
+        """
+        self.transport.reserve(workers)
+        return fetch_many(self.get_anime, ids, workers, errors=(NoContentError, MALError))
+
+    def get_manga_many(self, ids, workers:int=4):
+        """Given an iterable of ids, fetch the manga concurrently and
+        yield the results as each one finishes.
+
+        Parameters
+        ----------
+            ids: An iterable of ints or int-equivalent objects that
+                represent manga from MyAnimeList.
+            workers (int) (optional): The number of concurrent requests.
+
+        Yields
+        ------
+            BatchResult: The id with either its Manga object or the
+                NoContentError/MALError raised for it.
+        """
+        self.transport.reserve(workers)
+        return fetch_many(self.get_manga, ids, workers, errors=(NoContentError, MALError))
+
+    def _listing(self, kind:str, urls, parse) -> list:
+        # Yields the partial records of listing pages until one is empty
+        for url in urls:
+            try:
+                req = self._fetch(url)
+            except NoContentError:
+                return
+
+            if self.metrics is None:
+                records = parse(req.content)
+            else:
+                start = time.perf_counter()
+                records = parse(req.content)
+                self.metrics.emit("parse", kind="listing", url=url, seconds=time.perf_counter() - start)
+
+            if not records: return
+            if self.idmap is not None:
+                for data in records: self.idmap.mark(kind, data["id"], True)
+            yield from listing.partial_records(kind, records)
+
+    def get_season(self, year:int, season:str) -> list:
+        """Given a year and season, return every anime of that season
+        from a single season page.
+
+        Parameters
+        ----------
+            year (int): The year, e.g. 1998.
+            season (str): One of "winter", "spring", "summer" or "fall".
+
+        Returns
+        -------
+            list: Partial Anime objects with the title, english title,
+                type, episodes, season, year, genres, studios, source,
+                themes and demographic (see upgrade).
+        """
+        season = season.lower()
+        if season not in listing.SEASONS: raise ValueError(f"Unknown season {season!r}")
+
+        url = f"{self.base_url}/anime/season/{int(year)}/{season}"
+        parse = lambda content: listing.parse_season(content, season, year, self.parser)
+        return list(self._listing("anime", (url,), parse))
+
+    def get_top_anime(self, pages:int=1, type:str=None):
+        """Yield the highest ranked anime, 50 per requested page.
+
+        Parameters
+        ----------
+            pages (int) (optional): The number of pages to request.
+            type (str) (optional): A ranking type such as "airing",
+                "upcoming", "tv" or "movie".
+
+        Yields
+        ------
+            Anime: Partial Anime objects with the title, type and
+                episodes, in rank order (see upgrade).
+        """
+        return self._top("anime", pages, type)
+
+    def get_top_manga(self, pages:int=1, type:str=None):
+        """Yield the highest ranked manga, 50 per requested page.
+
+        Parameters
+        ----------
+            pages (int) (optional): The number of pages to request.
+            type (str) (optional): A ranking type such as "manga",
+                "lightnovels" or "manhwa".
+
+        Yields
+        ------
+            Manga: Partial Manga objects with the title, type and
+                volumes, in rank order (see upgrade).
+        """
+        return self._top("manga", pages, type)
+
+    def _top(self, kind:str, pages:int, type:str):
+        query = f"&type={quote_plus(type)}" if type else ""
+        urls = (f"{self.base_url}/top{kind}.php?limit={page * listing.PAGE_SIZE}{query}"
+                for page in range(pages))
+        return self._listing(kind, urls, lambda content: listing.parse_top(content, kind, self.parser))
+
+    def search_anime(self, query:str, pages:int=1):
+        """Yield the anime found by MAL's search, 50 per requested page.
+
+        Parameters
+        ----------
+            query (str): The text to search for.
+            pages (int) (optional): The number of pages to request.
+
+        Yields
+        ------
+            Anime: Partial Anime objects with the title, type and
+                episodes, in the order MAL ranks them (see upgrade).
+        """
+        return self._search("anime", query, pages)
+
+    def search_manga(self, query:str, pages:int=1):
+        """Yield the manga found by MAL's search, 50 per requested page.
+
+        Parameters
+        ----------
+            query (str): The text to search for.
+            pages (int) (optional): The number of pages to request.
+
+        Yields
+        ------
+            Manga: Partial Manga objects with the title, type and
+                volumes, in the order MAL ranks them (see upgrade).
+        """
+        return self._search("manga", query, pages)
+
+    def _search(self, kind:str, query:str, pages:int):
+        urls = (f"{self.base_url}/{kind}.php?q={quote_plus(query)}&cat={kind}&show={page * listing.PAGE_SIZE}"
+                for page in range(pages))
+        return self._listing(kind, urls, lambda content: listing.parse_search(content, kind, self.parser))
+
+    def upgrade(self, records, workers:int=4):
+        """Fetches the full page of every partial record (from the
+        season, top and search methods) and fills in its missing fields
+        in place. Records that are already full are skipped.
+
+        Parameters
+        ----------
+            records (iterable): Anime/Manga objects.
+            workers (int) (optional): The number of concurrent requests.
+
+        Yields
+        ------
+            BatchResult: The id with either the upgraded record or the
+                NoContentError/MALError raised for it.
+        """
+        return listing.upgrade(self, records, workers)
+
+    def get_franchise(self, kind:str, id, workers:int=4, max_entries:int=None) -> list:
+        """Given an anime or manga, return it and every entry connected
+        to it through relations (sequels, side stories, adaptations...),
+        requesting each entry once (see graph.GraphCrawler).
+
+        Parameters
+        ----------
+            kind (str): Either "anime" or "manga".
+            id: An int or int-equivalent object.
+            workers (int) (optional): The number of concurrent requests.
+            max_entries (int) (optional): The most entries requested.
+
+        Returns
+        -------
+            list: The Anime and Manga objects, in breadth first order.
+                Entries that couldn't be fetched are left out.
+        """
+        from .graph import GraphCrawler
+
+        crawler = GraphCrawler(self, workers, max_entries)
+        return [result.record for result in crawler.run([(kind, id)]) if result.ok]
+
+    def anime_ref(self, id:int) -> Ref:
+        """Given an id, return a handle to the anime that is only
+        downloaded and parsed the first time one of its attributes is
+        read.
+
+        Parameters
+        ----------
+            id: An int or int-equivalent object that represents an
+                anime from MyAnimeList.
+
+        Returns
+        -------
+            Ref: A lazy handle to the anime.
+        """
+        return Ref(self, "anime", id)
+
+    def manga_ref(self, id:int) -> Ref:
+        """Given an id, return a handle to the manga that is only
+        downloaded and parsed the first time one of its attributes is
+        read.
+
+        Parameters
+        ----------
+            id: An int or int-equivalent object that represents a
+                manga from MyAnimeList.
+
+        Returns
+        -------
+            Ref: A lazy handle to the manga.
+        """
+        return Ref(self, "manga", id)
+
+    def materialize(self, refs, workers:int=4) -> list:
+        """Loads a collection of handles from anime_ref/manga_ref using
+        the batch methods. Handles that are already loaded are skipped.
+
+        Parameters
+        ----------
+            refs (iterable): The handles to load, possibly held in
+                nested lists, tuples, sets or dicts.
+            workers (int) (optional): The number of concurrent requests.
+
+        Returns
+        -------
+            list: The given items.
+        """
+        return materialize(refs, workers)
+
     def validate_url(self, url:str) -> bool:
-        """Tests the connection to the given url"""
+        """Tests the connection to the given url with a HEAD request,
+        under the instance's rate limit. Returns False for error
+        statuses and for urls that can't be reached."""
         try:
-            self.session.head(url).raise_for_status()
-            return True
-        except (rex.MissingSchema, rex.HTTPError):
+            return self._head(url).ok
+        except MALError:
             return False
\ No newline at end of file
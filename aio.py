@@ -0,0 +1,247 @@
+import asyncio
+import time
+
+from .anime import Anime
+from .batch import BatchResult
+from .errors import NoContentError, MALError
+from .manga import Manga
+from .utils.download import STREAM_CHUNK_SIZE, Page, read_sidebar_async
+from .utils.ratelimit import TokenBucket
+
+
+class AsyncMyAnimeList:
+    """An asyncio counterpart of MyAnimeList.
+
+    Requests are made with an aiohttp connection pool and spaced out by
+    a token bucket that is waited on with asyncio.sleep, so the event
+    loop is never blocked. aiohttp is only required once a request is
+    made.
+
+    Attributes
+    ----------
+        base_url (str): The base url for navigating myanimelist.net.
+        session (aiohttp.ClientSession): The session used for requests.
+        rate_limit (int/float): The minimum average time between the start
+            of two requests.
+        limiter (TokenBucket): The rate limiter shared by every request
+            made through this instance.
+        connections (int): The size of the connection pool.
+        parse_in_executor (bool): Whether pages are parsed in the default
+            executor instead of on the event loop.
+        parser (str): The parser engine used to build Anime/Manga objects.
+        metrics (Metrics): Receives request and parse events, or None.
+        stream (bool): Whether pages are cut off after the info sidebar.
+    """
+    __slots__ = ("base_url", "session", "rate_limit", "limiter", "connections",
+                "parse_in_executor", "parser", "metrics", "stream", "_owns_session")
+
+    def __init__(self, session=None, rate_limit:float=4.05, burst:int=1,
+                connections:int=10, parse_in_executor:bool=False,
+                base_url:str="https://myanimelist.net", parser:str="html.parser",
+                metrics=None, stream:bool=False) -> None:
+        """
+        The constructor of the AsyncMyAnimeList class.
+
+        Parameters
+        ----------
+            session (aiohttp.ClientSession) (optional): The session used
+                for requests. One is created on first use when missing.
+            rate_limit (int/float) (optional): The minimum average time
+                between the start of two requests.
+            burst (int) (optional): The number of requests that may be sent
+                back to back after the client has been idle.
+            connections (int) (optional): The size of the connection pool.
+            parse_in_executor (bool) (optional): Parse pages in the default
+                executor so large pages don't stall the event loop.
+            base_url (str) (optional): The site to request pages from.
+            parser (str) (optional): The parser engine to use. One of
+                "html.parser", "lxml" or "sidebar" (see utils.parsing).
+            metrics (Metrics) (optional): Collects request, rate limit and
+                parse timings.
+            stream (bool) (optional): Whether to stop reading a page and
+                close the connection once the info sidebar has been
+                received (see utils.download.read_sidebar).
+        """
+        self.base_url = base_url
+        self.session = session
+        self.rate_limit = rate_limit
+        self.limiter = TokenBucket.from_interval(rate_limit, burst)
+        self.connections = connections
+        self.parse_in_executor = parse_in_executor
+        self.parser = parser
+        self.metrics = metrics
+        self.stream = stream
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> "AsyncMyAnimeList":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the session if it was created by this instance."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None:
+            import aiohttp
+
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections)
+            )
+        return self.session
+
+    async def download(self, url:str) -> Page:
+        """Downloads the given url once the rate limiter allows it.
+
+        Connection errors and timeouts are raised as MALError."""
+        import aiohttp
+
+        session = self._get_session()
+
+        waited = await self.limiter.acquire_async()
+
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as resp:
+                ttfb = time.perf_counter() - start
+                if self.stream and resp.status == 200:
+                    content, complete = await read_sidebar_async(resp.content.iter_chunked(STREAM_CHUNK_SIZE))
+                    if not complete: resp.close()
+                else:
+                    content = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise MALError(f"{type(e).__name__} for {url}") from e
+        seconds = time.perf_counter() - start
+
+        self.limiter.feedback(resp.status, resp.headers.get("Retry-After"))
+
+        if self.metrics is not None:
+            self.metrics.emit(
+                "request", url=url, status=resp.status, bytes=len(content), rate_wait=waited,
+                ttfb=ttfb, transfer=seconds - ttfb, seconds=seconds,
+            )
+
+        return Page(str(resp.url), resp.status, dict(resp.headers), content)
+
+    def _parse(self, kind:str, cls, page:Page):
+        if self.metrics is None: return cls(page, self.parser)
+
+        start = time.perf_counter()
+        record = cls(page, self.parser)
+        self.metrics.emit("parse", kind=kind, url=page.url, seconds=time.perf_counter() - start)
+        return record
+
+    async def _get(self, kind:str, cls, id):
+        # Do not allow non-number values for id.
+        try:
+            int(id)
+        except (TypeError, ValueError):
+            raise MALError
+
+        page = await self.download(f"{self.base_url}/{kind}/{id}")
+
+        if page.ok:
+            if self.parse_in_executor:
+                return await asyncio.get_running_loop().run_in_executor(None, self._parse, kind, cls, page)
+            return self._parse(kind, cls, page)
+        elif page.status_code == 404:
+            raise NoContentError
+        else:
+            raise MALError
+
+    async def get_anime(self, id:int) -> Anime:
+        """Given an id, return an Anime object using data
+        from MyAnimeList.
+
+        Parameters
+        ----------
+            id: An int or int-equivalent object that represents an
+                anime from MyAnimeList.
+
+        Returns
+        -------
+            Anime: An Anime object containing metadata for anime that the
+                given id parameters represents.
+        """
+        return await self._get("anime", Anime, id)
+
+    async def get_manga(self, id:int) -> Manga:
+        """Given an id, return a Manga object using data
+        from MyAnimeList.
+
+        Parameters
+        ----------
+            id: An int or int-equivalent object that represents a
+                manga from MyAnimeList.
+
+        Returns
+        -------
+            Manga: A Manga object containing metadata for manga that the
+                given id parameters represents.
+        """
+        return await self._get("manga", Manga, id)
+
+    async def _fetch_many(self, fetch, ids, workers:int):
+        if workers < 1: raise ValueError("workers must be at least 1")
+
+        async def _run(id):
+            try:
+                return BatchResult(id, await fetch(id))
+            except (NoContentError, MALError) as e:
+                return BatchResult(id, error=e)
+
+        ids = iter(ids)
+        pending = set()
+
+        try:
+            while True:
+                for id in ids:
+                    pending.add(asyncio.ensure_future(_run(id)))
+                    if len(pending) >= workers: break
+
+                if not pending: return
+
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in finished:
+                    yield task.result()
+        finally:
+            for task in pending: task.cancel()
+
+    def get_anime_many(self, ids, workers:int=4):
+        """Given an iterable of ids, fetch the anime concurrently and
+        yield the results as each one finishes.
+
+        Parameters
+        ----------
+            ids: An iterable of ints or int-equivalent objects that
+                represent anime from MyAnimeList.
+            workers (int) (optional): The number of concurrent requests.
+
+        Yields
+        ------
+            BatchResult: The id with either its Anime object or the
+                NoContentError/MALError raised for it.
+        """
+        return self._fetch_many(self.get_anime, ids, workers)
+
+    def get_manga_many(self, ids, workers:int=4):
+        """Given an iterable of ids, fetch the manga concurrently and
+        yield the results as each one finishes.
+
+        Parameters
+        ----------
+            ids: An iterable of ints or int-equivalent objects that
+                represent manga from MyAnimeList.
+            workers (int) (optional): The number of concurrent requests.
+
+        Yields
+        ------
+            BatchResult: The id with either its Manga object or the
+                NoContentError/MALError raised for it.
+        """
+        return self._fetch_many(self.get_manga, ids, workers)
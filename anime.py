@@ -1,11 +1,49 @@
-from collections import defaultdict
-import time
-
-import bs4
-from bs4 import BeautifulSoup
-
 from . import utils
 from .utils.download import download
+from .utils.parsing import make_soup, related_links
+from .utils.schema import Field, Schema
+
+
+def _split_premiered(value:str):
+    """Splits "Spring 1998" into its season and year."""
+    parts = value.split()
+    return tuple(parts) if len(parts) == 2 else None
+
+
+ANIME_SCHEMA = Schema(
+    title='h1[class="title-name h1_bold_none"]',
+    fields={
+        "english": Field("english", many=True),
+        "synonyms": Field("synonyms", many=True),
+        "synonym": Field("synonyms", many=True),
+        "japanese": Field("japanese", many=True),
+        "type": Field("type"),
+        "episodes": Field("episodes"),
+        "status": Field("status"),
+        "aired": Field("aired"),
+        "premiered": Field(("season", "year"), normalize=_split_premiered),
+        "producers": Field("producers", many=True, links=("/anime/",)),
+        "licensors": Field("licensors", many=True, links=("/anime/",)),
+        "studios": Field("studios", many=True, links=("/anime/",)),
+        "source": Field("source"),
+        "genre": Field("genres", many=True, links=("/anime/",)),
+        "genres": Field("genres", many=True, links=("/anime/",)),
+        "theme": Field("theme", links=("/anime/",)),
+        "themes": Field("theme", links=("/anime/",)),
+        "demographic": Field("demographic", links=("/anime/",)),
+        "demographics": Field("demographic", links=("/anime/",)),
+        "duration": Field("duration"),
+        "rating": Field("rating"),
+    },
+    defaults={
+        "title": None, "english": [], "synonyms": [], "japanese": [],
+        "type": None, "episodes": 0, "status": None, "aired": "",
+        "season": "", "year": "", "producers": [], "licensors": [],
+        "studios": [], "source": "", "genres": [], "theme": "",
+        "demographic": "", "duration": "", "rating": "", "related": [],
+    },
+    rstrip=",",
+)
 
 class Anime:
     """This is a class for gathering data scrapped from webpages
@@ -33,14 +71,18 @@ class Anime:
         demographic (str): The demographic of the anime (i.e. Shounen).
         duration (str): The average duration of the anime.
         rating (str): The rating of the anime.
+        related (list): The related entries (sequels, adaptations, ...)
+            as "anime/<id>" and "manga/<id>" strings.
+        partial (bool): Whether the anime was built from a listing page
+            and only has some of its fields (see listing.upgrade).
     """
 
     __slots__ = ("id", "title", "english", "synonyms", "japanese", "type",
                 "episodes", "status", "aired", "season", "year", "producers",
                 "licensors", "studios", "source", "genres", "theme", "demographic",
-                "duration", "rating")
+                "duration", "rating", "related", "partial")
 
-    def __init__(self, data:tuple):
+    def __init__(self, data:tuple, parser:str="html.parser"):
         """
         The constructor of the Anime class.
         
@@ -48,29 +90,21 @@ class Anime:
         ----------
             data: A tuple containing a numerical id and a
                 requests.Response object
+            parser (str) (optional): The parser engine to use (see
+                utils.parsing.ENGINES).
         """
-        _attrs = self.parse_page(data)
-
-        self.id = _attrs.get("id")
-        self.title = _attrs.get("title")
-        self.english = _attrs.get("english", [])
-        self.synonyms = _attrs.get("synonyms", [])
-        self.japanese = _attrs.get("japanese", [])
-        self.type = _attrs.get("type")
-        self.episodes = _attrs.get("episodes", 0)
-        self.status = _attrs.get("status")
-        self.aired = _attrs.get("aired", "")
-        self.season = _attrs.get("season", "")
-        self.year = _attrs.get("year", "")
-        self.producers = _attrs.get("producers", [])
-        self.licensors = _attrs.get("licensors", [])
-        self.studios = _attrs.get("studios", [])
-        self.source = _attrs.get("source", "")
-        self.genres = _attrs.get("genres", [])
-        self.theme = _attrs.get("theme", "")
-        self.demographic = _attrs.get("demographic", "")
-        self.duration = _attrs.get("duration", "")
-        self.rating = _attrs.get("rating", "")
+        ANIME_SCHEMA.load(self, self.parse_page(data, parser))
+        self.partial = False
+
+    @classmethod
+    def from_data(cls, data:dict, partial:bool=False) -> "Anime":
+        """Builds an Anime from a dict shaped like the one returned
+        by gather_data, without downloading or parsing anything. Set
+        partial when data only holds some of the fields."""
+        anime = cls.__new__(cls)
+        ANIME_SCHEMA.load(anime, data)
+        anime.partial = partial
+        return anime
 
     def __str__(self):
         return f"{self.id} <{self.title}>"
@@ -98,7 +132,7 @@ class Anime:
     def add_alt(self, alt_title:str) -> None:
         """
         Appends another alternative to the list of alternative titles."""
-        if alt_title in self.get_titles(): self.synonyms.append(alt_title)
+        if alt_title not in self.get_titles(): self.synonyms.append(alt_title)
         
     def gather_data(self) -> dict:
         """Returns a dict of all the relevant data for the anime."""
@@ -112,9 +146,10 @@ class Anime:
             "genres": self.genres, "theme": self.theme, "demographic": self.demographic,
             "duration": self.duration,
             "rating": self.rating,
+            "related": self.related,
         }
 
-    def parse_page(self, data:tuple) -> dict:
+    def parse_page(self, data:tuple, parser:str="html.parser") -> dict:
         """Parses a given html containing data from an anime.
         
         Given a resquests.Session object, parse the html and
@@ -124,68 +159,22 @@ class Anime:
         ----------
         data: A tuple containing a numerical id and a requests.Response
             object containing the html for a webpage.
+        parser (str) (optional): The parser engine to use (see
+            utils.parsing.ENGINES).
 
         Returns
         -------
         metadata_dict: A dictionary containing data scraped from the give
             data.
         """
-        soup = BeautifulSoup(data.content, "html.parser")
-        
         metadata_dict = {"id": utils.get_id(data.url)}
-
-        metadata_dict["title"] = soup.select_one('h1[class="title-name h1_bold_none"]').text
-
-        for elem in soup.select("div[class='spaceit_pad']"):
-            # Skip over irrelevant data
-            if (len(elem.contents) < 2) or ('<span class="dark_text">' not in str(elem.contents[1])):
-                continue
-            
-            # Clean the data to make it easier to organize
-            data_contents = []
-            for content in elem.contents:
-                if type(content) == bs4.element.NavigableString:
-                    if (content.strip()):
-                        data_contents.append(content.strip())
-                else:
-                    data_contents.append(content)
-
-            # What kind of the information is it
-            data_type_tag = data_contents[0]
-            data_type = data_type_tag.text.replace(":", "").strip().lower()
-
-            # Exclude certain pieces of data
-            # if data_type in ["ranked", "members", "favorites", "score", "broadcast"]: continue
-            
-            if elem.select("a[href^='/anime/']") != []:
-                data = [piece.text for piece in elem.select("a[href^='/anime/']")]
-            else:
-                # Handle case where only either the data or data type is provided
-                if len(data_contents) < 2: continue
-
-                if type(data_contents[1]) == str:
-                    data = data_contents[1]
-                else:
-                    data = data_contents[1].text
-
-            if type(data) == str:
-                # Normalize marking for unknown data
-                data = "" if data.rstrip(",") in ("None found", "None", "N/A") else data.rstrip(",")
-            
-            metadata_dict[data_type.lower()] = [data] if data_type in ["english", "japanese", "native", "synonyms", "synonym"] else data
-
-        # In case of anime with only one genre
-        if ("genre" in metadata_dict.keys()) and ("genres" not in metadata_dict.keys()):
-            metadata_dict["genres"] = metadata_dict.pop("genre")
-        elif ("genre" not in metadata_dict.keys()) and ("genres" not in metadata_dict.keys()):
-            metadata_dict["genres"] = []
-
-        if ("premiered" in metadata_dict.keys()) and (len(metadata_dict["premiered"].split()) > 1):
-            metadata_dict["season"], metadata_dict["year"] = metadata_dict.pop("premiered").split()
+        soup = make_soup(data.content, parser)
+        metadata_dict.update(ANIME_SCHEMA.extract(soup))
+        metadata_dict["related"] = related_links(soup)
 
         return metadata_dict
 
-    def refresh_data(self, webdriver=None) -> None:
+    def refresh_data(self, webdriver=None) -> dict:
         """Update the class attributes (title, status, etc.) using the
         anime id to (re)download the data from MyAnimeList.
         
@@ -196,34 +185,15 @@ class Anime:
         
         Returns
         -------
-            None
+            dict: The attributes that changed, mapped to (old, new)
+                value pairs. Empty if nothing changed or the request
+                failed.
         """
         if not webdriver:
-            req = download("https://myanimelist.net/anime/" + self.id)
+            req = download("https://myanimelist.net/anime/" + str(self.id))
         else:
-            req = download("https://myanimelist.net/anime/" + self.id, webdriver)
-
-        if not req.ok: return   # Skip bad requests
-
-        data = self.parse_page((self.id, req.content))
-
-        self.id = data.get("id")
-        self.title = data.get("title")
-        self.english = data.get("english", [])
-        self.synonyms = data.get("synonyms", [])
-        self.japanese = data.get("japanese", [])
-        self.type = data.get("type")
-        self.episodes = data.get("episodes", 0)
-        self.status = data.get("status")
-        self.aired = data.get("aired", "")
-        self.season = data.get("season", "")
-        self.year = data.get("year", "")
-        self.producers = data.get("producers", [])
-        self.licensors = data.get("licensors", [])
-        self.studios = data.get("studios", [])
-        self.source = data.get("source", "")
-        self.genres = data.get("genres", [])
-        self.theme = data.get("theme", "")
-        self.demographic = data.get("demographic", "")
-        self.duration = data.get("duration", "")
-        self.rating = data.get("rating", "")
\ No newline at end of file
+            req = download("https://myanimelist.net/anime/" + str(self.id), webdriver)
+
+        if not req.ok: return {}   # Skip bad requests
+
+        return ANIME_SCHEMA.update(self, self.parse_page(req))
@@ -0,0 +1,77 @@
+class BatchResult:
+    """The outcome of fetching a single id as part of a batch.
+
+    Attributes
+    ----------
+        id (int|str): The id that was requested.
+        record (Anime|Manga): The fetched object, or None on failure.
+        error (Exception): The error raised while fetching, or None.
+    """
+
+    __slots__ = ("id", "record", "error")
+
+    def __init__(self, id, record=None, error=None) -> None:
+        self.id = id
+        self.record = record
+        self.error = error
+
+    def __str__(self) -> str:
+        return f"{self.id} <{self.record if self.ok else type(self.error).__name__}>"
+
+    @property
+    def ok(self) -> bool:
+        """Whether the id was fetched successfully."""
+        return self.error is None
+
+
+def fetch_many(fetch, ids, workers:int=4, errors:tuple=(Exception,)):
+    """Calls fetch on every id using a bounded pool of threads and
+    yields a BatchResult for each id as soon as it finishes.
+
+    Only a few calls per worker are queued at a time so that very
+    large iterables of ids are consumed lazily.
+
+    Parameters
+    ----------
+        fetch (callable): A function that takes an id and returns a record.
+        ids (iterable): The ids to fetch.
+        workers (int) (optional): The number of threads to use.
+        errors (tuple) (optional): The exception types to capture in the
+            results. Any other exception stops the batch.
+
+    Yields
+    ------
+        BatchResult: The result for each id, in order of completion.
+    """
+    if workers < 1: raise ValueError("workers must be at least 1")
+
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    def _run(id):
+        try:
+            return BatchResult(id, fetch(id))
+        except errors as e:
+            return BatchResult(id, error=e)
+
+    ids = iter(ids)
+    max_pending = workers * 2
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        try:
+            while True:
+                # Keep the pool busy without reading the whole iterable up front
+                for id in ids:
+                    pending.add(pool.submit(_run, id))
+                    if len(pending) >= max_pending: break
+
+                if not pending: return
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    yield future.result()
+        finally:
+            # Don't start new requests if the caller stops early
+            for future in pending: future.cancel()
@@ -0,0 +1,272 @@
+"""Benchmarks for parsing and fetching, run without network access.
+
+Usage:
+    python -m MyAnimeListPy.benchmarks --out bench.json
+    python -m MyAnimeListPy.benchmarks --out new.json --compare old.json
+
+Results are written as JSON so runs from different commits can be
+compared with --compare. The run fails when the parser engines
+disagree, when --compare finds regressions or when importing the
+package goes over --import-budget-ms or imports requests, bs4 and
+other heavy dependencies up front.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from .. import Anime, Manga, MyAnimeList
+from ..utils.download import Page
+from ..utils.parsing import ENGINES
+from . import fixtures
+from .stub_server import StubServer
+
+CLASSES = {"anime": Anime, "manga": Manga}
+
+# The package being benchmarked and the directory it is importable from
+PACKAGE = __package__.rpartition(".")[0]
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# How long importing the package may take by default
+IMPORT_BUDGET_MS = 50.0
+
+# Dependencies that must not be imported by importing the package
+LAZY_DEPENDENCIES = ("requests", "bs4", "soupsieve", "lxml", "aiohttp", "asyncio", "sqlite3",
+                    "concurrent.futures")
+
+
+def _page(name:str) -> Page:
+    kind = fixtures.kind(name)
+    return Page(f"https://myanimelist.net/{kind}/1", content=fixtures.load(name))
+
+
+def available_engines(engines=ENGINES) -> list:
+    """Returns the parser engines whose dependencies are installed."""
+    found = []
+    for engine in engines:
+        try:
+            Anime(_page("anime_small"), engine)
+        except Exception:
+            continue
+        found.append(engine)
+    return found
+
+
+def check_parity(engines) -> list:
+    """Checks that every engine builds the same record as html.parser
+    for every fixture page."""
+    results = []
+    for name in fixtures.PAGES:
+        cls = CLASSES[fixtures.kind(name)]
+        expected = cls(_page(name), "html.parser").gather_data()
+        for engine in engines:
+            results.append({
+                "page": name, "engine": engine,
+                "equal": cls(_page(name), engine).gather_data() == expected,
+            })
+    return results
+
+
+def bench_parse(engines, iterations:int) -> list:
+    """Measures how long it takes to build a record from each page."""
+    results = []
+    for name in fixtures.PAGES:
+        cls = CLASSES[fixtures.kind(name)]
+        page = _page(name)
+
+        for engine in engines:
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                cls(page, engine)
+                timings.append(time.perf_counter() - start)
+
+            timings.sort()
+            results.append({
+                "page": name, "engine": engine, "bytes": len(page.content),
+                "median_ms": statistics.median(timings) * 1000,
+                "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+                "records_per_s": len(timings) / sum(timings),
+            })
+    return results
+
+
+def bench_memory(engines, records:int) -> list:
+    """Measures the peak memory used while building a record and the
+    memory retained per record."""
+    results = []
+    for name in ("anime_small", "manga_small", "anime_huge"):
+        cls = CLASSES[fixtures.kind(name)]
+        page = _page(name)
+
+        for engine in engines:
+            tracemalloc.start()
+            cls(page, engine)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            tracemalloc.start()
+            kept = [cls(page, engine) for _ in range(records)]
+            # Parse trees have reference cycles, don't count the ones
+            # that are only waiting to be collected
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del kept
+
+            results.append({
+                "page": name, "engine": engine,
+                "peak_bytes": peak, "retained_bytes_per_record": retained / records,
+            })
+    return results
+
+
+def bench_pipeline(requests:int, workers:int, rate_limit:float, latency:float,
+                throttle_rate:float, error_rate:float, missing_rate:float, engine:str,
+                stream:bool=False) -> dict:
+    """Fetches ids from a local stub server through MyAnimeList and
+    measures the end-to-end throughput."""
+    missing = range(0, requests, max(1, round(1 / missing_rate))) if missing_rate else ()
+
+    with StubServer(latency, throttle_rate, error_rate, missing, retry_after=0) as server:
+        client = MyAnimeList(rate_limit=rate_limit, parser=engine, stream=stream)
+        client.base_url = server.url
+
+        outcomes = {}
+        start = time.perf_counter()
+        for result in client.get_anime_many(range(requests), workers):
+            outcome = "ok" if result.ok else type(result.error).__name__
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        elapsed = time.perf_counter() - start
+
+        return {
+            "requests": requests, "workers": workers, "rate_limit": rate_limit,
+            "latency": latency, "throttle_rate": throttle_rate, "error_rate": error_rate,
+            "engine": engine, "stream": stream, "seconds": elapsed, "records_per_s": outcomes.get("ok", 0) / elapsed,
+            "outcomes": outcomes, "responses": {str(k): v for k, v in server.counts.items()},
+            "transport": client.transport.stats(),
+        }
+
+
+def bench_import(runs:int=5, package:str=PACKAGE, root:str=PACKAGE_ROOT) -> dict:
+    """Measures how long importing the package takes in a fresh
+    interpreter (with -X importtime) and which heavy dependencies the
+    import pulls in. package is imported from the root directory."""
+    code = f"import sys, {package}; print(','.join(sorted(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get("PYTHONPATH")))))
+
+    timings = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env=env, check=True)
+
+        for line in proc.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].rstrip() == " " + package:
+                timings.append(int(fields[1]) / 1000)
+
+        modules = set(proc.stdout.strip().split(","))
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "eager": [name for name in LAZY_DEPENDENCIES if name in modules],
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old:dict, new:dict, threshold:float=0.1) -> list:
+    """Returns the parse benchmarks whose median got slower by more
+    than threshold (a fraction) between two result files."""
+    before = {(r["page"], r["engine"]): r["median_ms"] for r in old.get("parse", [])}
+    regressions = []
+    for r in new.get("parse", []):
+        key = (r["page"], r["engine"])
+        if key in before and r["median_ms"] > before[key] * (1 + threshold):
+            regressions.append({"page": key[0], "engine": key[1],
+                                "before_ms": before[key], "after_ms": r["median_ms"]})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the MyAnimeListPy benchmarks.")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="a previous result file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--memory-records", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0.001)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--missing-rate", type=float, default=0.05)
+    parser.add_argument("--stream", action="store_true", help="stream pages in the pipeline benchmark")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help="fail when importing the package takes longer than this")
+    args = parser.parse_args(argv)
+
+    engines = available_engines(args.engines)
+
+    results = {
+        "meta": {
+            "commit": _commit(), "python": platform.python_version(),
+            "platform": platform.platform(), "time": time.time(), "engines": engines,
+        },
+        "import": bench_import(),
+        "parity": check_parity(engines),
+        "parse": bench_parse(engines, args.iterations),
+        "memory": bench_memory(engines, args.memory_records),
+        "pipeline": bench_pipeline(args.requests, args.workers, args.rate_limit, args.latency,
+                                args.throttle_rate, args.error_rate, args.missing_rate, engines[0], args.stream),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f: f.write(output)
+    else:
+        print(output)
+
+    status = 0
+    if not all(r["equal"] for r in results["parity"]):
+        print("parser engines disagree:", [r for r in results["parity"] if not r["equal"]], file=sys.stderr)
+        status = 1
+
+    imported = results["import"]
+    if imported["median_ms"] > args.import_budget_ms:
+        print(f"importing {PACKAGE} took {imported['median_ms']:.1f}ms, "
+            f"over the {args.import_budget_ms:.0f}ms budget", file=sys.stderr)
+        status = 1
+    if imported["eager"]:
+        print(f"importing {PACKAGE} imports {', '.join(imported['eager'])}", file=sys.stderr)
+        status = 1
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for r in regressions:
+            print(f"slower: {r['page']} ({r['engine']}) {r['before_ms']:.2f}ms -> {r['after_ms']:.2f}ms",
+                file=sys.stderr)
+        if regressions: status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+"""Synthetic MAL pages used by the benchmarks, the stub server and the
+tests.
+
+The pages are hand-written to follow the markup of myanimelist.net
+(the title, the info sidebar rows, the related entries table and the
+listing tables the parsers read). They are not copies of real pages,
+so they can miss markup the live site has. The small and minimal pages
+are stored as files. The huge pages are
+built from the small ones by appending reviews, recommendations and
+comments to the right-hand side, which is what makes real pages of
+popular titles large. The late related page moves the related entries
+table after a score block, a long synopsis and a background, as on
+real pages.
+"""
+import os
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (kind, file or base page)
+PAGES = {
+    "anime_small": ("anime", "anime_small.html"),
+    "anime_minimal": ("anime", "anime_minimal.html"),
+    "anime_huge": ("anime", "anime_small"),
+    "anime_late_related": ("anime", "anime_small"),
+    "manga_small": ("manga", "manga_small.html"),
+    "manga_huge": ("manga", "manga_small"),
+}
+
+NOT_FOUND = "not_found.html"
+
+# name -> file of the listing pages (season, top and search)
+LISTINGS = {
+    "season": "season_small.html",
+    "top_anime": "top_anime_small.html",
+    "top_manga": "top_manga_small.html",
+    "search_anime": "search_anime_small.html",
+    "search_manga": "search_manga_small.html",
+}
+
+_REVIEW = (
+    '<div class="review-element js-review-element"><div class="spaceit_pad">'
+    '<a href="/profile/user{n}">user{n}</a> <span class="tags">Recommended</span></div>'
+    '<div class="text">' + "This is an overlong review paragraph. " * 40 + '</div>'
+    '<div class="spaceit_pad"><a href="/reviews.php?id={n}">Read more</a> '
+    '<span class="dark_text">Helpful:</span> {n}</div></div>\n'
+)
+
+_SYNOPSIS = "Crime is timeless. By the year 2071, humanity has expanded across the galaxy. " * 320
+
+_cache = {}
+
+
+def _read(filename:str) -> bytes:
+    with open(os.path.join(DIRECTORY, filename), "rb") as f:
+        return f.read()
+
+
+def huge(content:bytes, reviews:int=300) -> bytes:
+    """Appends reviews to the end of the right-hand side of a page."""
+    marker = content.rindex(b"</div></td></tr></table>")
+    padding = "".join(_REVIEW.format(n=n) for n in range(reviews)).encode("utf-8")
+    return content[:marker] + padding + content[marker:]
+
+
+def late_related(content:bytes) -> bytes:
+    """Inserts a score block, a long synopsis and a background before the
+    related entries table of a page."""
+    start = content.index(b'<table class="anime_detail_related_anime"')
+    preamble = (
+        '<div class="anime-detail-header-stats"><div class="score-label">8.75</div>'
+        '<span class="numbers ranked">Ranked <strong>#28</strong></span></div>\n'
+        '<p itemprop="description">' + _SYNOPSIS + '</p>\n'
+        '<h2>Background</h2><div class="background">' + _SYNOPSIS + '</div>\n'
+    ).encode("utf-8")
+    return content[:start] + preamble + content[start:]
+
+
+_BUILDERS = {"anime_late_related": late_related}
+
+
+def load(name:str) -> bytes:
+    """Returns the html of a fixture page."""
+    if name not in _cache:
+        if name == "not_found":
+            _cache[name] = _read(NOT_FOUND)
+        elif name in LISTINGS:
+            _cache[name] = _read(LISTINGS[name])
+        else:
+            source = PAGES[name][1]
+            if source in PAGES: _cache[name] = _BUILDERS.get(name, huge)(load(source))
+            else: _cache[name] = _read(source)
+    return _cache[name]
+
+
+def kind(name:str) -> str:
+    """Returns "anime" or "manga" for a fixture page."""
+    return PAGES[name][0]
@@ -0,0 +1,175 @@
+import gzip
+import hashlib
+import http.server
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from . import fixtures
+
+
+class StubServer:
+    """A local HTTP server that serves the fixture pages under
+    /anime/<id> and /manga/<id> so the fetch pipeline can be exercised
+    without network access.
+
+    Pages are picked from the fixtures by id. Latency, throttling
+    (429 with Retry-After), server errors and missing ids can be
+    injected. Responses carry an ETag, conditional requests are
+    answered with 304 and bodies are gzipped when the client accepts it.
+
+    The fixture season, top and search pages are served for any
+    season, ranking type or query. Only the first page of top lists and
+    search results exists, later ones are answered with 404.
+
+    Attributes
+    ----------
+        latency (float): Seconds to wait before answering each request.
+        throttle_rate (float): The fraction of requests answered with 429.
+        error_rate (float): The fraction of requests answered with 500.
+        missing (set): Ids answered with 404.
+        retry_after (int): The Retry-After value sent with a 429.
+        counts (dict): The number of responses sent per status code.
+    """
+
+    def __init__(self, latency:float=0.0, throttle_rate:float=0.0, error_rate:float=0.0,
+                missing=(), retry_after:int=1, pages=None, seed:int=0) -> None:
+        """
+        The constructor of the StubServer class.
+
+        Parameters
+        ----------
+            latency (float) (optional): Seconds to wait per request.
+            throttle_rate (float) (optional): The fraction of 429s.
+            error_rate (float) (optional): The fraction of 500s.
+            missing (iterable) (optional): Ids answered with 404.
+            retry_after (int) (optional): The Retry-After sent with 429s.
+            pages (dict) (optional): kind -> list of fixture names to
+                serve. Defaults to every fixture of that kind.
+            seed (int) (optional): The seed for the injected failures.
+        """
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.missing = {str(id) for id in missing}
+        self.retry_after = retry_after
+        self.counts = {}
+
+        if pages is None:
+            pages = {}
+            for name in fixtures.PAGES: pages.setdefault(fixtures.kind(name), []).append(name)
+        self._pages = {kind: [fixtures.load(name) for name in names] for kind, names in pages.items()}
+
+        self._gzipped = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """The base url to use in place of https://myanimelist.net."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page(self, kind:str, id:str) -> bytes:
+        """Returns the body served for /kind/id."""
+        pages = self._pages[kind]
+        return pages[int(id) % len(pages)]
+
+    def listing(self, path:str):
+        """Returns the body served for a listing page, or None when the
+        path isn't one."""
+        url = urlsplit(path)
+        query = parse_qs(url.query)
+        first = query.get("limit", query.get("show", ["0"]))[0] == "0"
+
+        if url.path.startswith("/anime/season/"): return fixtures.load("season")
+        for kind in ("anime", "manga"):
+            if url.path in (f"/top{kind}.php", f"/{kind}.php"):
+                if not first: return fixtures.load("not_found")
+                name = "top_" if url.path.startswith("/top") else "search_"
+                return fixtures.load(name + kind)
+        return None
+
+    def _respond(self, path:str, headers) -> tuple:
+        # Returns (status, headers, body)
+        with self._lock:
+            roll = self._random.random()
+
+        listing = self.listing(path)
+        if listing is not None:
+            status = 404 if listing == fixtures.load("not_found") else 200
+            return status, {"Content-Type": "text/html; charset=UTF-8"}, listing
+
+        parts = path.split("?")[0].strip("/").split("/")
+        if len(parts) < 2 or parts[0] not in self._pages or not parts[1].isdigit():
+            return 404, {}, fixtures.load("not_found")
+
+        if roll < self.throttle_rate:
+            return 429, {"Retry-After": str(self.retry_after)}, b""
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {}, b"Internal Server Error"
+        if parts[1] in self.missing:
+            return 404, {}, fixtures.load("not_found")
+
+        body = self.page(parts[0], parts[1])
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+
+        if "gzip" in headers.get("Accept-Encoding", ""):
+            if etag not in self._gzipped: self._gzipped[etag] = gzip.compress(body)
+            return 200, {"ETag": etag, "Content-Type": "text/html; charset=UTF-8",
+                        "Content-Encoding": "gzip"}, self._gzipped[etag]
+        return 200, {"ETag": etag, "Content-Type": "text/html; charset=UTF-8"}, body
+
+    def start(self) -> "StubServer":
+        """Starts serving on a free local port in a background thread."""
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._answer(send_body=True)
+
+            def do_HEAD(self):
+                self._answer(send_body=False)
+
+            def _answer(self, send_body:bool):
+                if stub.latency: time.sleep(stub.latency)
+
+                status, headers, body = stub._respond(self.path, self.headers)
+                with stub._lock:
+                    stub.counts[status] = stub.counts.get(status, 0) + 1
+
+                self.send_response(status)
+                for key, value in headers.items(): self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body: self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,293 @@
+import heapq
+from array import array
+from bisect import bisect_left
+
+# Columns stored as integers. Values that aren't numbers are stored as MISSING.
+NUMERIC_COLUMNS = ("id", "episodes", "volumes", "chapters", "year")
+MISSING = -1
+
+# Singular names accepted by the filters
+ALIASES = {
+    "genre": "genres", "studio": "studios", "producer": "producers",
+    "licensor": "licensors", "author": "authors", "synonym": "synonyms",
+}
+
+
+def _to_int(value) -> int:
+    try:
+        return int(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def _union(postings:list) -> array:
+    # Merges sorted arrays of row indices, dropping duplicates
+    if len(postings) == 1: return postings[0]
+
+    rows = array("l")
+    for i in heapq.merge(*postings):
+        if not rows or rows[-1] != i: rows.append(i)
+    return rows
+
+
+def _intersect(small:array, large:array) -> array:
+    # Both are sorted, so every lookup in large starts where the last
+    # one stopped
+    rows = array("l")
+    lo, end = 0, len(large)
+    for i in small:
+        lo = bisect_left(large, i, lo)
+        if lo == end: break
+        if large[lo] == i: rows.append(i)
+    return rows
+
+
+class Row:
+    """A view of one row of a Catalog. Values are read from the
+    catalog's columns when accessed, nothing is copied up front."""
+
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog:"Catalog", index:int) -> None:
+        self._catalog = catalog
+        self._index = index
+
+    def __str__(self) -> str:
+        return f"{self.id} <{self.title}>"
+
+    def __getattr__(self, name:str):
+        if name.startswith("_"): raise AttributeError(name)
+        return self._catalog.value(name, self._index)
+
+    def gather_data(self) -> dict:
+        """Returns a dict of all the data in the row."""
+        return {name: self._catalog.value(name, self._index) for name in self._catalog.columns}
+
+
+class Catalog:
+    """A memory-compact, column oriented collection of Anime/Manga.
+
+    Numeric fields are stored in typed arrays, text fields as integer
+    codes into one shared string table and list fields (genres,
+    studios, ...) as an offsets array plus a values array of codes. A
+    catalog of tens of thousands of records therefore costs a handful of
+    arrays instead of one object, list and string per value.
+
+    The partial flag of every row (see listing) is kept outside the
+    columns and read as Row.partial.
+
+    Attributes
+    ----------
+        columns (tuple): The names of the columns, in order.
+        strings (list): The interned strings referenced by the codes.
+    """
+
+    __slots__ = ("columns", "strings", "_codes", "_scalars", "_offsets", "_values",
+                "_partial", "_postings", "_ids", "_size")
+
+    def __init__(self, columns, multi=()) -> None:
+        """
+        The constructor of the Catalog class.
+
+        Parameters
+        ----------
+            columns (iterable): The names of the columns.
+            multi (iterable) (optional): The columns holding lists.
+        """
+        self.columns = tuple(columns)
+        self.strings = []
+        self._codes = {}
+        self._scalars = {}
+        self._offsets = {}
+        self._values = {}
+        self._partial = array("b")
+        self._postings = {}
+        self._ids = None
+        self._size = 0
+
+        for name in self.columns:
+            if name in multi:
+                self._offsets[name] = array("l", [0])
+                self._values[name] = array("l")
+            else:
+                self._scalars[name] = array("l")
+
+    @classmethod
+    def from_records(cls, records) -> "Catalog":
+        """Builds a catalog from Anime/Manga objects or gather_data() dicts.
+
+        Columns holding a list in any record are stored as list columns.
+        """
+        records = [r if isinstance(r, dict) else {**r.gather_data(), "partial": r.partial} for r in records]
+        if not records: return cls(())
+
+        columns = [name for name in records[0] if name != "partial"]
+        multi = {name for name in columns if any(isinstance(r.get(name), list) for r in records)}
+
+        catalog = cls(columns, multi)
+        for record in records: catalog.append(record)
+        return catalog
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        return (Row(self, i) for i in range(self._size))
+
+    def __getitem__(self, index:int) -> Row:
+        if not -self._size <= index < self._size: raise IndexError(index)
+        return Row(self, index % self._size)
+
+    def intern(self, value:str) -> int:
+        """Returns the code of a string, adding it to the string table."""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def append(self, record) -> None:
+        """Adds an Anime/Manga object or gather_data() dict as a row,
+        with its partial flag (a "partial" key for dicts)."""
+        if not isinstance(record, dict): record = {**record.gather_data(), "partial": record.partial}
+
+        for name, column in self._scalars.items():
+            value = record.get(name)
+            if name in NUMERIC_COLUMNS:
+                column.append(_to_int(value))
+            elif value is None:
+                column.append(MISSING)
+            else:
+                column.append(self.intern(str(value)))
+
+        for name, values in self._values.items():
+            items = record.get(name)
+            if not isinstance(items, list): items = [items] if items else []
+            values.extend(self.intern(str(item)) for item in items)
+            self._offsets[name].append(len(values))
+
+        self._partial.append(bool(record.get("partial")))
+        self._size += 1
+        self._postings.clear()
+        self._ids = None
+
+    def value(self, name:str, index:int):
+        """Returns the value of a column (or partial) for the row at
+        index."""
+        if name == "partial": return bool(self._partial[index])
+
+        if name in self._scalars:
+            code = self._scalars[name][index]
+            if code == MISSING: return None
+            return code if name in NUMERIC_COLUMNS else self.strings[code]
+
+        if name in self._values:
+            offsets = self._offsets[name]
+            values = self._values[name]
+            return [self.strings[code] for code in values[offsets[index]:offsets[index + 1]]]
+
+        raise AttributeError(name)
+
+    def row(self, id) -> Row:
+        """Returns the row for an anime/manga id."""
+        if self._ids is None:
+            self._ids = {id: i for i, id in enumerate(self._scalars["id"])}
+        return Row(self, self._ids[int(id)])
+
+    def _posting(self, name:str) -> dict:
+        # code -> sorted rows for a list or text column, built on first use
+        if name not in self._postings:
+            postings = {}
+            if name in self._values:
+                offsets = self._offsets[name]
+                values = self._values[name]
+                for i in range(self._size):
+                    for code in values[offsets[i]:offsets[i + 1]]:
+                        rows = postings.setdefault(code, array("l"))
+                        if not rows or rows[-1] != i: rows.append(i)
+            else:
+                for i, code in enumerate(self._scalars[name]):
+                    if code != MISSING: postings.setdefault(code, array("l")).append(i)
+            self._postings[name] = postings
+        return self._postings[name]
+
+    def _match(self, name:str, wanted) -> array:
+        # The sorted rows whose column holds one of the wanted values
+        if isinstance(wanted, (str, int)): wanted = (wanted,)
+
+        if name in NUMERIC_COLUMNS:
+            column = self._scalars[name]
+            wanted = wanted if isinstance(wanted, range) else {int(v) for v in wanted}
+            return array("l", (i for i, value in enumerate(column) if value in wanted))
+
+        postings = self._posting(name)
+        matched = [postings[code] for code in
+                   {self._codes.get(str(value)) for value in wanted} if code in postings]
+        return _union(matched) if matched else array("l")
+
+    def where(self, **conditions) -> array:
+        """Returns the sorted indices of the rows matching every condition.
+
+        Each keyword is a column (or a singular alias such as genre or
+        studio) and its value is a value, a collection of values or, for
+        numeric columns, a range. List columns match when they contain
+        any of the values.
+
+            catalog.where(year=range(2010, 2020), season="Spring", genre="Action")
+        """
+        matches = []
+        for name, wanted in conditions.items():
+            name = ALIASES.get(name, name)
+            if name not in self.columns: raise KeyError(name)
+            matches.append(self._match(name, wanted))
+
+        if not matches: return array("l", range(self._size))
+
+        # Intersect from the shortest match, so every step is at most
+        # as long as it
+        matches.sort(key=len)
+        rows = matches[0]
+        for matched in matches[1:]:
+            if not rows: break
+            rows = _intersect(rows, matched)
+
+        # Don't hand out a cached posting
+        return array("l", rows)
+
+    def filter(self, **conditions) -> list:
+        """Returns Row views of the rows matching where(**conditions)."""
+        return [Row(self, i) for i in self.where(**conditions)]
+
+    def count_by(self, name:str, rows=None) -> dict:
+        """Counts the rows per value of a column. For list columns every
+        value in the list is counted.
+
+        Parameters
+        ----------
+            name (str): The column (or alias) to group by.
+            rows (iterable) (optional): Row indices (e.g. from where) to
+                restrict the count to.
+        """
+        name = ALIASES.get(name, name)
+        counts = {}
+
+        if name in self._values:
+            if rows is None:
+                for code, matched in self._posting(name).items():
+                    counts[self.strings[code]] = len(matched)
+                return counts
+
+            offsets = self._offsets[name]
+            values = self._values[name]
+            for i in rows:
+                for code in values[offsets[i]:offsets[i + 1]]:
+                    counts[code] = counts.get(code, 0) + 1
+            return {self.strings[code]: n for code, n in counts.items()}
+
+        column = self._scalars[name]
+        for i in (range(self._size) if rows is None else rows):
+            counts[column[i]] = counts.get(column[i], 0) + 1
+
+        if name in NUMERIC_COLUMNS:
+            return {(None if code == MISSING else code): n for code, n in counts.items()}
+        return {(None if code == MISSING else self.strings[code]): n for code, n in counts.items()}
@@ -0,0 +1,358 @@
+"""Resumable bulk crawler for the anime and manga id spaces.
+
+Usage:
+    python -m MyAnimeListPy.crawler anime --ids 1-60000 --out crawl/anime
+    python -m MyAnimeListPy.crawler manga --ids-file ids.txt --format parquet --out crawl/manga
+
+Records are written in append-only chunks (records-00000.jsonl, ...)
+and the ids that have been written are checkpointed after every chunk,
+so running the same command again continues where it stopped. Missing
+ids and errors are appended to errors.jsonl and checkpointed too.
+--retry-errors crawls them again: they are taken out of the checkpoint
+and errors.jsonl starts over with the ids that fail again.
+
+    python -m MyAnimeListPy.crawler anime --retry-errors --out crawl/anime
+
+With --idmap, ids known to be missing (see discovery) are skipped
+without a request and the map is updated with every id fetched.
+"""
+import argparse
+import json
+import os
+
+from .anime import ANIME_SCHEMA
+from .errors import NoContentError
+from .manga import MANGA_SCHEMA
+from .pipeline import ingest
+
+FORMATS = ("jsonl", "parquet")
+
+SCHEMAS = {"anime": ANIME_SCHEMA, "manga": MANGA_SCHEMA}
+
+
+def parse_ranges(spec:str):
+    """Yields the ids in a comma separated list of ids and inclusive
+    ranges, e.g. "1-100,205,300-310"."""
+    for part in spec.split(","):
+        part = part.strip()
+        if not part: continue
+
+        if "-" in part:
+            start, end = part.split("-", 1)
+            yield from range(int(start), int(end) + 1)
+        else:
+            yield int(part)
+
+
+def read_ids(path:str):
+    """Yields the ids in a file with one id per line. Lines may also be
+    JSON objects with an "id" key (such as errors.jsonl)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"): continue
+            yield int(json.loads(line)["id"]) if line.startswith("{") else int(line)
+
+
+def compress_ids(ids) -> list:
+    """Collapses ids into a sorted list of inclusive [start, end] ranges."""
+    ranges = []
+    for id in sorted(set(ids)):
+        if ranges and ranges[-1][1] == id - 1:
+            ranges[-1][1] = id
+        else:
+            ranges.append([id, id])
+    return ranges
+
+
+def expand_ids(ranges) -> set:
+    """The inverse of compress_ids."""
+    return {id for start, end in ranges for id in range(start, end + 1)}
+
+
+def _write_atomic(path:str, data:bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _list_attrs(schema) -> set:
+    # Fields read from links can hold several values even when their
+    # default is a string, e.g. an entry with two themes
+    attrs = {attr for attr, default in schema.defaults.items() if isinstance(default, list)}
+    attrs.update(field.attrs for field in schema.fields.values() if field.links and isinstance(field.attrs, str))
+    return attrs
+
+
+def _as_list(value, unknown:str) -> list:
+    if isinstance(value, list): return [str(x) for x in value]
+    return [] if value in (None, "", unknown) else [str(value)]
+
+
+def parquet_schema(schema):
+    """Returns the pyarrow schema of the records of an Anime/Manga
+    schema, so every chunk of a crawl has the same column types.
+
+    Values are a mix of str/int depending on the page, so the id is the
+    only int column, list fields are lists of strings and the rest are
+    strings.
+    """
+    import pyarrow as pa
+
+    lists = _list_attrs(schema)
+    return pa.schema([pa.field("id", pa.int64())] + [
+        pa.field(attr, pa.list_(pa.string()) if attr in lists else pa.string())
+        for attr in schema.defaults
+    ])
+
+
+def _write_parquet(path:str, records:list, schema) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required for parquet output")
+
+    lists = _list_attrs(schema)
+    columns = {"id": [int(record["id"]) for record in records]}
+    for attr in schema.defaults:
+        values = [record.get(attr) for record in records]
+        if attr in lists:
+            columns[attr] = [_as_list(v, schema.unknown) for v in values]
+        else:
+            columns[attr] = [None if v is None else str(v) for v in values]
+
+    tmp = path + ".tmp"
+    pq.write_table(pa.table(columns, schema=parquet_schema(schema)), tmp)
+    os.replace(tmp, path)
+
+
+class Crawler:
+    """Fetches ids through a rate-limited client and streams the
+    gather_data() records to disk in checkpointed chunks.
+
+    Attributes
+    ----------
+        client (MyAnimeList): The client used for requests.
+        kind (str): Either "anime" or "manga".
+        out_dir (str): The directory the output is written to.
+        format (str): Either "jsonl" or "parquet".
+        chunk_size (int): The number of ids handled per chunk.
+        workers (int): The number of concurrent requests.
+        parse_workers (int): The number of parsing processes, or 0 to
+            parse in the request threads.
+        done (set): The ids that have been written (records and errors).
+    """
+
+    __slots__ = ("client", "kind", "out_dir", "format", "chunk_size", "workers",
+                "parse_workers", "done", "_part", "_records", "_errors", "_pending")
+
+    def __init__(self, client, kind:str, out_dir:str, format:str="jsonl",
+                chunk_size:int=500, workers:int=4, parse_workers:int=0) -> None:
+        """
+        The constructor of the Crawler class.
+
+        Parameters
+        ----------
+            client (MyAnimeList): The client used for requests.
+            kind (str): Either "anime" or "manga".
+            out_dir (str): The directory the output is written to. The
+                checkpoint in it is loaded when it exists.
+            format (str) (optional): Either "jsonl" or "parquet".
+            chunk_size (int) (optional): The number of ids per chunk.
+            workers (int) (optional): The number of concurrent requests.
+            parse_workers (int) (optional): Parse pages in this many
+                processes (see pipeline.ingest). 0 parses them in the
+                request threads.
+        """
+        if kind not in ("anime", "manga"): raise ValueError(f"Unknown kind {kind!r}")
+        if format not in FORMATS: raise ValueError(f"Unknown format {format!r}, expected one of {FORMATS}")
+
+        self.client = client
+        self.kind = kind
+        self.out_dir = out_dir
+        self.format = format
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.parse_workers = parse_workers
+
+        self.done = set()
+        self._part = 0
+        self._records = []
+        self._errors = []
+        self._pending = []
+
+        os.makedirs(out_dir, exist_ok=True)
+        self._load_checkpoint()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.out_dir, "checkpoint.json")
+
+    @property
+    def errors_path(self) -> str:
+        return os.path.join(self.out_dir, "errors.jsonl")
+
+    def _load_checkpoint(self) -> None:
+        if not os.path.exists(self.checkpoint_path): return
+
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            state = json.load(f)
+
+        if state.get("kind") != self.kind:
+            raise ValueError(f"{self.out_dir} holds a {state.get('kind')} crawl")
+
+        self.done = expand_ids(state["done"])
+        self._part = state["part"]
+
+    def _save_checkpoint(self) -> None:
+        state = {"kind": self.kind, "part": self._part, "done": compress_ids(self.done)}
+        _write_atomic(self.checkpoint_path, json.dumps(state).encode("utf-8"))
+
+    def flush(self) -> None:
+        """Writes the buffered records and errors and checkpoints them."""
+        if not self._pending: return
+
+        if self._records:
+            path = os.path.join(self.out_dir, f"records-{self._part:05d}.{self.format}")
+            if self.format == "jsonl":
+                lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self._records)
+                _write_atomic(path, lines.encode("utf-8"))
+            else:
+                _write_parquet(path, self._records, SCHEMAS[self.kind])
+            self._part += 1
+
+        self.done.update(self._pending)
+        self._save_checkpoint()
+
+        # After the checkpoint, so a crash in between can't make a rerun
+        # append the same errors again
+        if self._errors:
+            with open(self.errors_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(e) + "\n" for e in self._errors)
+        if self.client.idmap is not None and self.client.idmap.path is not None: self.client.idmap.save()
+
+        self._records = []
+        self._errors = []
+        self._pending = []
+
+    def run(self, ids, retry:bool=False) -> dict:
+        """Crawls the given ids, skipping the ones already written.
+
+        The ids are read (and duplicates dropped) before the crawl
+        starts, so they may come from a file the crawl appends to.
+
+        Parameters
+        ----------
+            ids (iterable): The ids to crawl.
+            retry (bool) (optional): Crawl ids even if they were already
+                written. They are taken out of the checkpoint first.
+
+        Returns
+        -------
+            dict: The number of records written, missing ids and errors.
+        """
+        stats = {"records": 0, "missing": 0, "errors": 0}
+
+        ids = list(dict.fromkeys(int(id) for id in ids))
+        if retry:
+            self.done.difference_update(ids)
+        else:
+            ids = [id for id in ids if id not in self.done]
+
+        if self.parse_workers:
+            results = ingest(self.client, self.kind, ids, self.workers, self.parse_workers, records=False)
+        elif self.kind == "anime":
+            results = self.client.get_anime_many(ids, self.workers)
+        else:
+            results = self.client.get_manga_many(ids, self.workers)
+
+        try:
+            for result in results:
+                if result.ok:
+                    record = result.record
+                    self._records.append(record if self.parse_workers else record.gather_data())
+                    stats["records"] += 1
+                else:
+                    missing = isinstance(result.error, NoContentError)
+                    self._errors.append({
+                        "id": result.id, "kind": self.kind,
+                        "error": "missing" if missing else repr(result.error),
+                    })
+                    stats["missing" if missing else "errors"] += 1
+
+                self._pending.append(int(result.id))
+                if len(self._pending) >= self.chunk_size: self.flush()
+        finally:
+            # Keep what was fetched when interrupted
+            self.flush()
+
+        return stats
+
+    def retry_errors(self) -> dict:
+        """Crawls the missing ids and errors in errors.jsonl again.
+
+        They are taken out of the checkpoint and errors.jsonl is started
+        over before the crawl, so it ends up holding the ids that failed
+        again. If the retry is interrupted, running the original crawl
+        again picks up the ids that weren't retried.
+
+        Returns
+        -------
+            dict: The number of records written, missing ids and errors.
+        """
+        if not os.path.exists(self.errors_path): return {"records": 0, "missing": 0, "errors": 0}
+
+        ids = list(dict.fromkeys(read_ids(self.errors_path)))
+        self.done.difference_update(ids)
+        self._save_checkpoint()
+        os.remove(self.errors_path)
+
+        return self.run(ids)
+
+
+def main(argv=None) -> int:
+    from . import MyAnimeList
+    from .utils.idmap import IdMap
+
+    parser = argparse.ArgumentParser(description="Crawl anime or manga from MyAnimeList.")
+    parser.add_argument("kind", choices=("anime", "manga"))
+    parser.add_argument("--ids", help='ids and inclusive ranges, e.g. "1-1000,2005"')
+    parser.add_argument("--ids-file", help="a file with one id (or JSON object with an id) per line")
+    parser.add_argument("--out", required=True, help="the output directory")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="parse pages in this many processes (0 parses in the request threads)")
+    parser.add_argument("--rate-limit", type=float, default=4.05)
+    parser.add_argument("--retry", action="store_true", help="crawl the given ids even if they are checkpointed")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="crawl the missing ids and errors in the output's errors.jsonl again")
+    parser.add_argument("--idmap", help="an id map (see discovery) used to skip missing ids")
+    args = parser.parse_args(argv)
+
+    if not args.ids and not args.ids_file and not args.retry_errors:
+        parser.error("one of --ids, --ids-file or --retry-errors is required")
+
+    ids = []
+    if args.ids: ids.append(parse_ranges(args.ids))
+    if args.ids_file: ids.append(read_ids(args.ids_file))
+
+    idmap = IdMap(args.idmap) if args.idmap else None
+    crawler = Crawler(MyAnimeList(rate_limit=args.rate_limit, idmap=idmap), args.kind, args.out,
+                    args.format, args.chunk_size, args.workers, args.parse_workers)
+    if args.retry_errors:
+        stats = crawler.retry_errors()
+    else:
+        stats = crawler.run((id for source in ids for id in source), retry=args.retry)
+
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""Cheap discovery of the anime and manga id spaces.
+
+Usage:
+    python -m MyAnimeListPy.discovery anime --ids 1-60000 --map ids.json --top-pages 600
+    python -m MyAnimeListPy.crawler anime --ids 1-60000 --idmap ids.json --out crawl/anime
+
+MAL ids are sparse, so a crawl of an id range spends much of its rate
+limit on 404s. Discovery fills an IdMap before the crawl:
+
+    1. top list pages name 50 existing ids per request
+    2. the remaining unknown ids are checked with HEAD requests, which
+       cost a rate limit token but no page download
+
+A client given the map skips the missing ids without a request. Listing
+pages only name ids that exist, so every id they don't list still costs
+one HEAD request, the same rate limit token as fetching it. Discovery
+followed by a first crawl of the same range therefore sends at least as
+many requests as the crawl alone (the crawl fills the map as well). The
+savings are the bandwidth of the pages not downloaded, and the requests
+of later crawls and refreshes, which skip the missing ids.
+
+Ids found missing are checked again after IdMap.dead_ttl, when they
+become unknown and are probed by the next discovery or crawl.
+"""
+import argparse
+import json
+
+from .batch import fetch_many
+from .errors import MALError
+
+
+def sweep_top(client, kind:str, pages:int) -> int:
+    """Marks the ids of the first pages of the top list as existing.
+
+    Parameters
+    ----------
+        client (MyAnimeList): A client with an idmap.
+        kind (str): Either "anime" or "manga".
+        pages (int): The number of top list pages to request.
+
+    Returns
+    -------
+        int: The number of ids listed.
+    """
+    records = client.get_top_anime(pages) if kind == "anime" else client.get_top_manga(pages)
+    return sum(1 for _ in records)
+
+
+def probe(client, kind:str, ids, workers:int=4):
+    """Checks whether ids exist with HEAD requests.
+
+    Yields
+    ------
+        BatchResult: The id with True or False as its record, or the
+            MALError raised for it.
+    """
+    client.transport.reserve(workers)
+    return fetch_many(lambda id: client.exists(kind, id), ids, workers, errors=(MALError,))
+
+
+def discover(client, kind:str, ids, workers:int=4, top_pages:int=0) -> dict:
+    """Fills the client's IdMap for the given ids.
+
+    Ids that are already known are not requested again, apart from
+    missing ids that have expired. Every other id costs a request, so
+    this only saves requests for the crawls that follow the first one
+    (see the module docstring).
+
+    Parameters
+    ----------
+        client (MyAnimeList): A client with an idmap.
+        kind (str): Either "anime" or "manga".
+        ids (iterable): The ids to discover.
+        workers (int) (optional): The number of concurrent requests.
+        top_pages (int) (optional): The number of top list pages to
+            sweep before probing.
+
+    Returns
+    -------
+        dict: The number of ids listed, probed, found valid or dead and
+            the errors.
+    """
+    if client.idmap is None: raise ValueError("discovery needs a client with an idmap")
+    if kind not in ("anime", "manga"): raise ValueError(f"Unknown kind {kind!r}")
+
+    stats = {"listed": 0, "probed": 0, "valid": 0, "dead": 0, "errors": 0}
+    if top_pages: stats["listed"] = sweep_top(client, kind, top_pages)
+
+    for result in probe(client, kind, client.idmap.unknown(kind, ids), workers):
+        stats["probed"] += 1
+        if not result.ok:
+            stats["errors"] += 1
+        else:
+            stats["valid" if result.record else "dead"] += 1
+
+    return stats
+
+
+def main(argv=None) -> int:
+    from . import MyAnimeList
+    from .crawler import parse_ranges, read_ids
+    from .utils.idmap import IdMap
+
+    parser = argparse.ArgumentParser(description="Find the anime or manga ids that exist.")
+    parser.add_argument("kind", choices=("anime", "manga"))
+    parser.add_argument("--ids", help='ids and inclusive ranges, e.g. "1-60000"')
+    parser.add_argument("--ids-file", help="a file with one id (or JSON object with an id) per line")
+    parser.add_argument("--map", required=True, help="the id map to update")
+    parser.add_argument("--top-pages", type=int, default=0, help="top list pages to sweep first")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate-limit", type=float, default=4.05)
+    args = parser.parse_args(argv)
+
+    if not args.ids and not args.ids_file: parser.error("one of --ids or --ids-file is required")
+
+    ids = []
+    if args.ids: ids.append(parse_ranges(args.ids))
+    if args.ids_file: ids.append(read_ids(args.ids_file))
+
+    idmap = IdMap(args.map)
+    client = MyAnimeList(rate_limit=args.rate_limit, idmap=idmap)
+    try:
+        stats = discover(client, args.kind, (id for source in ids for id in source), args.workers, args.top_pages)
+    finally:
+        idmap.save()
+
+    stats["map"] = idmap.stats(args.kind)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
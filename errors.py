@@ -0,0 +1,8 @@
+class NoContentError(Exception):
+    """Error for objects with no data."""
+    pass
+
+
+class MALError(Exception):
+    """All catch all error for MyAnimeList."""
+    pass
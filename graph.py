@@ -0,0 +1,299 @@
+"""Crawls the relations between anime and manga and answers franchise
+queries offline.
+
+Usage:
+    python -m MyAnimeListPy.graph anime/1 manga/2 --graph bebop.graph --records bebop.jsonl
+    python -m MyAnimeListPy.graph --graph bebop.graph --franchise manga/173
+
+Every page lists its related entries (sequels, side stories,
+adaptations...), kept as "anime/<id>" and "manga/<id>" strings in
+Anime.related and Manga.related. GraphCrawler walks them breadth first
+from seed entries, fetching each layer through the client's
+rate-limited batch fetching. Entries are marked visited when they are
+queued, so every entry costs exactly one request.
+
+An entry is stored as a node key, id << 1 | kind, so the visited set is
+a bitmap of a few KB and RelationGraph holds the adjacency lists as
+three arrays of ints (sorted nodes, offsets and edges).
+"""
+import argparse
+import json
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from .batch import BatchResult, fetch_many
+from .errors import NoContentError, MALError
+from .utils.idmap import Bitmap
+
+KINDS = ("anime", "manga")
+
+MAGIC = b"MALGRAPH"
+
+# Bumped whenever the layout changes
+_VERSION = 1
+
+# magic, version, number of nodes, number of edges
+_HEADER = struct.Struct("<8sIQQ")
+
+
+def node(kind:str, id) -> int:
+    """Returns the node key of an entry."""
+    return int(id) << 1 | KINDS.index(kind)
+
+
+def parse_node(name:str) -> int:
+    """Returns the node key of an "anime/<id>" or "manga/<id>" string."""
+    kind, _, id = name.partition("/")
+    if kind not in KINDS or not id.isdigit(): raise ValueError(f"Invalid entry {name!r}")
+    return node(kind, id)
+
+
+def node_name(key:int) -> str:
+    """The inverse of parse_node."""
+    return f"{KINDS[key & 1]}/{key >> 1}"
+
+
+class RelationGraph:
+    """The relations between entries as undirected adjacency lists.
+
+    A relation found on either entry's page links both ways, so a
+    franchise is a connected component of the graph.
+
+    Attributes
+    ----------
+        nodes (array): The node keys in ascending order.
+        offsets (array): Where the neighbors of each node start in edges.
+        edges (array): The node keys of the neighbors, node by node.
+    """
+
+    __slots__ = ("nodes", "offsets", "edges")
+
+    def __init__(self, nodes:array=None, offsets:array=None, edges:array=None) -> None:
+        self.nodes = nodes if nodes is not None else array("q")
+        self.offsets = offsets if offsets is not None else array("q", [0])
+        self.edges = edges if edges is not None else array("q")
+
+    @classmethod
+    def from_adjacency(cls, adjacency:dict) -> "RelationGraph":
+        """Builds a graph from a dict mapping node keys to the node keys
+        they link to."""
+        neighbors = {}
+        for key, links in adjacency.items():
+            neighbors.setdefault(key, set())
+            for link in links:
+                if link == key: continue
+                neighbors[key].add(link)
+                neighbors.setdefault(link, set()).add(key)
+
+        graph = cls(array("q", sorted(neighbors)))
+        for key in graph.nodes:
+            graph.edges.extend(sorted(neighbors[key]))
+            graph.offsets.append(len(graph.edges))
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, name:str) -> bool:
+        return self._index(parse_node(name)) is not None
+
+    def _index(self, key:int):
+        i = bisect_left(self.nodes, key)
+        if i < len(self.nodes) and self.nodes[i] == key: return i
+        return None
+
+    def _neighbors(self, key:int):
+        i = self._index(key)
+        if i is None: return self.edges[0:0]
+        return self.edges[self.offsets[i]:self.offsets[i + 1]]
+
+    def neighbors(self, name:str) -> list:
+        """Returns the entries directly related to an entry, such as
+        "anime/1"."""
+        return [node_name(key) for key in self._neighbors(parse_node(name))]
+
+    def franchise(self, name:str) -> list:
+        """Returns every entry connected to an entry through relations,
+        itself included, sorted by kind and id. Empty when the entry
+        isn't in the graph."""
+        start = parse_node(name)
+        if self._index(start) is None: return []
+
+        seen = {start}
+        frontier = [start]
+        while frontier:
+            next = []
+            for key in frontier:
+                for link in self._neighbors(key):
+                    if link not in seen:
+                        seen.add(link)
+                        next.append(link)
+            frontier = next
+
+        return [node_name(key) for key in sorted(seen, key=lambda key: (key & 1, key >> 1))]
+
+    def franchises(self):
+        """Yields every franchise (see franchise) in the graph once."""
+        done = Bitmap()
+        for key in self.nodes:
+            if done[key]: continue
+
+            members = self.franchise(node_name(key))
+            for member in members: done[parse_node(member)] = True
+            yield members
+
+    def save(self, path:str) -> None:
+        """Writes the graph to a file."""
+        arrays = [array("q", a) for a in (self.nodes, self.offsets, self.edges)]
+        if sys.byteorder == "big":
+            for a in arrays: a.byteswap()
+
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, _VERSION, len(self.nodes), len(self.edges)))
+            for a in arrays: f.write(a.tobytes())
+
+    @classmethod
+    def load(cls, path:str) -> "RelationGraph":
+        """Reads a graph written by save."""
+        with open(path, "rb") as f:
+            magic, version, nodes, edges = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC: raise ValueError(f"{path} is not a relation graph")
+            if version != _VERSION: raise ValueError(f"Unsupported relation graph version {version}")
+
+            arrays = []
+            for size in (nodes, nodes + 1, edges):
+                a = array("q")
+                a.frombytes(f.read(size * a.itemsize))
+                if sys.byteorder == "big": a.byteswap()
+                arrays.append(a)
+
+        return cls(*arrays)
+
+
+class GraphCrawler:
+    """Fetches the entries related to seed entries, breadth first.
+
+    Attributes
+    ----------
+        client (MyAnimeList): The client used for requests.
+        workers (int): The number of concurrent requests.
+        max_entries (int): The most entries fetched, or None.
+        visited (Bitmap): The node keys of the entries fetched or queued.
+        queued (int): The number of entries fetched or queued.
+    """
+
+    __slots__ = ("client", "workers", "max_entries", "visited", "queued", "_adjacency")
+
+    def __init__(self, client, workers:int=4, max_entries:int=None) -> None:
+        """
+        The constructor of the GraphCrawler class.
+
+        Parameters
+        ----------
+            client (MyAnimeList): The client used for requests. Its rate
+                limiter, caches and id map are used.
+            workers (int) (optional): The number of concurrent requests.
+            max_entries (int) (optional): Stop queueing entries after
+                this many. Relations such as "Character" can link
+                unrelated franchises, so this bounds a crawl that
+                wanders off.
+        """
+        self.client = client
+        self.workers = workers
+        self.max_entries = max_entries
+        self.visited = Bitmap()
+        self.queued = 0
+        self._adjacency = {}
+
+    def _queue(self, key:int, frontier:list) -> None:
+        if self.visited[key]: return
+        if self.max_entries is not None and self.queued >= self.max_entries: return
+
+        self.visited[key] = True
+        self.queued += 1
+        frontier.append(key)
+
+    def _fetch(self, key:int):
+        if key & 1: return self.client.get_manga(key >> 1)
+        return self.client.get_anime(key >> 1)
+
+    def run(self, seeds):
+        """Fetches the seeds and everything related to them.
+
+        Parameters
+        ----------
+            seeds (iterable): Entries such as "anime/1" or ("anime", 1).
+
+        Yields
+        ------
+            BatchResult: The entry ("anime/1") with either its
+                Anime/Manga object or the NoContentError/MALError raised
+                for it.
+        """
+        self.client.transport.reserve(self.workers)
+        frontier = []
+        for seed in seeds:
+            self._queue(parse_node(seed) if isinstance(seed, str) else node(*seed), frontier)
+
+        while frontier:
+            next = []
+            results = fetch_many(self._fetch, frontier, self.workers, errors=(NoContentError, MALError))
+            for result in results:
+                if result.ok:
+                    links = [parse_node(link) for link in result.record.related]
+                    self._adjacency[result.id] = links
+                    for link in links: self._queue(link, next)
+                yield BatchResult(node_name(result.id), result.record, result.error)
+            frontier = next
+
+    def graph(self) -> RelationGraph:
+        """Returns the relations found so far."""
+        return RelationGraph.from_adjacency(self._adjacency)
+
+
+def main(argv=None) -> int:
+    from . import MyAnimeList
+
+    parser = argparse.ArgumentParser(description="Crawl the relations between anime and manga.")
+    parser.add_argument("seeds", nargs="*", help='entries to start from, e.g. "anime/1"')
+    parser.add_argument("--graph", required=True, help="the relation graph to write, or to query")
+    parser.add_argument("--franchise", help="print the franchise of an entry from the graph")
+    parser.add_argument("--records", help="a JSON lines file to write the fetched records to")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-entries", type=int, default=None)
+    parser.add_argument("--rate-limit", type=float, default=4.05)
+    args = parser.parse_args(argv)
+
+    if args.franchise:
+        print(json.dumps(RelationGraph.load(args.graph).franchise(args.franchise)))
+        return 0
+
+    if not args.seeds: parser.error("seeds are required unless --franchise is given")
+
+    stats = {"records": 0, "missing": 0, "errors": 0}
+    crawler = GraphCrawler(MyAnimeList(rate_limit=args.rate_limit), args.workers, args.max_entries)
+    out = open(args.records, "w", encoding="utf-8") if args.records else None
+    try:
+        for result in crawler.run(args.seeds):
+            if result.ok:
+                stats["records"] += 1
+                if out is not None:
+                    record = {"kind": result.id.partition("/")[0], **result.record.gather_data()}
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            else:
+                stats["missing" if isinstance(result.error, NoContentError) else "errors"] += 1
+    finally:
+        if out is not None: out.close()
+
+        graph = crawler.graph()
+        graph.save(args.graph)
+
+    stats.update(nodes=len(graph), edges=len(graph.edges) // 2)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+from .errors import NoContentError, MALError
+
+
+class Ref:
+    """A lightweight handle to an anime or manga that is only fetched
+    and parsed the first time one of its attributes is read.
+
+    Everything an Anime/Manga object offers (title, gather_data(), ...)
+    can be used on the handle. The fetched object, or the error raised
+    while fetching it, is kept so the page is only requested once.
+
+    Attributes
+    ----------
+        id (int|str): The id of the anime/manga.
+        kind (str): Either "anime" or "manga".
+    """
+
+    __slots__ = ("id", "kind", "_client", "_record", "_error")
+
+    def __init__(self, client, kind:str, id) -> None:
+        """
+        The constructor of the Ref class.
+
+        Parameters
+        ----------
+            client (MyAnimeList): The client used to fetch the record.
+            kind (str): Either "anime" or "manga".
+            id: An int or int-equivalent object that represents an
+                anime/manga from MyAnimeList.
+        """
+        if kind not in ("anime", "manga"): raise ValueError(f"Unknown kind {kind!r}")
+
+        self.id = id
+        self.kind = kind
+        self._client = client
+        self._record = None
+        self._error = None
+
+    def __str__(self) -> str:
+        return str(self._record) if self._record is not None else f"{self.id} <{self.kind}, not loaded>"
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __getattr__(self, name:str):
+        # Only called for names that are not slots of the handle itself
+        if name.startswith("_"): raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the record has been fetched (successfully or not)."""
+        return self._record is not None or self._error is not None
+
+    def load(self):
+        """Fetches and parses the record if that hasn't happened yet and
+        returns it. Raises the NoContentError/MALError from the fetch."""
+        if not self.loaded:
+            fetch = self._client.get_anime if self.kind == "anime" else self._client.get_manga
+            try:
+                self._record = fetch(self.id)
+            except (NoContentError, MALError) as e:
+                self._error = e
+
+        if self._error is not None: raise self._error
+        return self._record
+
+    def set_result(self, result) -> None:
+        """Stores the record or error from a BatchResult."""
+        self._record = result.record
+        self._error = result.error
+
+
+def _walk(items):
+    # Yields the Refs in items, looking into lists, tuples, sets and the
+    # values of dicts
+    for item in items:
+        if isinstance(item, Ref):
+            yield item
+        elif isinstance(item, dict):
+            yield from _walk(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            yield from _walk(item)
+
+
+def materialize(refs, workers:int=4) -> list:
+    """Loads every handle that hasn't been loaded yet through its
+    client's batch methods and returns the handles.
+
+    Parameters
+    ----------
+        refs (iterable): The Ref objects to load. Refs held in lists,
+            tuples, sets or dict values inside it are loaded too.
+        workers (int) (optional): The number of concurrent requests per
+            client and kind.
+
+    Returns
+    -------
+        list: The given items. Handles that failed to load raise their
+            error when an attribute is read.
+    """
+    refs = list(refs)
+
+    groups = {}
+    for ref in _walk(refs):
+        if not ref.loaded:
+            groups.setdefault((id(ref._client), ref.kind), []).append(ref)
+
+    for group in groups.values():
+        client = group[0]._client
+        fetch_many = client.get_anime_many if group[0].kind == "anime" else client.get_manga_many
+
+        pending = {}
+        for ref in group:
+            pending.setdefault(ref.id, []).append(ref)
+
+        for result in fetch_many(list(pending), workers):
+            for ref in pending[result.id]:
+                ref.set_result(result)
+
+    return refs
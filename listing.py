@@ -0,0 +1,203 @@
+"""Parsers for MAL's listing pages: season pages, top lists and search
+results.
+
+A listing page holds the basics of up to 50 (top, search) or a few
+hundred (season) entries, so one request replaces as many page
+fetches. The records built from them are partial: fields that a
+listing doesn't show keep the schema defaults and the record's partial
+attribute is True until it is upgraded with the full page.
+
+Values are normalized to what the full pages give (episodes/volumes
+as strings, "Unknown" when unknown, season capitalized, year as a
+string) so partial and full records can be compared.
+"""
+import re
+
+from . import utils
+from .anime import ANIME_SCHEMA, Anime
+from .batch import BatchResult
+from .manga import MANGA_SCHEMA, Manga
+from .utils.parsing import make_soup
+
+SEASONS = ("winter", "spring", "summer", "fall")
+
+# The number of entries on a top list or search results page
+PAGE_SIZE = 50
+
+# "TV (26 eps)", "Light Novel (? vols)"
+_TYPE_COUNT = re.compile(r"^(.+?)\s*\((\d+|\?)\s+(?:eps?|vols?)\)")
+_EPISODES = re.compile(r"(\d+|\?)\s+eps?\b")
+
+# Values shown on listings when something is missing
+_MISSING = ("?", "-", "", "add some", "Unknown")
+
+
+def _count(value:str) -> str:
+    return "Unknown" if value in _MISSING else value
+
+
+def _soup(content, parser:str):
+    # The sidebar engine only keeps the info sidebar of a detail page
+    return make_soup(content, "lxml" if parser == "lxml" else "html.parser")
+
+
+def _link(elem) -> tuple:
+    # (id, title) of an entry's title link
+    return utils.get_id(elem["href"]), elem.text.strip()
+
+
+def parse_season(content, season:str, year, parser:str="html.parser") -> list:
+    """Parses a season page (/anime/season/<year>/<season>).
+
+    Entries continuing from earlier seasons are listed too. They didn't
+    start in this season, so their season and year are left out.
+
+    Returns
+    -------
+        list: A dict per entry with id, title, english, type, episodes,
+            season and year (new entries), genres, studios, source,
+            theme and demographic (when shown).
+    """
+    records = []
+    soup = _soup(content, parser)
+
+    for section in soup.select("div.seasonal-anime-list"):
+        header = section.select_one(".anime-header")
+        continuing = header is not None and "(Continuing)" in header.text
+        type = header.text.replace("(New)", "").replace("(Continuing)", "").strip() if header else None
+
+        for entry in section.select("div.seasonal-anime"):
+            link = entry.select_one("a.link-title")
+            if link is None: continue
+
+            id, title = _link(link)
+            data = {"id": id, "title": title, "type": type}
+            if not continuing: data.update(season=season.capitalize(), year=str(year))
+            data["genres"] = [a.text.strip() for a in entry.select("span.genre a")]
+
+            subtitle = entry.select_one("h3.h3_anime_subtitle")
+            if subtitle is not None: data["english"] = [subtitle.text.strip()]
+
+            for item in entry.select("div.prodsrc span.item"):
+                episodes = _EPISODES.search(item.text)
+                if episodes: data["episodes"] = _count(episodes.group(1))
+
+            for prop in entry.select("div.property"):
+                caption = prop.select_one("span.caption")
+                if caption is None: continue
+
+                links = [a.text.strip() for a in prop.select("span.item a")]
+                values = links or [i.text.strip() for i in prop.select("span.item")]
+                values = [v for v in values if v not in _MISSING]
+
+                caption = caption.text.strip().lower()
+                if caption in ("studio", "studios"):
+                    data["studios"] = values
+                elif caption == "source":
+                    data["source"] = values[0] if values else ""
+                elif caption in ("theme", "themes"):
+                    data["theme"] = values
+                elif caption in ("demographic", "demographics"):
+                    data["demographic"] = values
+
+            records.append(data)
+
+    return records
+
+
+def parse_top(content, kind:str="anime", parser:str="html.parser") -> list:
+    """Parses a top list page (/topanime.php, /topmanga.php).
+
+    Returns
+    -------
+        list: A dict per entry with id, title, type and episodes (anime)
+            or volumes (manga).
+    """
+    count = "episodes" if kind == "anime" else "volumes"
+    records = []
+
+    for row in _soup(content, parser).select("tr.ranking-list"):
+        link = row.select_one("h3 a[href]")
+        if link is None: continue
+
+        id, title = _link(link)
+        data = {"id": id, "title": title}
+
+        info = row.select_one("div.information")
+        if info is not None:
+            match = _TYPE_COUNT.match(info.get_text("\n").strip())
+            if match:
+                data["type"] = match.group(1)
+                data[count] = _count(match.group(2))
+
+        records.append(data)
+
+    return records
+
+
+def parse_search(content, kind:str="anime", parser:str="html.parser") -> list:
+    """Parses a search results page (/anime.php?q=..., /manga.php?q=...).
+
+    Returns
+    -------
+        list: A dict per entry with id, title, type and episodes (anime)
+            or volumes (manga).
+    """
+    count = "episodes" if kind == "anime" else "volumes"
+    records = []
+
+    for row in _soup(content, parser).select("div.js-categories-seasonal tr"):
+        link = row.select_one("a.hoverinfo_trigger.fw-b[href]")
+        if link is None: continue
+
+        id, title = _link(link)
+        data = {"id": id, "title": title}
+
+        cells = [td.text.strip() for td in row.select("td.ac")]
+        if len(cells) >= 2:
+            data["type"] = cells[0]
+            data[count] = _count(cells[1])
+
+        records.append(data)
+
+    return records
+
+
+def partial_records(kind:str, records:list) -> list:
+    """Builds partial Anime/Manga objects from parsed listing dicts."""
+    cls = Anime if kind == "anime" else Manga
+    return [cls.from_data(data, partial=True) for data in records]
+
+
+def upgrade(client, records, workers:int=4):
+    """Fetches the full page of every partial record and fills in the
+    missing fields in place.
+
+    Parameters
+    ----------
+        client (MyAnimeList): The client used for requests.
+        records (iterable): Anime/Manga objects. Full ones are skipped.
+        workers (int) (optional): The number of concurrent requests.
+
+    Yields
+    ------
+        BatchResult: The id with either the upgraded record or the
+            NoContentError/MALError raised for it. Records that failed
+            stay partial.
+    """
+    pending = {}
+    for record in records:
+        if not record.partial: continue
+        kind = "anime" if isinstance(record, Anime) else "manga"
+        pending.setdefault(kind, {}).setdefault(record.id, []).append(record)
+
+    for kind, by_id in pending.items():
+        schema = ANIME_SCHEMA if kind == "anime" else MANGA_SCHEMA
+        fetch_many = client.get_anime_many if kind == "anime" else client.get_manga_many
+
+        for result in fetch_many(list(by_id), workers):
+            for record in by_id[result.id]:
+                if result.ok:
+                    schema.load(record, result.record.gather_data())
+                    record.partial = False
+                yield BatchResult(result.id, record, result.error)
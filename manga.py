@@ -1,10 +1,40 @@
-import time
-
-import bs4
-from bs4 import BeautifulSoup
-
 from . import utils
 from .utils.download import download
+from .utils.parsing import make_soup, related_links
+from .utils.schema import Field, Schema
+
+MANGA_SCHEMA = Schema(
+    title='h1[class="h1 edit-info"] > span',
+    fields={
+        "english": Field("english", many=True),
+        "synonyms": Field("synonyms", many=True),
+        "synonym": Field("synonyms", many=True),
+        "japanese": Field("japanese", many=True),
+        "type": Field("type"),
+        "volumes": Field("volumes"),
+        "chapters": Field("chapters"),
+        "status": Field("status"),
+        "published": Field("published"),
+        "genre": Field("genres", many=True, links=("/manga/",)),
+        "genres": Field("genres", many=True, links=("/manga/",)),
+        "theme": Field("theme", links=("/manga/",)),
+        "themes": Field("theme", links=("/manga/",)),
+        "demographic": Field("demographic", links=("/manga/",)),
+        "demographics": Field("demographic", links=("/manga/",)),
+        "serialization": Field("serialization"),
+        "author": Field("authors", many=True, links=("/people/",)),
+        "authors": Field("authors", many=True, links=("/people/",)),
+    },
+    defaults={
+        "title": None, "english": [], "synonyms": [], "japanese": [],
+        "type": None, "volumes": 0, "chapters": 0, "status": None,
+        "published": "Unknown", "genres": [], "theme": "Unknown",
+        "demographic": "Unknown", "serialization": "Unknown", "authors": [],
+        "related": [],
+    },
+    unknown="Unknown",
+    strip_links=True,
+)
 
 class Manga:
     """This is a class for gathering data scrapped from webpages
@@ -27,33 +57,32 @@ class Manga:
         demographic (str): The demographic of the anime (i.e. Shounen).
         serialization (str): Where the manga is serialized (i.e. Shounen Jump).
         authors (list): A list of authors for the manga.
+        related (list): The related entries (sequels, adaptations, ...)
+            as "anime/<id>" and "manga/<id>" strings.
+        partial (bool): Whether the manga was built from a listing page
+            and only has some of its fields (see listing.upgrade).
     """
 
     __slots__ = ("id", "title", "english", "synonyms", "japanese", "type",
                 "volumes", "chapters", "status", "published",
                 "genres", "theme", "demographic",
-                "serialization", "authors")
+                "serialization", "authors", "related", "partial")
 
-    def __init__(self, data):
+    def __init__(self, data, parser:str="html.parser"):
         """"""
-        _attrs = self.parse_page(data)
-
-        self.id = _attrs.get("id")
-        self.title = _attrs.get("title")
-        self.english = _attrs.get("english", [])
-        self.synonyms = _attrs.get("synonyms", [])
-        self.japanese = _attrs.get("japanese", [])
-        self.type = _attrs.get("type")
-        self.volumes = _attrs.get("volumes", 0)
-        self.chapters = _attrs.get("chapters", 0)
-        self.status = _attrs.get("status")
-        self.published = _attrs.get("published", "Unknown")
-        self.genres = _attrs.get("genres", [])
-        self.theme = _attrs.get("theme", "Unknown")
-        self.demographic = _attrs.get("demographic", "Unknown")
-        self.serialization = _attrs.get("", "Unknown")
-        self.authors = _attrs.get("authors", [])
+        MANGA_SCHEMA.load(self, self.parse_page(data, parser))
+        self.partial = False
     
+    @classmethod
+    def from_data(cls, data:dict, partial:bool=False) -> "Manga":
+        """Builds a Manga from a dict shaped like the one returned
+        by gather_data, without downloading or parsing anything. Set
+        partial when data only holds some of the fields."""
+        manga = cls.__new__(cls)
+        MANGA_SCHEMA.load(manga, data)
+        manga.partial = partial
+        return manga
+
     def __str__(self) -> str:
         return f"{self.id} <{self.title}>"
     
@@ -91,9 +120,10 @@ class Manga:
             "genres": self.genres, "theme": self.theme, "demographic": self.demographic,
             "serialization": self.serialization,
             "authors": self.authors,
+            "related": self.related,
         }
 
-    def parse_page(self, data:tuple) -> dict:
+    def parse_page(self, data:tuple, parser:str="html.parser") -> dict:
         """Parses a given html containing data from a manga.
         
         Given a resquests.Session object, parse the html and
@@ -103,77 +133,22 @@ class Manga:
         ----------
             data: A tuple containing a numerical id and a
                 requests.Response object containing the html for a webpage.
+            parser (str) (optional): The parser engine to use (see
+                utils.parsing.ENGINES).
             
         Returns
         -------
             metadata_dict: A dictionary containing data scraped from
                 the given data.
         """
-        # A list of data types that could contain multiple values
-        multi_data_types = ["english", "japanese", "native", "synonyms", "synonym"]
-
-        soup = BeautifulSoup(data.content, "html.parser")
-        
         metadata_dict = {"id": utils.get_id(data.url)}
-
-        metadata_dict["title"] = soup.select_one('h1[class="h1 edit-info"] > span').text
-
-        for elem in soup.select("div[class='spaceit_pad']"):
-            # Skip over irrelevant data
-            if (len(elem.contents) < 2) or (not soup.select('span[class="dark_text"]')):
-                continue
-            
-            # Clean the data to make it easier to organize
-            data_contents = []
-            for content in elem.contents:
-                if type(content) == bs4.element.NavigableString:
-                    if (content.strip()):
-                        data_contents.append(content.strip())
-                else:
-                    data_contents.append(content)
-
-            # What kind of the information is it
-            data_type_tag = data_contents[0]
-            data_type = data_type_tag.text.replace(":", "").strip().lower()
-
-            if elem.select("a[href^='/manga/']") != []:
-                data = [piece.text.strip() for piece in elem.select("a[href^='/manga/']")]
-            elif elem.select("a[href^='/people/']") != []:
-                data = [piece.text.strip() for piece in elem.select("a[href^='/people/']")]
-            else:
-                # Handle case where only either the data or data type is provided
-                if len(data_contents) < 2: continue
-
-                if type(data_contents[1]) == str:
-                    data = data_contents[1]
-                else:
-                    data = data_contents[1].text
-
-            if type(data) == str:
-                # Normalize marking for unknown data
-                data = data if data not in ("None found", "None", "N/A") else "Unknown"
-            
-            metadata_dict[data_type.lower()] = [data] if data_type in multi_data_types else data
-
-        # In case of anime with only one genre
-        if ("genre" in metadata_dict.keys()) and ("genres" not in metadata_dict.keys()):
-            metadata_dict["genres"] = metadata_dict.pop("genre")
-        elif ("genre" not in metadata_dict.keys()) and ("genres" not in metadata_dict.keys()):
-            metadata_dict["genres"] = []
-
-        # In case of anime with only one genre
-        if ("author" in metadata_dict.keys()) and ("authors" not in metadata_dict.keys()):
-            metadata_dict["authors"] = metadata_dict.pop("author")
-        elif ("author" not in metadata_dict.keys()) and ("authors" not in metadata_dict.keys()):
-            metadata_dict["authors"] = []
-
-        # Use the premiered attribute to find the season and year
-        if ("premiered" in metadata_dict.keys()) and (len(metadata_dict["premiered"].split()) > 1):
-            metadata_dict["season"], metadata_dict["year"] = metadata_dict.pop("premiered").split()
+        soup = make_soup(data.content, parser)
+        metadata_dict.update(MANGA_SCHEMA.extract(soup))
+        metadata_dict["related"] = related_links(soup)
 
         return metadata_dict
     
-    def refresh_data(self, webdriver=None) -> None:
+    def refresh_data(self, webdriver=None) -> dict:
         """Update the class attributes (title, status, etc.) using the
         manga id to (re)download the data from MyAnimeList.
         
@@ -184,29 +159,15 @@ class Manga:
         
         Returns
         -------
-            None
+            dict: The attributes that changed, mapped to (old, new)
+                value pairs. Empty if nothing changed or the request
+                failed.
         """
         if not webdriver:
-            req = download("https://myanimelist.net/manga/" + self.id)
+            req = download("https://myanimelist.net/manga/" + str(self.id))
         else:
-            req = download("https://myanimelist.net/manga/" + self.id, webdriver)
-
-        if not req.ok: return   # Skip bad requests
+            req = download("https://myanimelist.net/manga/" + str(self.id), webdriver)
 
-        data = self.parse_page((self.id, req.content))
+        if not req.ok: return {}   # Skip bad requests
 
-        self.id = data.get("id")
-        self.title = data.get("title")
-        self.english = data.get("english", [])
-        self.synonyms = data.get("synonyms", [])
-        self.japanese = data.get("japanese", [])
-        self.type = data.get("type")
-        self.volumes = data.get("volumes", "0")
-        self.chapters = data.get("chapters", "0")
-        self.status = data.get("status")
-        self.published = data.get("published", "Unknown")
-        self.genres = data.get("genres", [])
-        self.theme = data.get("theme", "Unknown")
-        self.demographic = data.get("demographic", "Unknown")
-        self.serialization = data.get("", "Unknown")
-        self.authors = data.get("authors", [])
\ No newline at end of file
+        return MANGA_SCHEMA.update(self, self.parse_page(req))
@@ -0,0 +1,247 @@
+"""Pipelined ingestion that parses pages on every core.
+
+Fetching is I/O bound and parsing is pure-Python CPU work, so threads
+alone leave all but one core idle. Here threads only download the raw
+pages; the pages go through a bounded queue to a process pool that
+parses them into plain dicts (the gather_data() shape), which are
+rebuilt as Anime/Manga objects or handed on as they are.
+
+Only (kind, url, bytes) is sent to a worker and a dict of strings and
+lists comes back, so pickling costs little next to the parse itself.
+
+Pages stored in a PageArchive can be reparsed without any requests,
+e.g. after a parsing fix:
+
+    python -m MyAnimeListPy.pipeline archive/ anime --out anime.jsonl
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .anime import Anime
+from .batch import BatchResult, fetch_many
+from .errors import NoContentError, MALError
+from .manga import Manga
+from .utils.download import Page
+
+CLASSES = {"anime": Anime, "manga": Manga}
+
+# Marks the end of the fetched pages
+_DONE = object()
+
+
+def parse_page(kind:str, url:str, content:bytes, parser:str="html.parser") -> dict:
+    """Parses a page into the dict returned by gather_data. Runs in the
+    worker processes."""
+    return CLASSES[kind](Page(url, content=content), parser).gather_data()
+
+
+def _parse_chunk(kind:str, pages:list, parser:str) -> list:
+    return [parse_page(kind, url, content, parser) for url, content in pages]
+
+
+def _put(out:queue.Queue, item, stop:threading.Event) -> bool:
+    # Waits for room in the queue unless the consumer went away
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _fetch_stage(client, kind:str, ids, workers:int, out:queue.Queue, stop:threading.Event) -> None:
+    fetch = lambda id: client.get_page(kind, id)
+    client.transport.reserve(workers)
+    results = fetch_many(fetch, ids, workers, errors=(NoContentError, MALError))
+    try:
+        for result in results:
+            if not _put(out, result, stop): return
+    except BaseException as e:
+        _put(out, e, stop)
+    finally:
+        results.close()
+        _put(out, _DONE, stop)
+
+
+def ingest(client, kind:str, ids, fetch_workers:int=4, parse_workers:int=None,
+            queue_size:int=64, records:bool=True):
+    """Fetches ids with threads and parses the pages in a process pool,
+    yielding a BatchResult for each id as soon as it is parsed.
+
+    Both stages are bounded: at most queue_size fetched pages wait for
+    a worker and at most two pages per worker are being parsed, so
+    fetching pauses when parsing falls behind (and vice versa).
+
+    Parameters
+    ----------
+        client (MyAnimeList): The client used for requests. Its rate
+            limiter, cache and parser engine are used.
+        kind (str): Either "anime" or "manga".
+        ids (iterable): The ids to fetch.
+        fetch_workers (int) (optional): The number of concurrent requests.
+        parse_workers (int) (optional): The number of parsing processes.
+            Defaults to the number of cores.
+        queue_size (int) (optional): The number of fetched pages that
+            may wait for a parsing process.
+        records (bool) (optional): Whether to rebuild Anime/Manga
+            objects. When False the records are the gather_data() dicts,
+            which is cheaper when they are only written out.
+
+    Yields
+    ------
+        BatchResult: The id with either its record or the error raised
+            while fetching or parsing it.
+    """
+    if kind not in CLASSES: raise ValueError(f"Unknown kind {kind!r}")
+    if parse_workers is None: parse_workers = os.cpu_count() or 1
+
+    cls = CLASSES[kind]
+    fetched = queue.Queue(queue_size)
+    stop = threading.Event()
+    fetcher = threading.Thread(
+        target=_fetch_stage, args=(client, kind, ids, fetch_workers, fetched, stop), daemon=True
+    )
+
+    max_parsing = parse_workers * 2
+    fetching = True
+    pending = {}
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        fetcher.start()
+        try:
+            while fetching or pending:
+                # Hand fetched pages to the pool while it has room
+                while fetching and len(pending) < max_parsing:
+                    try:
+                        item = fetched.get(timeout=0.01 if pending else None)
+                    except queue.Empty:
+                        break
+
+                    if item is _DONE:
+                        fetching = False
+                    elif isinstance(item, BaseException):
+                        raise item
+                    elif not item.ok:
+                        yield item
+                    else:
+                        future = pool.submit(parse_page, kind, item.record.url, item.record.content, client.parser)
+                        pending[future] = item.id
+
+                if not pending: continue
+
+                # Only block on the pool when no more pages can be handed to it
+                timeout = 0.01 if fetching and len(pending) < max_parsing else None
+                finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    id = pending.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        yield BatchResult(id, error=e)
+                        continue
+                    yield BatchResult(id, cls.from_data(data) if records else data)
+        finally:
+            # Stop fetching if the caller stops early
+            stop.set()
+            for future in pending: future.cancel()
+            fetcher.join()
+
+
+def parse_pages(kind:str, pages, workers:int=None, parser:str="html.parser", chunk_size:int=16):
+    """Parses already downloaded pages on every core and yields their
+    gather_data() dicts in order.
+
+    Parameters
+    ----------
+        kind (str): Either "anime" or "manga".
+        pages (iterable): (url, content) pairs.
+        workers (int) (optional): The number of processes. Defaults to
+            the number of cores.
+        parser (str) (optional): The parser engine to use.
+        chunk_size (int) (optional): The number of pages sent to a
+            process at once.
+
+    Yields
+    ------
+        dict: The record for each page.
+    """
+    if kind not in CLASSES: raise ValueError(f"Unknown kind {kind!r}")
+    if workers is None: workers = os.cpu_count() or 1
+
+    def _chunks():
+        chunk = []
+        for url, content in pages:
+            chunk.append((url, content))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk: yield chunk
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = _chunks()
+        pending = []
+
+        try:
+            # Keep a few chunks per process in flight, in order
+            for chunk in chunks:
+                pending.append(pool.submit(_parse_chunk, kind, chunk, parser))
+                if len(pending) >= workers * 2:
+                    yield from pending.pop(0).result()
+            while pending:
+                yield from pending.pop(0).result()
+        finally:
+            for future in pending: future.cancel()
+
+
+def reparse_archive(archive, kind:str, workers:int=None, parser:str="html.parser"):
+    """Parses the latest page of every anime or manga in a PageArchive
+    on every core.
+
+    Parameters
+    ----------
+        archive (PageArchive): The archive to read.
+        kind (str): Either "anime" or "manga".
+        workers (int) (optional): The number of processes. Defaults to
+            the number of cores.
+        parser (str) (optional): The parser engine to use.
+
+    Yields
+    ------
+        dict: The gather_data() dict of every archived page, in the
+            order the pages were first archived.
+    """
+    pages = ((page.url, page.content) for page in archive.latest(kind))
+    return parse_pages(kind, pages, workers, parser)
+
+
+def main(argv=None) -> int:
+    from .utils.archive import PageArchive
+
+    parser = argparse.ArgumentParser(description="Reparse the pages stored in a page archive.")
+    parser.add_argument("archive", help="the archive directory")
+    parser.add_argument("kind", choices=tuple(CLASSES))
+    parser.add_argument("--out", required=True, help="the JSON lines file to write")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--parser", default="html.parser")
+    args = parser.parse_args(argv)
+
+    count = 0
+    tmp = args.out + ".tmp"
+    with PageArchive(args.archive) as archive, open(tmp, "w", encoding="utf-8") as f:
+        for record in reparse_archive(archive, args.kind, args.workers, args.parser):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp, args.out)
+
+    print(json.dumps({"records": count}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+import copy
+import heapq
+import time
+from datetime import datetime
+
+from .anime import Anime, ANIME_SCHEMA
+from .errors import NoContentError
+from .manga import MANGA_SCHEMA
+
+DAY = 24 * 60 * 60
+
+# How often records are refreshed, by status
+INTERVALS = {
+    "Currently Airing": 1 * DAY,
+    "Publishing": 1 * DAY,
+    "Not yet aired": 7 * DAY,
+    "Not yet published": 7 * DAY,
+    "On Hiatus": 30 * DAY,
+    "Discontinued": 90 * DAY,
+    "Finished Airing": 90 * DAY,
+    "Finished": 90 * DAY,
+}
+DEFAULT_INTERVAL = 30 * DAY
+
+# Titles that haven't started yet are refreshed daily once they are this close
+START_WINDOW = 14 * DAY
+
+# How long a record that failed to refresh waits before it is tried
+# again, doubled after every failure in a row (up to its interval)
+RETRY_DELAY = 60 * 60
+
+_DATE_FORMATS = ("%b %d, %Y", "%b, %Y", "%b %Y", "%Y")
+
+
+def parse_start_date(value:str):
+    """Returns the start of an aired/published string such as
+    "Apr 3, 1998 to Apr 24, 1999" as a datetime, or None."""
+    if not value or not isinstance(value, str): return None
+
+    start = " ".join(value.split(" to ")[0].split())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(start, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def refresh_interval(record, now:float=None) -> float:
+    """Returns how many seconds may pass between two refreshes of a
+    record, based on its status and start date."""
+    interval = INTERVALS.get(record.status, DEFAULT_INTERVAL)
+
+    if record.status in ("Not yet aired", "Not yet published"):
+        start = parse_start_date(getattr(record, "aired", None) or getattr(record, "published", None))
+        now = time.time() if now is None else now
+        if start is not None and start.timestamp() - now <= START_WINDOW:
+            interval = INTERVALS["Currently Airing"]
+
+    return interval
+
+
+class RefreshScheduler:
+    """Keeps a collection of Anime/Manga objects fresh by refreshing the
+    most overdue records first.
+
+    Every record gets an interval from refresh_interval: airing and
+    publishing titles are refreshed daily, finished titles rarely and
+    titles about to start are boosted. run() refreshes the most overdue
+    records in batches through the client, updates only the attributes
+    that changed and reports them. Updates are made on a copy of the
+    record, which then replaces it, as the record may be the object a
+    client's RecordCache shares with its other callers.
+
+    A record that fails to refresh is not due again until RETRY_DELAY
+    has passed, doubled for every failure in a row, so a failing record
+    can't take the place of the others on every run. Records that no
+    longer exist are removed.
+
+    Attributes
+    ----------
+        client (MyAnimeList): The client used for requests.
+        last_refreshed (dict): (kind, id) -> the time of the last refresh.
+        failures (dict): (kind, id) -> the number of failed refreshes in
+            a row.
+    """
+
+    __slots__ = ("client", "last_refreshed", "failures", "_records", "_retry_at", "_clock")
+
+    def __init__(self, client, records=(), refreshed_at:float=0.0, clock=time.time) -> None:
+        """
+        The constructor of the RefreshScheduler class.
+
+        Parameters
+        ----------
+            client (MyAnimeList): The client used for requests.
+            records (iterable) (optional): The Anime/Manga objects to keep
+                fresh.
+            refreshed_at (float) (optional): When the records were last
+                fetched. Defaults to never, which makes all of them due.
+            clock (callable) (optional): The wall clock in seconds.
+        """
+        self.client = client
+        self.last_refreshed = {}
+        self.failures = {}
+        self._records = {}
+        self._retry_at = {}
+        self._clock = clock
+
+        for record in records: self.add(record, refreshed_at)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _key(record) -> tuple:
+        return ("anime" if isinstance(record, Anime) else "manga", str(record.id))
+
+    def add(self, record, refreshed_at:float=0.0) -> None:
+        """Adds a record that was last fetched at refreshed_at."""
+        key = self._key(record)
+        self._records[key] = record
+        self.last_refreshed[key] = refreshed_at
+
+    def remove(self, record) -> None:
+        """Stops refreshing a record."""
+        self._remove(self._key(record))
+
+    def _remove(self, key:tuple) -> None:
+        self._records.pop(key, None)
+        self.last_refreshed.pop(key, None)
+        self.failures.pop(key, None)
+        self._retry_at.pop(key, None)
+
+    def _failed(self, key:tuple, now:float) -> None:
+        failures = self.failures[key] = self.failures.get(key, 0) + 1
+        delay = min(RETRY_DELAY * 2 ** (failures - 1), refresh_interval(self._records[key], now))
+        self._retry_at[key] = now + delay
+
+    def due(self, limit:int=None) -> list:
+        """Returns the records that are due for a refresh, most overdue
+        first.
+
+        Parameters
+        ----------
+            limit (int) (optional): The maximum number of records.
+        """
+        now = self._clock()
+        overdue = []
+        for key, record in self._records.items():
+            if self._retry_at.get(key, 0) > now: continue
+
+            priority = (now - self.last_refreshed[key]) / refresh_interval(record, now)
+            if priority >= 1: overdue.append((priority, key))
+
+        best = heapq.nlargest(limit, overdue) if limit is not None else sorted(overdue, reverse=True)
+        return [self._records[key] for _, key in best]
+
+    def run(self, limit:int=None, workers:int=4) -> dict:
+        """Refreshes the records that are due and updates them.
+
+        Parameters
+        ----------
+            limit (int) (optional): The maximum number of records to
+                refresh in this run.
+            workers (int) (optional): The number of concurrent requests.
+
+        Returns
+        -------
+            dict: (kind, id) -> {attribute: (old, new)} for every record
+                that changed. Records that failed to download are mapped
+                to the exception under the "error" key; the ones that
+                raised NoContentError have been removed.
+        """
+        batches = {"anime": [], "manga": []}
+        for record in self.due(limit):
+            kind, id = self._key(record)
+            batches[kind].append(id)
+
+        changes = {}
+        for kind, ids in batches.items():
+            if not ids: continue
+
+            fetch_many = self.client.get_anime_many if kind == "anime" else self.client.get_manga_many
+            schema = ANIME_SCHEMA if kind == "anime" else MANGA_SCHEMA
+
+            for result in fetch_many(ids, workers):
+                key = (kind, str(result.id))
+
+                if not result.ok:
+                    changes[key] = {"error": result.error}
+                    if isinstance(result.error, NoContentError):
+                        self._remove(key)
+                    else:
+                        self._failed(key, self._clock())
+                    continue
+
+                record = copy.copy(self._records[key])
+                diff = schema.update(record, result.record.gather_data())
+                self._records[key] = record
+                self.last_refreshed[key] = self._clock()
+                self.failures.pop(key, None)
+                self._retry_at.pop(key, None)
+                if diff: changes[key] = diff
+
+        return changes
@@ -0,0 +1,179 @@
+import gc
+import pickle
+import re
+from array import array
+import unicodedata
+from collections import Counter
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+# Bumped whenever the saved layout changes
+_VERSION = 1
+
+
+def normalize_title(title:str) -> str:
+    """Normalizes a title for comparison: unicode compatibility forms,
+    case folding and punctuation/whitespace collapsing."""
+    title = unicodedata.normalize("NFKC", title).casefold()
+    title = _PUNCTUATION.sub(" ", title)
+    return _SPACES.sub(" ", title).strip()
+
+
+def trigrams(key:str) -> set:
+    """Returns the trigrams of a normalized title, padded so that the
+    start and end of words count."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """An index of the titles (title, english, synonyms and japanese)
+    of a collection of Anime/Manga for exact and fuzzy lookup.
+
+    Titles are normalized with normalize_title. Exact lookups are a
+    dict access; fuzzy lookups score candidates that share trigrams
+    with the query using the Dice coefficient.
+    """
+
+    __slots__ = ("_keys", "_key_ids", "_records", "_grams", "_postings", "_titles")
+
+    def __init__(self, records=()) -> None:
+        """
+        The constructor of the TitleIndex class.
+
+        Parameters
+        ----------
+            records (iterable) (optional): Anime/Manga objects (or
+                anything with id and get_titles) to index.
+        """
+        self._keys = []         # key id -> normalized title
+        self._key_ids = {}      # normalized title -> key id
+        self._records = []      # key id -> {record id: original title}
+        self._grams = []        # key id -> number of trigrams
+        self._postings = {}     # trigram -> array of key ids
+        self._titles = {}       # record id -> set of key ids
+
+        for record in records: self.add(record)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __contains__(self, id) -> bool:
+        return str(id) in self._titles
+
+    def _key(self, key:str) -> int:
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = self._key_ids[key] = len(self._keys)
+            grams = trigrams(key)
+            self._keys.append(key)
+            self._records.append({})
+            self._grams.append(len(grams))
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None: postings = self._postings[gram] = array("l")
+                postings.append(key_id)
+        return key_id
+
+    def add_title(self, id, title:str) -> None:
+        """Adds a single title for the record id."""
+        key = normalize_title(title) if title else ""
+        if not key: return
+
+        id = str(id)
+        key_id = self._key(key)
+        self._records[key_id].setdefault(id, title)
+        self._titles.setdefault(id, set()).add(key_id)
+
+    def add(self, record) -> None:
+        """Adds every title of an Anime/Manga object."""
+        for title in record.get_titles(): self.add_title(record.id, title)
+
+    def remove(self, id) -> None:
+        """Removes every title of the record id."""
+        id = str(id)
+        for key_id in self._titles.pop(id, ()):
+            # A key without records no longer matches, but keeps its id
+            # and postings so that adding the title again reuses them
+            self._records[key_id].pop(id, None)
+
+    def update(self, record) -> None:
+        """Re-indexes a record after its titles changed (for example
+        after add_alt or refresh_data)."""
+        self.remove(record.id)
+        self.add(record)
+
+    def lookup(self, title:str) -> list:
+        """Returns the ids of the records with a title that is equal to
+        the given title after normalization."""
+        key_id = self._key_ids.get(normalize_title(title))
+        return [] if key_id is None else list(self._records[key_id])
+
+    def search(self, title:str, limit:int=10, min_score:float=0.3) -> list:
+        """Returns the records whose titles are most similar to title.
+
+        Parameters
+        ----------
+            title (str): The title to look for.
+            limit (int) (optional): The maximum number of candidates.
+            min_score (float) (optional): The lowest similarity (0 to 1)
+                to return.
+
+        Returns
+        -------
+            list: (id, score, matched title) tuples, best first. Each id
+                appears once with its best matching title.
+        """
+        key = normalize_title(title)
+        if not key: return []
+
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings: shared.update(postings)
+
+        # A key needs at least this many shared trigrams to reach min_score
+        needed = min_score * len(grams) / 2
+        size = len(grams)
+
+        best = {}
+        for key_id, count in shared.items():
+            if count < needed: continue
+
+            score = 2 * count / (size + self._grams[key_id])
+            if score < min_score: continue
+
+            for id, original in self._records[key_id].items():
+                if id not in best or best[id][1] < score:
+                    best[id] = (id, score, original)
+
+        return sorted(best.values(), key=lambda match: -match[1])[:limit]
+
+    def save(self, path:str) -> None:
+        """Saves the index to path. Only load files you created."""
+        with open(path, "wb") as f:
+            pickle.dump((_VERSION, self._keys, self._key_ids, self._records,
+                        self._grams, self._postings, self._titles),
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path:str) -> "TitleIndex":
+        """Loads an index saved with save."""
+        # Unpickling creates many small containers, don't let the
+        # garbage collector scan them over and over
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        finally:
+            if enabled: gc.enable()
+
+        if state[0] != _VERSION: raise ValueError(f"Unsupported index version {state[0]}")
+
+        index = cls()
+        (_, index._keys, index._key_ids, index._records,
+            index._grams, index._postings, index._titles) = state
+        return index
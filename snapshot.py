@@ -0,0 +1,318 @@
+"""A compact binary snapshot format for Anime/Manga collections.
+
+Layout (all integers are native-endian int64, sections 8-byte aligned):
+
+    header      magic, version, offset and length of the metadata
+    strings     offsets of every interned string, then their utf-8 bytes
+    index       the ids sorted, and the row of each id
+    per field   one cell per record, then the offsets and cells of the
+                lists held by that field
+    partial     the sorted rows of the records built from listing pages
+    metadata    JSON: kind, fields, record count and section offsets
+
+A cell packs a value into one int64: the low two bits are a tag (None,
+string code, int or list number) and the rest is the payload. Every
+value is interned once in the string table, so the many repeated
+genres, studios and statuses cost 8 bytes per use.
+
+Snapshot memory-maps the file and only decodes the records that are
+accessed, so opening one takes milliseconds whatever its size, and
+processes opening the same file share its pages in the OS cache.
+
+    write_snapshot("anime.snap", records)
+    with Snapshot("anime.snap") as snapshot:
+        snapshot[1].title
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from .anime import Anime
+from .manga import Manga
+
+CLASSES = {"anime": Anime, "manga": Manga}
+
+MAGIC = b"MALSNAP\0"
+
+# Bumped whenever the layout changes
+_VERSION = 1
+
+# magic, version, metadata offset, metadata length
+_HEADER = struct.Struct("<8sIQQ")
+
+# Cell tags
+_NONE, _STRING, _INT, _LIST = range(4)
+
+
+def _align(f) -> None:
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+class _Writer:
+    # Interns strings and encodes values into cells
+
+    __slots__ = ("strings", "codes")
+
+    def __init__(self) -> None:
+        self.strings = []
+        self.codes = {}
+
+    def intern(self, value:str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def cell(self, value) -> int:
+        if value is None: return _NONE
+        if isinstance(value, str): return self.intern(value) << 2 | _STRING
+        if isinstance(value, int) and not isinstance(value, bool): return value << 2 | _INT
+        raise TypeError(f"Cannot store {type(value).__name__} values in a snapshot")
+
+
+def write_snapshot(path:str, records, kind:str=None) -> int:
+    """Writes Anime/Manga objects or gather_data() dicts to a snapshot.
+
+    Parameters
+    ----------
+        path (str): The file to write.
+        records (iterable): The records. Ids must be unique.
+        kind (str) (optional): Either "anime" or "manga". Only needed
+            when the records are dicts.
+
+    The partial flag of Anime/Manga objects is kept, dicts are stored as
+    full records.
+
+    Returns
+    -------
+        int: The number of records written.
+    """
+    rows = []
+    partial = array("q")
+    for record in records:
+        if not isinstance(record, dict):
+            if kind is None: kind = "anime" if isinstance(record, Anime) else "manga"
+            if record.partial: partial.append(len(rows))
+            record = record.gather_data()
+        rows.append(record)
+
+    if kind not in CLASSES: raise ValueError(f"Unknown kind {kind!r}")
+
+    fields = []
+    for row in rows:
+        for name in row:
+            if name not in fields: fields.append(name)
+
+    writer = _Writer()
+    columns = {}
+    for name in fields:
+        cells = array("q")
+        offsets = array("q", [0])
+        items = array("q")
+        for row in rows:
+            value = row.get(name)
+            if isinstance(value, list):
+                cells.append((len(offsets) - 1) << 2 | _LIST)
+                items.extend(writer.cell(item) for item in value)
+                offsets.append(len(items))
+            else:
+                cells.append(writer.cell(value))
+        columns[name] = (cells, offsets, items)
+
+    ids = {}
+    for i, row in enumerate(rows):
+        id = int(row["id"])
+        if id in ids: raise ValueError(f"Duplicate id {id}")
+        ids[id] = i
+    keys = sorted(ids)
+
+    encoded = [value.encode("utf-8") for value in writer.strings]
+    string_offsets = array("q", [0])
+    for value in encoded: string_offsets.append(string_offsets[-1] + len(value))
+
+    sections = {}
+    with open(path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+
+        def _section(name, data) -> None:
+            _align(f)
+            sections[name] = (f.tell(), len(data))
+            f.write(data)
+
+        _section("strings.offsets", string_offsets.tobytes())
+        _section("strings.data", b"".join(encoded))
+        _section("index.keys", array("q", keys).tobytes())
+        _section("index.rows", array("q", (ids[id] for id in keys)).tobytes())
+        for name, (cells, offsets, items) in columns.items():
+            _section(name + ".cells", cells.tobytes())
+            _section(name + ".offsets", offsets.tobytes())
+            _section(name + ".items", items.tobytes())
+        _section("partial", partial.tobytes())
+
+        _align(f)
+        meta_offset = f.tell()
+        meta = json.dumps({
+            "kind": kind, "fields": fields, "records": len(rows),
+            "byteorder": sys.byteorder, "sections": sections,
+        }).encode("utf-8")
+        f.write(meta)
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, _VERSION, meta_offset, len(meta)))
+
+    return len(rows)
+
+
+class Snapshot:
+    """A read-only, memory-mapped snapshot written by write_snapshot.
+
+    Records are looked up by id (snapshot[id], snapshot.get(id)) or
+    iterated in the order they were written. Anime/Manga objects are
+    built when accessed and not kept, the strings they use are decoded
+    once.
+
+    Attributes
+    ----------
+        path (str): The snapshot file.
+        kind (str): Either "anime" or "manga".
+        fields (tuple): The names of the stored fields.
+    """
+
+    __slots__ = ("path", "kind", "fields", "_cls", "_file", "_map", "_views",
+                "_size", "_strings", "_partial", "_decoded")
+
+    def __init__(self, path:str) -> None:
+        """
+        The constructor of the Snapshot class.
+
+        Parameters
+        ----------
+            path (str): The snapshot file to open.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        magic, version, meta_offset, meta_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a snapshot")
+        if version != _VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version}")
+
+        meta = json.loads(self._map[meta_offset:meta_offset + meta_length])
+        if meta["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was written on a {meta['byteorder']} endian machine")
+
+        self.kind = meta["kind"]
+        self.fields = tuple(meta["fields"])
+        self._cls = CLASSES[self.kind]
+        self._size = meta["records"]
+        self._decoded = {}
+
+        view = memoryview(self._map)
+        self._views = {}
+        for name, (offset, length) in meta["sections"].items():
+            section = view[offset:offset + length]
+            self._views[name] = section if name == "strings.data" else section.cast("q")
+        view.release()
+
+        self._strings = self._views["strings.offsets"]
+        # Missing from snapshots written before the flag was stored
+        self._partial = self._views.get("partial")
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the file. Records already built stay usable."""
+        for view in getattr(self, "_views", {}).values(): view.release()
+        self._views = {}
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, id) -> bool:
+        return self._row(id) is not None
+
+    def __iter__(self):
+        return (self.record(i) for i in range(self._size))
+
+    def __getitem__(self, id):
+        row = self._row(id)
+        if row is None: raise KeyError(id)
+        return self.record(row)
+
+    def get(self, id, default=None):
+        """Returns the Anime/Manga with the given id, or default."""
+        row = self._row(id)
+        return default if row is None else self.record(row)
+
+    def ids(self) -> list:
+        """Returns the stored ids in ascending order."""
+        return self._views["index.keys"].tolist()
+
+    def _row(self, id):
+        try:
+            id = int(id)
+        except (TypeError, ValueError):
+            return None
+
+        keys = self._views["index.keys"]
+        i = bisect_left(keys, id)
+        if i < len(keys) and keys[i] == id: return self._views["index.rows"][i]
+        return None
+
+    def _string(self, code:int) -> str:
+        value = self._decoded.get(code)
+        if value is None:
+            data = self._views["strings.data"]
+            value = self._decoded[code] = str(data[self._strings[code]:self._strings[code + 1]], "utf-8")
+        return value
+
+    def _value(self, cell:int):
+        tag = cell & 3
+        if tag == _STRING: return self._string(cell >> 2)
+        if tag == _INT: return cell >> 2
+        return None
+
+    def data(self, row:int) -> dict:
+        """Returns the gather_data() dict of the record at a row."""
+        if not 0 <= row < self._size: raise IndexError(row)
+
+        data = {}
+        for name in self.fields:
+            cell = self._views[name + ".cells"][row]
+            if cell & 3 == _LIST:
+                offsets = self._views[name + ".offsets"]
+                items = self._views[name + ".items"]
+                n = cell >> 2
+                data[name] = [self._value(item) for item in items[offsets[n]:offsets[n + 1]]]
+            else:
+                data[name] = self._value(cell)
+        return data
+
+    def is_partial(self, row:int) -> bool:
+        """Whether the record at a row was built from a listing page."""
+        if self._partial is None: return False
+        i = bisect_left(self._partial, row)
+        return i < len(self._partial) and self._partial[i] == row
+
+    def record(self, row:int):
+        """Builds the Anime/Manga object stored at a row."""
+        return self._cls.from_data(self.data(row), self.is_partial(row))
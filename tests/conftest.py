@@ -0,0 +1,37 @@
+"""Makes the checkout importable as MyAnimeListPy, whatever the
+directory it was cloned into is called, and provides a stub server."""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "MyAnimeListPy"
+
+if PACKAGE not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[PACKAGE] = _module
+    _spec.loader.exec_module(_module)
+
+
+@pytest.fixture
+def stub():
+    """A StubServer serving the fixture pages, stopped after the test."""
+    from MyAnimeListPy.benchmarks.stub_server import StubServer
+
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    """A MyAnimeList client without rate limiting pointed at the stub."""
+    from MyAnimeListPy import MyAnimeList
+
+    client = MyAnimeList(rate_limit=1e-4, retries=0)
+    client.base_url = stub.url
+    return client
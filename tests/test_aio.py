@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from MyAnimeListPy.aio import AsyncMyAnimeList
+from MyAnimeListPy.errors import MALError
+
+
+class FailingSession:
+    def __init__(self, error:Exception) -> None:
+        self.error = error
+
+    def get(self, url:str):
+        raise self.error
+
+
+@pytest.mark.parametrize("error", [aiohttp.ClientConnectionError("refused"), asyncio.TimeoutError()])
+def test_download_errors_are_mal_errors(error):
+    client = AsyncMyAnimeList(FailingSession(error), rate_limit=0.001)
+
+    with pytest.raises(MALError) as info:
+        asyncio.run(client.download("https://myanimelist.net/anime/1"))
+    assert info.value.__cause__ is error
+
+
+def test_batch_continues_after_download_errors():
+    client = AsyncMyAnimeList(FailingSession(aiohttp.ServerDisconnectedError()), rate_limit=0.001)
+
+    async def run():
+        return [result async for result in client.get_anime_many([1, 2])]
+
+    results = asyncio.run(run())
+    assert sorted(result.id for result in results) == [1, 2]
+    assert all(isinstance(result.error, MALError) for result in results)
@@ -0,0 +1,57 @@
+from MyAnimeListPy.utils.archive import PageArchive
+from MyAnimeListPy.utils.download import Page, download
+from MyAnimeListPy.utils.transport import RetryPolicy
+
+URL = "https://myanimelist.net/anime/1"
+
+
+class Driver:
+    def __init__(self, *pages:Page) -> None:
+        self.pages = list(pages)
+
+    def get(self, url:str, headers=None, **kwargs) -> Page:
+        return self.pages.pop(0)
+
+
+def test_errors_are_not_archived(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        download(URL, Driver(Page(URL, 200, content=b"page")), wait_time=0, archive=archive)
+
+        retry = RetryPolicy(attempts=2, backoff=0)
+        page = download(URL, Driver(Page(URL, 503), Page(URL, 429)), wait_time=0, retry=retry, archive=archive)
+        assert page.status_code == 429
+
+        assert len(archive) == 1
+        assert archive.get(URL).content == b"page"
+
+
+def test_missing_pages_are_archived(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        download(URL, Driver(Page(URL, 200, content=b"page")), wait_time=0, archive=archive)
+        download(URL, Driver(Page(URL, 404)), wait_time=0, archive=archive)
+
+        assert archive.get(URL).status_code == 404
+        assert list(archive.latest()) == []
+
+
+def test_error_records_do_not_hide_pages(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        archive.append(URL, Page(URL, 200, content=b"page"))
+        archive.append(URL, Page(URL, 500))
+
+    # Also once the index is loaded again
+    with PageArchive(str(tmp_path)) as archive:
+        assert len(archive) == 2
+        assert archive.get(URL).content == b"page"
+        assert [page.content for page in archive.latest("anime")] == [b"page"]
+        assert archive.replay().get(URL).status_code == 200
+
+
+def test_newer_pages_replace_older_ones(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        archive.append(URL, Page(URL, 500))
+        assert archive.get(URL).status_code == 500
+
+        archive.append(URL, Page(URL, 200, content=b"old"))
+        archive.append(URL, Page(URL, 200, content=b"new"))
+        assert archive.get(URL).content == b"new"
@@ -0,0 +1,52 @@
+import pytest
+
+from MyAnimeListPy.batch import fetch_many
+from MyAnimeListPy.errors import MALError, NoContentError
+
+
+def _fetch(id):
+    if id % 3 == 0: raise NoContentError(id)
+    if id % 5 == 0: raise MALError(f"503 for {id}")
+    return f"record {id}"
+
+
+def test_a_result_per_id():
+    results = {}
+    for result in fetch_many(_fetch, range(1, 31), workers=4, errors=(NoContentError, MALError)):
+        assert result.id not in results
+        results[result.id] = result
+
+    assert sorted(results) == list(range(1, 31))
+    for id, result in results.items():
+        if id % 3 == 0:
+            assert not result.ok and isinstance(result.error, NoContentError) and result.record is None
+        elif id % 5 == 0:
+            assert not result.ok and isinstance(result.error, MALError)
+        else:
+            assert result.ok and result.record == f"record {id}"
+
+
+def test_other_errors_stop_the_batch():
+    with pytest.raises(MALError):
+        list(fetch_many(_fetch, range(1, 31), workers=2, errors=(NoContentError,)))
+
+
+def test_ids_are_read_lazily():
+    read = []
+
+    def ids():
+        for id in range(1, 10 ** 6):
+            read.append(id)
+            yield id
+
+    results = fetch_many(lambda id: id, ids(), workers=2)
+    assert next(results).ok
+    results.close()
+
+    # At most two calls per worker are queued
+    assert len(read) <= 2 * 2
+
+
+def test_workers_must_be_positive():
+    with pytest.raises(ValueError):
+        list(fetch_many(_fetch, [1], workers=0))
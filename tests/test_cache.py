@@ -0,0 +1,115 @@
+import pytest
+
+from MyAnimeListPy.utils.cache import ResponseCache
+from MyAnimeListPy.utils.download import Page, download
+
+URL = "https://myanimelist.net/anime/1"
+
+
+def test_lowercase_validators_are_stored():
+    cache = ResponseCache()
+    cache.store(URL, Page(URL, 200, {"etag": '"a"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, b"page"))
+
+    assert cache.conditional_headers(URL) == {
+        "If-None-Match": '"a"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+
+
+def test_refresh_replaces_validators_of_any_case():
+    cache = ResponseCache()
+    cache.store(URL, Page(URL, 200, {"etag": '"a"'}, b"page"))
+
+    page = cache.refresh(URL, Page(URL, 304, {"ETAG": '"b"'}))
+
+    assert page.content == b"page"
+    assert page.headers == {"ETag": '"b"'}
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"b"'}
+
+
+def test_requests_headers_are_case_insensitive():
+    requests = pytest.importorskip("requests")
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"page"
+    response.headers["etag"] = '"a"'
+
+    cache = ResponseCache()
+    cache.store(URL, response)
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"a"'}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Driver:
+    def __init__(self, *answers) -> None:
+        self.answers = list(answers)
+        self.headers = []
+
+    def get(self, url:str, headers=None, **kwargs):
+        self.headers.append(headers or {})
+        answer = self.answers.pop(0)
+        return answer() if callable(answer) else answer
+
+
+def test_fresh_entries_are_served_until_the_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.store(URL, Page(URL, 200, {"ETag": '"a"'}, b"page"))
+
+    clock.now += 9
+    assert download(URL, Driver(), wait_time=0, cache=cache).content == b"page"
+    assert cache.hits == 1
+
+    clock.now += 1
+    assert cache.get_fresh(URL) is None
+
+    driver = Driver(Page(URL, 304, {"ETag": '"a"'}))
+    assert download(URL, driver, wait_time=0, cache=cache).content == b"page"
+    assert driver.headers == [{"If-None-Match": '"a"'}]
+    assert cache.revalidated == 1
+
+    # Revalidating made the entry fresh again
+    assert cache.get_fresh(URL).content == b"page"
+
+
+def test_304_for_an_evicted_entry_fetches_the_page():
+    cache = ResponseCache()
+    cache.store(URL, Page(URL, 200, {"ETag": '"a"'}, b"old"))
+
+    def evicted():
+        # Another worker drops the entry while the request is in flight
+        cache.invalidate(URL)
+        return Page(URL, 304, {"ETag": '"a"'})
+
+    driver = Driver(evicted, Page(URL, 200, {"ETag": '"b"'}, b"new"))
+    page = download(URL, driver, wait_time=0, cache=cache)
+
+    assert (page.status_code, page.content) == (200, b"new")
+    assert driver.headers == [{"If-None-Match": '"a"'}, {}]
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"b"'}
+
+
+def test_least_recently_used_entries_are_evicted():
+    clock = Clock()
+    cache = ResponseCache(ttl=100, max_size=10, clock=clock)
+    for url in ("a", "b"):
+        clock.now += 1
+        cache.store(url, Page(url, 200, content=b"1234"))
+
+    clock.now += 1
+    assert cache.get_fresh("a") is not None
+
+    clock.now += 1
+    cache.store("c", Page("c", 200, content=b"1234"))
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.evictions == 1
+    assert cache.size() == 8
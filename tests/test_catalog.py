@@ -0,0 +1,72 @@
+import random
+
+from MyAnimeListPy.anime import Anime
+from MyAnimeListPy.catalog import Catalog
+
+GENRES = ["Action", "Comedy", "Drama", "Sci-Fi", "Romance"]
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+
+
+def _records(n:int) -> list:
+    rng = random.Random(5)
+    return [{
+        "id": id, "title": f"Title {id}",
+        "season": rng.choice(SEASONS + [None]), "year": rng.choice(["", 1998, 2005, 2012]),
+        "type": rng.choice(["TV", "Movie", "OVA"]),
+        "genres": rng.sample(GENRES, rng.randint(0, 3)),
+    } for id in range(1, n + 1)]
+
+
+def _expected(records:list, test) -> list:
+    return [i for i, record in enumerate(records) if test(record)]
+
+
+def test_where_matches_a_scan():
+    records = _records(500)
+    catalog = Catalog.from_records(records)
+
+    cases = [
+        ({"season": "Spring"}, lambda r: r["season"] == "Spring"),
+        ({"season": ["Spring", "Fall"], "type": "TV"}, lambda r: r["season"] in ("Spring", "Fall") and r["type"] == "TV"),
+        ({"genre": "Action"}, lambda r: "Action" in r["genres"]),
+        ({"genres": ["Action", "Drama"], "year": range(2000, 2020)},
+         lambda r: {"Action", "Drama"} & set(r["genres"]) and r["year"] in (2005, 2012)),
+        ({"type": "Movie", "genre": "Comedy", "season": "Winter"},
+         lambda r: r["type"] == "Movie" and "Comedy" in r["genres"] and r["season"] == "Winter"),
+        ({"season": "Monsoon"}, lambda r: False),
+        ({"year": 1998, "season": "Monsoon", "genre": "Action"}, lambda r: False),
+    ]
+    for conditions, test in cases:
+        assert list(catalog.where(**conditions)) == _expected(records, test), conditions
+
+
+def test_where_without_conditions_returns_every_row():
+    catalog = Catalog.from_records(_records(10))
+    assert list(catalog.where()) == list(range(10))
+
+
+def test_where_does_not_share_postings():
+    catalog = Catalog.from_records(_records(50))
+
+    rows = catalog.where(type="TV")
+    rows.append(10 ** 6)
+    assert 10 ** 6 not in catalog.where(type="TV")
+
+
+def test_postings_follow_appends():
+    records = _records(20)
+    catalog = Catalog.from_records(records)
+    before = list(catalog.where(type="TV"))
+
+    catalog.append({**records[0], "id": 21, "type": "TV"})
+    assert list(catalog.where(type="TV")) == before + [20]
+
+
+def test_partial_flag():
+    records = [Anime.from_data({"id": 1, "title": "Listed"}, partial=True), Anime.from_data({"id": 2})]
+    catalog = Catalog.from_records(records)
+    catalog.append({"id": 3, "title": "Dict", "partial": True})
+    catalog.append(records[1])
+
+    assert [row.partial for row in catalog] == [True, False, True, False]
+    assert "partial" not in catalog.columns and "partial" not in catalog[0].gather_data()
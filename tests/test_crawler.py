@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from MyAnimeListPy.crawler import (SCHEMAS, Crawler, _write_parquet, compress_ids, expand_ids,
+                                   parquet_schema, read_ids)
+
+
+def _record(**values) -> dict:
+    record = {"id": "1", **SCHEMAS["anime"].defaults}
+    record.update(values)
+    return record
+
+
+def test_compress_ids_round_trip():
+    ids = {1, 2, 3, 7, 9, 10}
+    assert compress_ids(ids) == [[1, 3], [7, 7], [9, 10]]
+    assert expand_ids(compress_ids(ids)) == ids
+
+
+def test_parquet_chunks_share_a_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = [
+        [_record(id="1", episodes=26, theme="Adult Cast", year="1998")],
+        [_record(id="2", episodes="Unknown", theme=["Gore", "Mythology"], type=None),
+         _record(id="3", genres=[], english=["Bebop"])],
+    ]
+
+    tables = []
+    for i, records in enumerate(chunks):
+        path = str(tmp_path / f"records-{i}.parquet")
+        _write_parquet(path, records, SCHEMAS["anime"])
+        tables.append(pq.read_table(path))
+
+    assert all(table.schema == parquet_schema(SCHEMAS["anime"]) for table in tables)
+    assert tables[0].column("theme").to_pylist() == [["Adult Cast"]]
+    assert tables[1].column("theme").to_pylist() == [["Gore", "Mythology"], []]
+    assert tables[1].column("episodes").to_pylist() == ["Unknown", "0"]
+    assert tables[1].column("type").to_pylist() == [None, None]
+    assert tables[1].column("id").to_pylist() == [2, 3]
+
+
+def test_manga_unknown_is_an_empty_list(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "records.parquet")
+    _write_parquet(path, [{"id": 5, **SCHEMAS["manga"].defaults}], SCHEMAS["manga"])
+
+    table = pq.read_table(path)
+    assert table.column("theme").to_pylist() == [[]]
+    assert table.column("serialization").to_pylist() == ["Unknown"]
+
+
+class FakeClient:
+    idmap = None
+
+    def __init__(self, missing=()) -> None:
+        self.missing = set(missing)
+        self.requested = []
+
+    def get_anime_many(self, ids, workers:int):
+        from MyAnimeListPy.anime import Anime
+        from MyAnimeListPy.batch import BatchResult
+        from MyAnimeListPy.errors import NoContentError
+
+        for id in ids:
+            self.requested.append(id)
+            if id in self.missing:
+                yield BatchResult(id, error=NoContentError())
+            else:
+                yield BatchResult(id, Anime.from_data({"id": str(id), "title": f"Title {id}"}))
+
+
+def _lines(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_duplicate_ids_are_crawled_once(tmp_path):
+    client = FakeClient()
+    stats = Crawler(client, "anime", str(tmp_path), chunk_size=2).run([1, 2, 1, 3, 2])
+
+    assert client.requested == [1, 2, 3]
+    assert stats == {"records": 3, "missing": 0, "errors": 0}
+
+
+def test_retrying_a_missing_id_ends(tmp_path):
+    client = FakeClient(missing={2})
+    crawler = Crawler(client, "anime", str(tmp_path), chunk_size=1)
+    crawler.run([1, 2, 3])
+    errors = os.path.join(str(tmp_path), "errors.jsonl")
+    assert [e["id"] for e in _lines(errors)] == [2]
+
+    # Rerunning skips everything, errors included
+    assert Crawler(client, "anime", str(tmp_path)).run([1, 2, 3])["missing"] == 0
+
+    crawler = Crawler(client, "anime", str(tmp_path), chunk_size=1)
+    assert crawler.retry_errors() == {"records": 0, "missing": 1, "errors": 0}
+    assert client.requested == [1, 2, 3, 2]
+    assert [e["id"] for e in _lines(errors)] == [2]
+    assert crawler.done == {1, 2, 3}
+
+
+def test_retry_reads_the_ids_before_crawling(tmp_path):
+    client = FakeClient(missing={2})
+    crawler = Crawler(client, "anime", str(tmp_path), chunk_size=1)
+    crawler.run([2])
+
+    # The file is appended to while it is being retried
+    errors = os.path.join(str(tmp_path), "errors.jsonl")
+    crawler.run(read_ids(errors), retry=True)
+
+    assert client.requested == [2, 2]
+    assert len(_lines(errors)) == 2
+
+
+def test_retried_errors_that_succeed(tmp_path):
+    client = FakeClient(missing={2})
+    Crawler(client, "anime", str(tmp_path)).run([1, 2])
+
+    client.missing.clear()
+    crawler = Crawler(client, "anime", str(tmp_path))
+    assert crawler.retry_errors()["records"] == 1
+    assert not os.path.exists(os.path.join(str(tmp_path), "errors.jsonl"))
+    assert crawler.done == {1, 2}
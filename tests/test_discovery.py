@@ -0,0 +1,55 @@
+import pytest
+
+from MyAnimeListPy.discovery import discover
+from MyAnimeListPy.errors import MALError
+from MyAnimeListPy.utils.idmap import IdMap
+
+
+def test_discover(stub, client):
+    stub.missing = {"2", "4"}
+    client.idmap = IdMap()
+
+    stats = discover(client, "anime", range(1, 7), top_pages=1)
+
+    # 1 is on the top list, so only 2-6 are probed
+    assert stats == {"listed": 3, "probed": 5, "valid": 3, "dead": 2, "errors": 0}
+    assert client.idmap.state("anime", 99997) == "valid"
+    assert [client.idmap.state("anime", id) for id in range(1, 7)] == \
+        ["valid", "dead", "valid", "dead", "valid", "valid"]
+    assert client.idmap.state("manga", 1) is None
+
+    requests = sum(stub.counts.values())
+    stats = discover(client, "anime", range(1, 7))
+    assert stats["probed"] == 0
+    assert sum(stub.counts.values()) == requests
+
+
+def test_discover_needs_an_idmap(client):
+    with pytest.raises(ValueError):
+        discover(client, "anime", [1])
+
+    client.idmap = IdMap()
+    with pytest.raises(ValueError):
+        discover(client, "people", [1])
+
+
+def test_exists(stub, client):
+    stub.missing = {"2"}
+    assert client.exists("anime", 1) is True
+    assert client.exists("manga", "2") is False
+    assert stub.counts == {200: 1, 404: 1}
+
+    for id in ("one", -1, None):
+        with pytest.raises(MALError):
+            client.exists("anime", id)
+
+
+def test_exists_answers_from_the_idmap(stub, client):
+    client.idmap = IdMap()
+    client.idmap.mark("anime", 2, False)
+
+    assert client.exists("anime", 2) is False
+    assert client.exists("anime", 3) is True
+    assert client.exists("anime", 3) is True
+    assert stub.counts == {200: 1}
+
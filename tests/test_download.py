@@ -0,0 +1,67 @@
+import pytest
+
+from MyAnimeListPy.utils.download import Page, download, head
+from MyAnimeListPy.utils.metrics import Metrics
+from MyAnimeListPy.utils.transport import RetryPolicy
+
+requests = pytest.importorskip("requests")
+
+URL = "https://myanimelist.net/anime/1"
+
+
+class Driver:
+    def __init__(self, *outcomes) -> None:
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def _answer(self, method:str, url:str):
+        self.calls.append(method)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception): raise outcome
+        return outcome
+
+    def get(self, url:str, headers=None, **kwargs):
+        return self._answer("GET", url)
+
+    def head(self, url:str, **kwargs):
+        return self._answer("HEAD", url)
+
+
+def _events(metrics:Metrics) -> list:
+    events = []
+    metrics.subscribe(lambda event, fields: events.append((event, fields)))
+    return events
+
+
+@pytest.mark.parametrize("send", [
+    lambda url, driver, **kwargs: download(url, driver, wait_time=0, **kwargs),
+    lambda url, driver, **kwargs: head(url, driver, **kwargs),
+])
+def test_requests_are_retried(send):
+    driver = Driver(requests.ConnectionError("reset"), Page(URL, 503), Page(URL, 200, content=b"page"))
+    metrics = Metrics()
+    events = _events(metrics)
+
+    page = send(URL, driver, metrics=metrics, retry=RetryPolicy(attempts=3, backoff=0))
+
+    assert page.status_code == 200
+    assert len(driver.calls) == 3
+    assert [event for event, _ in events] == ["retry", "request", "retry", "request"]
+
+
+def test_head_requests_are_labelled():
+    driver = Driver(Page(URL, 404))
+    metrics = Metrics()
+    events = _events(metrics)
+
+    assert head(URL, driver, metrics=metrics).status_code == 404
+    assert driver.calls == ["HEAD"]
+    assert events[0][1]["method"] == "HEAD"
+    assert events[0][1]["bytes"] == 0
+
+
+def test_retries_give_up():
+    driver = Driver(requests.ConnectionError("reset"), requests.ConnectionError("reset"))
+
+    with pytest.raises(requests.ConnectionError):
+        head(URL, driver, retry=RetryPolicy(attempts=2, backoff=0))
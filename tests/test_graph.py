@@ -0,0 +1,100 @@
+import threading
+from array import array
+
+import pytest
+
+from MyAnimeListPy.anime import Anime
+from MyAnimeListPy.errors import NoContentError
+from MyAnimeListPy.graph import GraphCrawler, RelationGraph, node, node_name, parse_node
+from MyAnimeListPy.manga import Manga
+from MyAnimeListPy.utils.transport import Transport
+
+# A franchise where every entry links back to the others, a second
+# franchise and a dead link
+RELATED = {
+    "anime/1": ["anime/5", "manga/173", "anime/6"],
+    "anime/5": ["anime/1", "manga/173"],
+    "anime/6": ["anime/1", "anime/5", "anime/404"],
+    "manga/173": ["anime/1", "anime/5", "anime/6"],
+    "anime/20": ["manga/11"],
+    "manga/11": ["anime/20"],
+}
+
+
+class FakeClient:
+    transport = Transport()
+
+    def __init__(self) -> None:
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name:str):
+        with self._lock: self.requested.append(name)
+        if name not in RELATED: raise NoContentError(name)
+        return cls.from_data({"id": name.partition("/")[2], "related": RELATED[name]})
+
+    def get_anime(self, id):
+        return self._get(Anime, f"anime/{id}")
+
+    def get_manga(self, id):
+        return self._get(Manga, f"manga/{id}")
+
+
+def test_node_round_trip():
+    assert node("anime", 1) == 2 and node("manga", 1) == 3
+    assert node_name(parse_node("manga/173")) == "manga/173"
+    with pytest.raises(ValueError): parse_node("people/1")
+
+
+def test_crawl_fetches_every_entry_once():
+    client = FakeClient()
+    crawler = GraphCrawler(client, workers=4)
+    results = {result.id: result for result in crawler.run(["anime/1", ("anime", 5)])}
+
+    assert sorted(client.requested) == sorted(set(client.requested))
+    assert set(client.requested) == {"anime/1", "anime/5", "anime/6", "manga/173", "anime/404"}
+    assert isinstance(results["anime/404"].error, NoContentError)
+    assert results["manga/173"].record.related == RELATED["manga/173"]
+    assert crawler.queued == 5
+
+
+def test_max_entries():
+    client = FakeClient()
+    crawler = GraphCrawler(client, max_entries=2)
+    list(crawler.run(["anime/1"]))
+
+    assert len(client.requested) == 2
+
+
+def test_franchise():
+    crawler = GraphCrawler(FakeClient())
+    list(crawler.run(["anime/1", "anime/20"]))
+    graph = crawler.graph()
+
+    franchise = ["anime/1", "anime/5", "anime/6", "anime/404", "manga/173"]
+    assert graph.franchise("manga/173") == franchise
+    assert graph.franchise("anime/404") == franchise
+    assert graph.franchise("manga/11") == ["anime/20", "manga/11"]
+    assert graph.franchise("anime/2") == []
+    assert sorted(graph.franchises()) == [franchise, ["anime/20", "manga/11"]]
+
+
+def test_csr_lookups(tmp_path):
+    # A relation listed on one page only still links both ways
+    graph = RelationGraph.from_adjacency({
+        node("anime", 1): [node("anime", 5), node("manga", 173), node("anime", 1)],
+        node("anime", 5): [node("anime", 1)],
+    })
+
+    assert graph.nodes == array("q", [2, 10, 347])
+    assert graph.offsets == array("q", [0, 2, 3, 4])
+    assert graph.edges == array("q", [10, 347, 2, 2])
+    assert graph.neighbors("anime/1") == ["anime/5", "manga/173"]
+    assert graph.neighbors("manga/173") == ["anime/1"]
+    assert graph.neighbors("anime/2") == []
+    assert "manga/173" in graph and "anime/173" not in graph
+
+    path = str(tmp_path / "bebop.graph")
+    graph.save(path)
+    loaded = RelationGraph.load(path)
+    assert (loaded.nodes, loaded.offsets, loaded.edges) == (graph.nodes, graph.offsets, graph.edges)
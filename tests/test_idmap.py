@@ -0,0 +1,116 @@
+import pytest
+
+from MyAnimeListPy.utils.idmap import BLOCK_SIZE, Bitmap, IdMap
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bitmap():
+    bitmap = Bitmap()
+    for id in (0, 7, 8, 1000, 70000): bitmap[id] = True
+    bitmap[7] = False
+    bitmap[10 ** 6] = False
+
+    assert bitmap.count() == 4
+    assert list(bitmap.ids()) == [0, 8, 1000, 70000]
+    assert list(bitmap.ids(1, 1001)) == [8, 1000]
+    assert list(Bitmap.load(bitmap.dump()).ids()) == [0, 8, 1000, 70000]
+
+
+def test_bitmap_rejects_negative_ids():
+    bitmap = Bitmap()
+    bitmap[0] = True
+    with pytest.raises(ValueError):
+        bitmap[-1] = True
+    with pytest.raises(ValueError):
+        bitmap[-1]
+    assert bitmap.data == bytearray(b"\x01")
+
+
+def test_missing_ids_expire():
+    clock = Clock()
+    idmap = IdMap(dead_ttl=100, clock=clock)
+    idmap.mark("anime", 5, False)
+    idmap.mark("anime", 6, True)
+
+    assert idmap.state("anime", 5) == "dead"
+    assert idmap.state("anime", 6) == "valid"
+    assert idmap.state("manga", 5) is None
+
+    clock.now = 100
+    assert idmap.state("anime", 5) is None
+    assert idmap.stale("anime") == [5]
+
+
+def test_rechecking_one_id_does_not_trust_the_others():
+    clock = Clock()
+    idmap = IdMap(dead_ttl=100, clock=clock)
+    for id in (1, 2, 3): idmap.mark("anime", id, False)
+
+    clock.now = 150
+    idmap.mark("anime", 1, False)
+
+    assert idmap.state("anime", 1) == "dead"
+    assert idmap.state("anime", 2) is None
+    assert idmap.stale("anime") == [2, 3]
+    assert idmap.stats("anime") == {"valid": 0, "dead": 1, "stale": 2}
+
+    clock.now = 160
+    idmap.mark("anime", 2, True)
+    idmap.mark("anime", 3, False)
+
+    # Trusted again from the oldest recheck
+    assert idmap.stale("anime") == []
+    assert idmap.state("anime", 3) == "dead"
+    clock.now = 250
+    assert idmap.stale("anime") == [1, 3]
+
+
+def test_rechecks_expire_too():
+    clock = Clock()
+    idmap = IdMap(dead_ttl=100, clock=clock)
+    idmap.mark("anime", 1, False)
+    idmap.mark("anime", 2, False)
+
+    clock.now = 150
+    idmap.mark("anime", 1, False)
+    clock.now = 260
+    assert idmap.stale("anime") == [1, 2]
+
+
+def test_blocks_are_separate():
+    clock = Clock()
+    idmap = IdMap(dead_ttl=100, clock=clock)
+    idmap.mark("anime", 1, False)
+
+    clock.now = 50
+    idmap.mark("anime", BLOCK_SIZE + 1, False)
+
+    clock.now = 120
+    assert idmap.stale("anime") == [1]
+    assert idmap.state("anime", BLOCK_SIZE + 1) == "dead"
+
+
+def test_save_and_load(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / "ids.json")
+    idmap = IdMap(path, dead_ttl=100, clock=clock)
+    for id in (1, 2): idmap.mark("anime", id, False)
+    idmap.mark("manga", 3, True)
+    clock.now = 150
+    idmap.mark("anime", 1, False)
+    idmap.save()
+
+    loaded = IdMap(path, dead_ttl=100, clock=clock)
+    assert loaded.state("anime", 1) == "dead"
+    assert loaded.stale("anime") == [2]
+    assert loaded.state("manga", 3) == "valid"
+
+    loaded.mark("anime", 2, False)
+    assert loaded.stale("anime") == []
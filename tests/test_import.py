@@ -0,0 +1,26 @@
+"""The import checks of the benchmarks: importing the package must stay
+under the import budget and must not import heavy dependencies."""
+import os
+
+import pytest
+
+from MyAnimeListPy.benchmarks.__main__ import IMPORT_BUDGET_MS, LAZY_DEPENDENCIES, bench_import
+
+from conftest import PACKAGE, ROOT
+
+
+@pytest.fixture(scope="module")
+def imported(tmp_path_factory):
+    # The checkout may not be named after the package, import it
+    # through a link that is
+    root = tmp_path_factory.mktemp("import")
+    os.symlink(ROOT, os.path.join(root, PACKAGE), target_is_directory=True)
+    return bench_import(package=PACKAGE, root=str(root))
+
+
+def test_no_eager_heavy_imports(imported):
+    assert imported["eager"] == [], f"importing the package imports {imported['eager']}, of {LAZY_DEPENDENCIES}"
+
+
+def test_import_budget(imported):
+    assert imported["median_ms"] <= IMPORT_BUDGET_MS
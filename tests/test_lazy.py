@@ -0,0 +1,86 @@
+import pytest
+
+from MyAnimeListPy.anime import Anime
+from MyAnimeListPy.batch import fetch_many
+from MyAnimeListPy.errors import MALError, NoContentError
+from MyAnimeListPy.lazy import Ref, materialize
+from MyAnimeListPy.manga import Manga
+
+
+class FakeClient:
+    def __init__(self, missing=()) -> None:
+        self.missing = set(missing)
+        self.requested = []
+        self.batches = []
+
+    def _get(self, cls, kind:str, id):
+        self.requested.append((kind, id))
+        if id in self.missing: raise NoContentError(id)
+        return cls.from_data({"id": str(id), "title": f"{kind} {id}"})
+
+    def get_anime(self, id):
+        return self._get(Anime, "anime", id)
+
+    def get_manga(self, id):
+        return self._get(Manga, "manga", id)
+
+    def get_anime_many(self, ids, workers:int):
+        self.batches.append(("anime", ids))
+        return fetch_many(self.get_anime, ids, workers, errors=(NoContentError, MALError))
+
+    def get_manga_many(self, ids, workers:int):
+        self.batches.append(("manga", ids))
+        return fetch_many(self.get_manga, ids, workers, errors=(NoContentError, MALError))
+
+
+def test_fetched_on_first_access_only():
+    client = FakeClient()
+    ref = Ref(client, "anime", 1)
+
+    assert not ref.loaded and ref.id == 1 and ref.kind == "anime"
+    assert str(ref) == "1 <anime, not loaded>"
+    assert client.requested == []
+
+    assert ref.title == "anime 1"
+    assert ref.gather_data()["title"] == "anime 1"
+    assert ref.load() is ref.load()
+    assert ref.loaded and client.requested == [("anime", 1)]
+
+
+def test_errors_are_kept():
+    client = FakeClient(missing={2})
+    ref = Ref(client, "manga", 2)
+
+    for _ in range(2):
+        with pytest.raises(NoContentError):
+            ref.title
+    assert client.requested == [("manga", 2)]
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        Ref(FakeClient(), "people", 1)
+
+
+def test_materialize_nested_refs():
+    client = FakeClient(missing={4})
+    loaded = Ref(client, "anime", 1)
+    loaded.load()
+
+    refs = [
+        loaded, Ref(client, "anime", 2),
+        [Ref(client, "anime", 3), (Ref(client, "manga", 3), {Ref(client, "anime", 4)})],
+        {"sequel": Ref(client, "anime", 2), "adaptation": [Ref(client, "manga", 5)]},
+    ]
+    assert materialize(refs, workers=2) == refs
+
+    # One batch per kind, every id fetched once
+    assert sorted(client.batches) == [("anime", [2, 3, 4]), ("manga", [3, 5])]
+    assert sorted(client.requested) == [("anime", 1), ("anime", 2), ("anime", 3), ("anime", 4),
+                                        ("manga", 3), ("manga", 5)]
+
+    assert refs[2][1][0].title == "manga 3"
+    assert refs[3]["sequel"].title == refs[1].title == "anime 2"
+    with pytest.raises(NoContentError):
+        next(iter(refs[2][1][1])).title
+    assert len(client.requested) == 6
@@ -0,0 +1,37 @@
+from MyAnimeListPy import listing
+from MyAnimeListPy.anime import ANIME_SCHEMA
+from MyAnimeListPy.benchmarks import fixtures
+
+
+def _season() -> dict:
+    records = listing.parse_season(fixtures.load("season"), "spring", 1998)
+    return {record["id"]: record for record in records}
+
+
+def test_new_entries_get_the_season():
+    records = _season()
+
+    assert records["1"]["season"] == "Spring"
+    assert records["1"]["year"] == "1998"
+    assert records["99997"]["type"] == "Movie"
+    assert records["99997"]["season"] == "Spring"
+
+
+def test_continuing_entries_have_no_season():
+    record = _season()["99990"]
+
+    assert record["type"] == "TV"
+    assert "season" not in record
+    assert "year" not in record
+
+    anime = listing.partial_records("anime", [record])[0]
+    assert anime.partial
+    assert (anime.season, anime.year) == ("", "")
+
+
+def test_updating_from_a_full_page_clears_partial():
+    anime = listing.partial_records("anime", [_season()["99990"]])[0]
+    full = {**anime.gather_data(), "season": "Spring", "year": "1998"}
+
+    assert ANIME_SCHEMA.update(anime, full) == {"season": ("", "Spring"), "year": ("", "1998")}
+    assert not anime.partial
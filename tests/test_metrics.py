@@ -0,0 +1,66 @@
+from MyAnimeListPy.utils.metrics import Metrics
+
+
+def _metrics(**kwargs) -> Metrics:
+    metrics = Metrics(**kwargs)
+    for i in range(1, 101):
+        metrics.emit("request", url=f"/anime/{i}", status=404 if i % 10 == 0 else 200,
+                     bytes=1000, rate_wait=0.0, ttfb=i / 100, transfer=0.5, seconds=i / 100 + 0.5)
+    metrics.emit("parse", kind="anime", seconds=0.25)
+    metrics.emit("cache", result="hit")
+    metrics.emit("records", kind="anime", id=1, result="coalesced")
+    return metrics
+
+
+def test_summary():
+    summary = _metrics().summary()
+
+    assert summary["counters"] == {
+        "requests_total[status=200]": 90, "requests_total[status=404]": 10,
+        "bytes_received_total": 100000, "parses_total[kind=anime]": 1,
+        "cache_total[result=hit]": 1, "records_total[result=coalesced]": 1,
+    }
+
+    ttfb = summary["timings"]["request_ttfb"]
+    assert ttfb["count"] == 100
+    assert abs(ttfb["mean"] - 0.505) < 1e-9
+    assert (ttfb["p50"], ttfb["p90"], ttfb["p99"]) == (0.5, 0.9, 0.99)
+    assert summary["timings"]["parse_seconds"] == {"count": 1, "mean": 0.25, "p50": 0.25, "p90": 0.25, "p99": 0.25}
+
+
+def test_percentiles_use_recent_samples():
+    summary = _metrics(max_samples=10).summary()
+
+    ttfb = summary["timings"]["request_ttfb"]
+    assert ttfb["count"] == 100 and abs(ttfb["mean"] - 0.505) < 1e-9
+    assert (ttfb["p50"], ttfb["p99"]) == (0.95, 1.0)
+
+
+def test_prometheus():
+    lines = _metrics().to_prometheus(prefix="mal").splitlines()
+
+    assert "# TYPE mal_requests_total counter" in lines
+    assert lines.count("# TYPE mal_requests_total counter") == 1
+    assert 'mal_requests_total{status="200"} 90' in lines
+    assert 'mal_requests_total{status="404"} 10' in lines
+    assert "mal_bytes_received_total 100000" in lines
+    assert 'mal_records_total{result="coalesced"} 1' in lines
+
+    assert "# TYPE mal_request_ttfb summary" in lines
+    assert 'mal_request_ttfb{quantile="0.5"} 0.5' in lines
+    assert 'mal_request_ttfb{quantile="0.99"} 0.99' in lines
+    assert "mal_request_ttfb_count 100" in lines
+    assert "mal_request_ttfb_sum 50.5" in lines
+    assert "mal_parse_seconds_sum 0.25" in lines and "mal_parse_seconds_count 1" in lines
+
+
+def test_subscribers():
+    metrics = Metrics()
+    events = []
+    callback = lambda event, fields: events.append((event, fields))
+    metrics.subscribe(callback)
+    metrics.emit("cache", result="miss")
+
+    metrics.unsubscribe(callback)
+    metrics.emit("cache", result="hit")
+    assert events == [("cache", {"result": "miss"})]
@@ -0,0 +1,174 @@
+"""Parity of the parser engines with the parser they replaced.
+
+reference_anime and reference_manga are the original html.parser
+implementations of Anime.parse_page and Manga.parse_page. Every engine
+must give the same values on the fixture pages, apart from the changes
+documented when extraction moved to utils.schema: only schema fields
+are returned, list fields marked as unknown are [],
+Manga.serialization is read from the page and the "No genres have been
+added yet." placeholder is an empty genres list.
+"""
+import pytest
+from bs4 import BeautifulSoup, NavigableString
+
+from MyAnimeListPy.anime import ANIME_SCHEMA, Anime
+from MyAnimeListPy.benchmarks import fixtures
+from MyAnimeListPy.manga import MANGA_SCHEMA, Manga
+from MyAnimeListPy.utils import get_id
+from MyAnimeListPy.utils.download import Page, read_sidebar
+from MyAnimeListPy.utils.parsing import ENGINES
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    ENGINES = tuple(engine for engine in ENGINES if engine != "lxml")
+
+
+def _contents(elem) -> list:
+    contents = []
+    for content in elem.contents:
+        if isinstance(content, NavigableString):
+            if content.strip(): contents.append(content.strip())
+        else:
+            contents.append(content)
+    return contents
+
+
+def reference_anime(page:Page) -> dict:
+    soup = BeautifulSoup(page.content, "html.parser")
+    data = {"id": get_id(page.url)}
+    data["title"] = soup.select_one('h1[class="title-name h1_bold_none"]').text
+
+    for elem in soup.select("div[class='spaceit_pad']"):
+        if len(elem.contents) < 2 or '<span class="dark_text">' not in str(elem.contents[1]): continue
+
+        contents = _contents(elem)
+        label = contents[0].text.replace(":", "").strip().lower()
+
+        if elem.select("a[href^='/anime/']"):
+            value = [piece.text for piece in elem.select("a[href^='/anime/']")]
+        else:
+            if len(contents) < 2: continue
+            value = contents[1] if isinstance(contents[1], str) else contents[1].text
+
+        if isinstance(value, str):
+            value = "" if value.rstrip(",") in ("None found", "None", "N/A") else value.rstrip(",")
+
+        data[label] = [value] if label in ("english", "japanese", "native", "synonyms", "synonym") else value
+
+    if "genre" in data and "genres" not in data:
+        data["genres"] = data.pop("genre")
+    elif "genre" not in data and "genres" not in data:
+        data["genres"] = []
+
+    if "premiered" in data and len(data["premiered"].split()) > 1:
+        data["season"], data["year"] = data.pop("premiered").split()
+
+    return data
+
+
+def reference_manga(page:Page) -> dict:
+    soup = BeautifulSoup(page.content, "html.parser")
+    data = {"id": get_id(page.url)}
+    data["title"] = soup.select_one('h1[class="h1 edit-info"] > span').text
+
+    for elem in soup.select("div[class='spaceit_pad']"):
+        if len(elem.contents) < 2 or not soup.select('span[class="dark_text"]'): continue
+
+        contents = _contents(elem)
+        label = contents[0].text.replace(":", "").strip().lower()
+
+        if elem.select("a[href^='/manga/']"):
+            value = [piece.text.strip() for piece in elem.select("a[href^='/manga/']")]
+        elif elem.select("a[href^='/people/']"):
+            value = [piece.text.strip() for piece in elem.select("a[href^='/people/']")]
+        else:
+            if len(contents) < 2: continue
+            value = contents[1] if isinstance(contents[1], str) else contents[1].text
+
+        if isinstance(value, str):
+            value = value if value not in ("None found", "None", "N/A") else "Unknown"
+
+        data[label] = [value] if label in ("english", "japanese", "native", "synonyms", "synonym") else value
+
+    for single, many in (("genre", "genres"), ("author", "authors")):
+        if single in data and many not in data:
+            data[many] = data.pop(single)
+        elif single not in data and many not in data:
+            data[many] = []
+
+    if "premiered" in data and len(data["premiered"].split()) > 1:
+        data["season"], data["year"] = data.pop("premiered").split()
+
+    return data
+
+
+def expected(kind:str, page:Page) -> dict:
+    """The reference values with the documented schema changes applied."""
+    schema = ANIME_SCHEMA if kind == "anime" else MANGA_SCHEMA
+    reference = reference_anime(page) if kind == "anime" else reference_manga(page)
+
+    data = {"id": reference["id"]}
+    for attr, default in schema.defaults.items():
+        if attr not in reference or attr in ("serialization", "related"): continue
+
+        value = reference[attr]
+        if isinstance(default, list) and not isinstance(value, list):
+            value = [] if value in ("", schema.unknown, "No genres have been added yet.") else [value]
+        data[attr] = value
+    return data
+
+
+PAGES = [name for name in fixtures.PAGES]
+CLASSES = {"anime": Anime, "manga": Manga}
+
+
+def _page(name:str) -> Page:
+    kind = fixtures.kind(name)
+    return Page(f"https://myanimelist.net/{kind}/1", content=fixtures.load(name))
+
+
+def _parsed(name:str, engine:str) -> dict:
+    page = _page(name)
+    cls = CLASSES[fixtures.kind(name)]
+    return cls.parse_page(cls.__new__(cls), page, engine)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name", PAGES)
+def test_engine_matches_reference(name, engine):
+    parsed = _parsed(name, engine)
+    reference = expected(fixtures.kind(name), _page(name))
+
+    assert {attr: parsed.get(attr) for attr in reference} == reference
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name", PAGES)
+def test_engines_agree(name, engine):
+    assert _parsed(name, engine) == _parsed(name, "html.parser")
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000, 16384])
+@pytest.mark.parametrize("name", PAGES)
+def test_streamed_page_matches_whole_page(name, chunk_size):
+    content = fixtures.load(name)
+    streamed, _ = read_sidebar(content[i:i + chunk_size] for i in range(0, len(content), chunk_size))
+
+    cls = CLASSES[fixtures.kind(name)]
+    whole = cls(_page(name)).gather_data()
+    assert cls(Page(_page(name).url, content=streamed)).gather_data() == whole
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_related_after_synopsis(engine):
+    content = fixtures.load("anime_late_related")
+    assert content.index(b"anime_detail_related_anime") - content.index(b"rightside") > 32768
+
+    related = ["manga/173", "manga/174", "anime/5", "anime/17205", "anime/4037"]
+    assert _parsed("anime_late_related", engine)["related"] == related
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        _parsed("anime_small", "regex")
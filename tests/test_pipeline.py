@@ -0,0 +1,62 @@
+from MyAnimeListPy import MyAnimeList
+from MyAnimeListPy.errors import NoContentError
+from MyAnimeListPy.pipeline import ingest, parse_pages, reparse_archive
+from MyAnimeListPy.utils.archive import PageArchive
+
+IDS = [1, 2, 3, 4, 5, 6]
+
+
+def _ingest(client, **kwargs) -> dict:
+    results = {}
+    for result in ingest(client, "anime", IDS, fetch_workers=3, **kwargs):
+        assert result.id not in results
+        results[result.id] = result
+    return results
+
+
+def test_ingest(stub, client):
+    stub.missing = {"3"}
+    results = _ingest(client, parse_workers=2)
+
+    assert sorted(results) == IDS
+    assert isinstance(results[3].error, NoContentError)
+    for id in (1, 2, 4, 5, 6):
+        assert results[id].record.id == str(id)
+        assert results[id].record.gather_data() == client.get_anime(id).gather_data()
+
+
+def test_parse_workers_give_the_same_records(stub, client):
+    single = _ingest(client, parse_workers=1, records=False)
+    several = _ingest(client, parse_workers=3, records=False)
+
+    assert {id: result.record for id, result in single.items()} == \
+        {id: result.record for id, result in several.items()}
+    assert all(isinstance(result.record, dict) for result in single.values())
+
+
+def test_parse_pages_keeps_the_order(stub, client):
+    pages = [(f"{stub.url}/anime/{id}", stub.page("anime", id)) for id in IDS * 3]
+    records = list(parse_pages("anime", pages, workers=2, chunk_size=4))
+
+    assert [record["id"] for record in records] == [str(id) for id in IDS * 3]
+    assert records == list(parse_pages("anime", pages, workers=1))
+
+
+def test_archive_replay(stub, client, tmp_path):
+    stub.missing = {"3"}
+    with PageArchive(str(tmp_path)) as archive:
+        client.archive = archive
+        online = _ingest(client, parse_workers=2)
+        requests = sum(stub.counts.values())
+
+        offline = MyAnimeList(archive=archive, offline=True)
+        offline.base_url = stub.url
+        replayed = _ingest(offline, parse_workers=2)
+
+        assert sum(stub.counts.values()) == requests
+        assert isinstance(replayed[3].error, NoContentError)
+        assert {id: result.record.gather_data() for id, result in replayed.items() if result.ok} == \
+            {id: result.record.gather_data() for id, result in online.items() if result.ok}
+
+        reparsed = list(reparse_archive(archive, "anime", workers=2))
+        assert sorted(int(record["id"]) for record in reparsed) == [1, 2, 4, 5, 6]
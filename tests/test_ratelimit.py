@@ -0,0 +1,103 @@
+import threading
+
+from MyAnimeListPy.utils.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_reservations_are_spaced_out():
+    clock = FakeClock()
+    bucket = TokenBucket(2, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.5, 1.0]
+
+
+def test_waiters_are_spaced_out_after_retry_after():
+    clock = FakeClock()
+    bucket = TokenBucket(2, burst=4, clock=clock)
+
+    bucket.feedback(429, "30")
+    clock.now = 10.0
+    # The rate was halved to 1 per second
+    assert [bucket.reserve() for _ in range(3)] == [20.0, 21.0, 22.0]
+
+
+def test_tokens_resume_after_retry_after():
+    clock = FakeClock()
+    bucket = TokenBucket(1, clock=clock)
+
+    bucket.feedback(503, "5")
+    clock.now = 5.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 2.0
+
+
+class VirtualTime:
+    """A clock and sleep for threads: time only moves once every thread
+    is asleep, straight to the next wake up (or event)."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.running = 0
+        self._cond = threading.Condition()
+        self._targets = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds:float) -> None:
+        with self._cond:
+            target = self.now + seconds
+            self._targets.append(target)
+            self.running -= 1
+            self._cond.notify_all()
+            while self.now < target: self._cond.wait()
+
+    def run(self, callers:int, target, events:dict) -> list:
+        fired = []
+
+        def _call():
+            target()
+            with self._cond:
+                fired.append(self.now)
+                self.running -= 1
+                self._cond.notify_all()
+
+        self.running = callers
+        threads = [threading.Thread(target=_call) for _ in range(callers)]
+        for thread in threads: thread.start()
+
+        events = dict(events)
+        with self._cond:
+            while len(fired) < callers:
+                while self.running: self._cond.wait()
+                if len(fired) == callers: break
+
+                next = min(self._targets + list(events))
+                self.now = next
+                if next in events: events.pop(next)()
+
+                woken = [t for t in self._targets if t <= next]
+                self._targets = [t for t in self._targets if t > next]
+                self.running += len(woken)
+                self._cond.notify_all()
+
+        for thread in threads: thread.join()
+        return sorted(fired)
+
+
+def test_pause_applies_to_callers_already_waiting():
+    time = VirtualTime()
+    bucket = TokenBucket(0.25, clock=time.clock, sleep=time.sleep)
+
+    # Three callers queue up (slots at 0, 4 and 8), then a 429 asks for
+    # a minute's pause at t=1 and halves the rate
+    fired = time.run(3, bucket.acquire, {1.0: lambda: bucket.feedback(429, "60")})
+
+    assert fired == [0.0, 61.0, 69.0]
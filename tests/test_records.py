@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from MyAnimeListPy.errors import NoContentError
+from MyAnimeListPy.utils.records import RecordCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_concurrent_calls_share_one_request(stub, client):
+    stub.latency = 0.2
+    client.records = RecordCache()
+    barrier = threading.Barrier(8)
+    records = []
+
+    def get():
+        barrier.wait()
+        records.append(client.get_anime(1))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+
+    assert stub.counts == {200: 1}
+    assert client.records.stats() == {"hits": 0, "misses": 1, "coalesced": 7, "evictions": 0, "entries": 1}
+    assert all(record is records[0] for record in records)
+
+    assert client.get_anime("1") is records[0]
+    assert client.records.hits == 1
+
+
+def test_errors_are_not_cached(stub, client):
+    stub.missing = {"2"}
+    client.records = RecordCache()
+
+    for _ in range(2):
+        with pytest.raises(NoContentError):
+            client.get_anime(2)
+    assert stub.counts == {404: 2}
+    assert len(client.records) == 0
+
+
+def test_records_expire():
+    clock = Clock()
+    cache = RecordCache(ttl=10, clock=clock)
+    loads = []
+
+    def load():
+        loads.append(clock.now)
+        return object()
+
+    first = cache.get_or_load("a", load)
+    clock.now = 9.9
+    assert cache.get_or_load("a", load) is first
+    assert cache.get("a") is first
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get_or_load("a", load) is not first
+    assert loads == [0.0, 10]
+
+
+def test_least_recently_used_records_are_evicted():
+    cache = RecordCache(max_entries=2, ttl=None)
+    for key in ("a", "b"): cache.get_or_load(key, lambda: key)
+
+    # "a" is used again, so "b" is the least recently used
+    assert cache.lookup("a", lambda: "reloaded") == ("a", "hit")
+    cache.get_or_load("c", lambda: "c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+    assert cache.evictions == 1 and len(cache) == 2
+    assert cache.lookup("b", lambda: "b again") == ("b again", "miss")
@@ -0,0 +1,102 @@
+from MyAnimeListPy.anime import ANIME_SCHEMA, Anime
+from MyAnimeListPy.batch import BatchResult
+from MyAnimeListPy.errors import MALError, NoContentError
+from MyAnimeListPy.scheduler import DAY, RETRY_DELAY, RefreshScheduler
+
+
+def _anime(id:int, **data) -> Anime:
+    anime = Anime.__new__(Anime)
+    ANIME_SCHEMA.load(anime, {"id": str(id), "status": "Currently Airing", **data})
+    return anime
+
+
+class FakeClient:
+    def __init__(self, outcomes:dict) -> None:
+        self.outcomes = outcomes
+        self.requested = []
+
+    def get_anime_many(self, ids, workers:int):
+        for id in ids:
+            self.requested.append(id)
+            outcome = self.outcomes[id]
+            if isinstance(outcome, Exception):
+                yield BatchResult(id, error=outcome)
+            else:
+                yield BatchResult(id, outcome)
+
+
+class Clock:
+    def __init__(self, now:float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_refresh_updates_changed_attributes():
+    clock = Clock(10 * DAY)
+    client = FakeClient({"1": _anime(1, status="Finished Airing")})
+    scheduler = RefreshScheduler(client, [_anime(1)], clock=clock)
+
+    changes = scheduler.run()
+
+    assert changes == {("anime", "1"): {"status": ("Currently Airing", "Finished Airing")}}
+    assert scheduler.due() == []
+
+
+def test_failed_records_back_off():
+    clock = Clock(10 * DAY)
+    client = FakeClient({"1": MALError("503"), "2": _anime(2)})
+    scheduler = RefreshScheduler(client, [_anime(1), _anime(2)], clock=clock)
+
+    changes = scheduler.run()
+    assert isinstance(changes[("anime", "1")]["error"], MALError)
+    assert scheduler.failures == {("anime", "1"): 1}
+    assert scheduler.due() == []
+
+    clock.now += RETRY_DELAY
+    assert [record.id for record in scheduler.due()] == ["1"]
+
+    scheduler.run()
+    clock.now += RETRY_DELAY
+    assert scheduler.due() == []
+    clock.now += RETRY_DELAY
+    assert [record.id for record in scheduler.due()] == ["1"]
+
+    client.outcomes["1"] = _anime(1)
+    scheduler.run()
+    assert scheduler.failures == {}
+
+
+def test_missing_records_are_dropped():
+    clock = Clock(10 * DAY)
+    client = FakeClient({"1": NoContentError(), "2": _anime(2)})
+    scheduler = RefreshScheduler(client, [_anime(1), _anime(2)], clock=clock)
+
+    changes = scheduler.run()
+
+    assert isinstance(changes[("anime", "1")]["error"], NoContentError)
+    assert len(scheduler) == 1
+    assert ("anime", "1") not in scheduler.last_refreshed
+
+    clock.now += 2 * DAY
+    scheduler.run()
+    assert client.requested.count("1") == 1
+
+
+def test_shared_records_are_not_changed():
+    # The record the scheduler holds is the object a record cache hands
+    # out to every caller
+    clock = Clock(10 * DAY)
+    shared = _anime(1)
+    client = FakeClient({"1": _anime(1, status="Finished Airing")})
+    scheduler = RefreshScheduler(client, [shared], clock=clock)
+
+    changes = scheduler.run()
+
+    assert changes == {("anime", "1"): {"status": ("Currently Airing", "Finished Airing")}}
+    assert shared.status == "Currently Airing"
+
+    clock.now += 100 * DAY
+    client.outcomes["1"] = shared
+    assert scheduler.run() == {("anime", "1"): {"status": ("Finished Airing", "Currently Airing")}}
@@ -0,0 +1,47 @@
+from MyAnimeListPy.search import TitleIndex
+
+
+class Record:
+    def __init__(self, id:int, *titles:str) -> None:
+        self.id = id
+        self.titles = list(titles)
+
+    def get_titles(self) -> list:
+        return self.titles
+
+
+def test_lookup_and_search():
+    index = TitleIndex([Record(1, "Cowboy Bebop", "カウボーイビバップ"), Record(5, "Cowboy Bebop: Tengoku no Tobira")])
+
+    assert index.lookup("cowboy  BEBOP!") == ["1"]
+    assert [match[0] for match in index.search("cowboy bebop")] == ["1", "5"]
+
+
+def test_removed_titles_no_longer_match():
+    index = TitleIndex([Record(1, "Cowboy Bebop")])
+    index.remove(1)
+
+    assert 1 not in index
+    assert index.lookup("Cowboy Bebop") == []
+    assert index.search("Cowboy Bebop") == []
+
+
+def test_update_reuses_keys():
+    record = Record(1, "Cowboy Bebop", "Bebop")
+    index = TitleIndex([record, Record(2, "Trigun")])
+    postings = sum(len(p) for p in index._postings.values())
+
+    for _ in range(100): index.update(record)
+
+    assert len(index._keys) == 3
+    assert sum(len(p) for p in index._postings.values()) == postings
+    assert index.lookup("bebop") == ["1"]
+
+
+def test_titles_can_move_between_records():
+    index = TitleIndex([Record(1, "Bebop")])
+    index.remove(1)
+    index.add(Record(2, "Bebop"))
+
+    assert index.lookup("Bebop") == ["2"]
+    assert [match[0] for match in index.search("Bebop")] == ["2"]
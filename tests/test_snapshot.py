@@ -0,0 +1,104 @@
+import pytest
+
+from MyAnimeListPy.anime import Anime
+from MyAnimeListPy.benchmarks import fixtures
+from MyAnimeListPy.manga import Manga
+from MyAnimeListPy.snapshot import Snapshot, write_snapshot
+from MyAnimeListPy.utils.download import Page
+
+
+def _parsed(cls, name:str, id:int):
+    return cls(Page(f"https://myanimelist.net/{fixtures.kind(name)}/{id}", content=fixtures.load(name)))
+
+
+def _anime() -> list:
+    return [
+        _parsed(Anime, "anime_small", 1),
+        _parsed(Anime, "anime_minimal", 2),
+        Anime.from_data({
+            # Mixed str/list values, None, ints (negative too) and empty
+            # collections, as partial records and other sources produce
+            "id": "30", "title": "Ｃｏｗｂｏｙ ビバップ", "english": [], "synonyms": ["", "Bebop"],
+            "japanese": "カウボーイビバップ", "type": None, "episodes": 26, "status": None,
+            "aired": "", "season": "Spring", "year": 1998, "producers": [1, "Sunrise", None],
+            "licensors": [], "studios": "Sunrise", "source": -1, "genres": [], "theme": ["Adult Cast", "Space"],
+            "demographic": "", "duration": "24 min.", "rating": "R - 17+", "related": [],
+        }, partial=True),
+    ]
+
+
+def _check(snapshot:Snapshot, records:list) -> None:
+    assert len(snapshot) == len(records)
+    assert snapshot.ids() == sorted(int(record.id) for record in records)
+
+    for record in records:
+        expected = record.gather_data()
+        assert snapshot[record.id].partial == record.partial
+        loaded = snapshot[record.id].gather_data()
+        assert list(loaded) == list(expected)
+        for field, value in expected.items():
+            assert loaded[field] == value, field
+            assert type(loaded[field]) is type(value), field
+
+
+def test_anime_round_trip(tmp_path):
+    records = _anime()
+    path = str(tmp_path / "anime.snap")
+    assert write_snapshot(path, records) == len(records)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.kind == "anime"
+        _check(snapshot, records)
+        assert [record.gather_data() for record in snapshot] == [record.gather_data() for record in records]
+
+
+def test_manga_round_trip(tmp_path):
+    records = [_parsed(Manga, "manga_small", 2), Manga.from_data({"id": 7, "title": "Empty"})]
+    path = str(tmp_path / "manga.snap")
+    write_snapshot(path, records)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.kind == "manga"
+        _check(snapshot, records)
+
+
+def test_dict_records_need_a_kind(tmp_path):
+    path = str(tmp_path / "anime.snap")
+    with pytest.raises(ValueError):
+        write_snapshot(path, [{"id": 1, "title": "Cowboy Bebop"}])
+
+    write_snapshot(path, [{"id": 1, "title": "Cowboy Bebop", "genres": []}], kind="anime")
+    with Snapshot(path) as snapshot:
+        assert snapshot.data(0) == {"id": 1, "title": "Cowboy Bebop", "genres": []}
+
+
+def test_missing_ids(tmp_path):
+    path = str(tmp_path / "anime.snap")
+    write_snapshot(path, _anime())
+
+    with Snapshot(path) as snapshot:
+        for id in (0, 3, 29, 31, -1, 10 ** 12, "abc", None):
+            assert id not in snapshot
+            assert snapshot.get(id) is None
+            with pytest.raises(KeyError):
+                snapshot[id]
+
+        assert snapshot.get(4, "missing") == "missing"
+        assert "30" in snapshot
+        with pytest.raises(IndexError):
+            snapshot.data(len(snapshot))
+
+
+def test_duplicate_ids(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(str(tmp_path / "anime.snap"), [{"id": 1}, {"id": "1"}], kind="anime")
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "anime.snap")
+    assert write_snapshot(path, [], kind="anime") == 0
+
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 0
+        assert snapshot.ids() == []
+        assert snapshot.get(1) is None
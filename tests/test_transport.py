@@ -0,0 +1,53 @@
+import requests
+
+from MyAnimeListPy import MyAnimeList
+
+
+def test_counters(stub, client):
+    client.get_anime(1)
+    client.get_manga(2)
+    assert client.exists("anime", 3)
+
+    stats = client.transport.stats()
+    assert stats["requests"] == 3
+    # One kept-alive connection for every request
+    assert stats["connections"] == 1
+    assert stats["round_trips_saved"] == 2
+    # The stub gzips pages
+    assert 0 < stats["wire_bytes"] < stats["body_bytes"]
+    assert stats["bytes_saved"] == stats["body_bytes"] - stats["wire_bytes"]
+
+
+def test_pool_follows_the_workers(stub, client):
+    stub.latency = 0.05
+    results = list(client.get_anime_many(range(96), workers=32))
+
+    assert all(result.ok for result in results)
+    assert client.transport.pool_size == 32
+    assert client.transport.requests == 96
+    # No connection was closed for lack of room in the pool
+    assert client.transport.connections() <= 32
+
+
+def test_caller_sessions_are_left_alone(stub):
+    session = requests.Session()
+    adapters = dict(session.adapters)
+    headers = dict(session.headers)
+
+    client = MyAnimeList(session, rate_limit=1e-4, retries=0)
+    client.base_url = stub.url
+    list(client.get_anime_many([1, 2], workers=16))
+
+    assert client.session is session
+    assert session.adapters == adapters and session.headers == headers
+
+
+def test_setting_the_session(stub, client):
+    client.get_anime(1)
+    session = requests.Session()
+    client.session = session
+
+    assert client.session is session and client.transport.session is session
+    assert client.transport.requests == 0
+    client.get_anime(1)
+    assert client.transport.requests == 1
@@ -0,0 +1,241 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+
+from .download import Page
+
+# Every record in the data file starts with the magic and the length of
+# the compressed payload, so the data file can be walked without the index
+_MAGIC = b"MALA"
+_RECORD = struct.Struct("<4sQ")
+
+# The payload starts with the length of the JSON metadata
+_META = struct.Struct("<I")
+
+
+def page_kind(url:str):
+    """Returns "anime" or "manga" for the url of a detail page, None for
+    anything else (listings, search...)."""
+    parts = urlparse(url).path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] in ("anime", "manga") and parts[1].isdigit(): return parts[0]
+    return None
+
+
+class PageArchive:
+    """An append-only archive of raw downloaded pages.
+
+    Every page is stored with its url, fetch time, status and headers,
+    compressed on its own with zlib, so any record can be read without
+    touching the others. Records are appended to pages.dat and indexed
+    in pages.idx (one JSON line per record), which is loaded into memory
+    when the archive is opened. Fetching a url again appends a new
+    record, the latest one is returned by get. Error records (other
+    than a 404) never replace an earlier page of the same url, so a 429
+    or 500 stored by another writer doesn't hide the good page.
+
+    Attributes
+    ----------
+        path (str): The directory holding the archive.
+        level (int): The zlib compression level.
+        stored_bytes (int): The body bytes stored, before compression.
+        compressed_bytes (int): The size of the compressed records.
+    """
+
+    __slots__ = ("path", "level", "stored_bytes", "compressed_bytes",
+                "_entries", "_latest", "_data", "_index", "_lock", "_clock")
+
+    def __init__(self, path:str, level:int=6, clock=time.time) -> None:
+        """
+        The constructor of the PageArchive class.
+
+        Parameters
+        ----------
+            path (str): The directory of the archive. It is created
+                when missing.
+            level (int) (optional): The zlib compression level (1-9).
+            clock (callable) (optional): The wall clock used for the
+                fetch times.
+        """
+        self.path = path
+        self.level = level
+        self.stored_bytes = 0
+        self.compressed_bytes = 0
+
+        self._entries = []
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+        os.makedirs(path, exist_ok=True)
+        self._load_index()
+
+        self._data = open(os.path.join(path, "pages.dat"), "a+b")
+        self._index = open(os.path.join(path, "pages.idx"), "a", encoding="utf-8")
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.path, "pages.idx")
+        if not os.path.exists(index_path): return
+
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash, the record may be lost
+                    continue
+                self._add_entry(entry)
+
+    def _add_entry(self, entry:dict) -> int:
+        number = len(self._entries)
+        self._entries.append(entry)
+        if entry["status_code"] < 400 or entry["status_code"] == 404 or entry["url"] not in self._latest:
+            self._latest[entry["url"]] = number
+        self.stored_bytes += entry["size"]
+        self.compressed_bytes += entry["length"]
+        return number
+
+    def __enter__(self) -> "PageArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url:str) -> bool:
+        return url in self._latest
+
+    def close(self) -> None:
+        """Closes the archive files."""
+        self._data.close()
+        self._index.close()
+
+    def append(self, url:str, response, fetched_at:float=None) -> int:
+        """Stores a downloaded page.
+
+        Parameters
+        ----------
+            url (str): The url the page was requested from.
+            response (requests.Response|Page): The downloaded page.
+            fetched_at (float) (optional): When the page was fetched.
+                Defaults to now.
+
+        Returns
+        -------
+            int: The number of the record.
+        """
+        fetched_at = self._clock() if fetched_at is None else fetched_at
+        content = response.content
+        meta = json.dumps({
+            "url": url, "status_code": response.status_code,
+            "headers": dict(response.headers), "fetched_at": fetched_at,
+        }).encode("utf-8")
+        payload = zlib.compress(_META.pack(len(meta)) + meta + content, self.level)
+
+        with self._lock:
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            self._data.write(_RECORD.pack(_MAGIC, len(payload)) + payload)
+            self._data.flush()
+
+            # The data is written before its index line, so the index
+            # never points at a partial record
+            entry = {
+                "url": url, "offset": offset + _RECORD.size, "length": len(payload),
+                "size": len(content), "status_code": response.status_code, "fetched_at": fetched_at,
+            }
+            self._index.write(json.dumps(entry) + "\n")
+            self._index.flush()
+            return self._add_entry(entry)
+
+    def read(self, number:int) -> Page:
+        """Returns the page stored as record number."""
+        entry = self._entries[number]
+        with self._lock:
+            self._data.seek(entry["offset"])
+            payload = self._data.read(entry["length"])
+
+        data = zlib.decompress(payload)
+        size = _META.unpack_from(data)[0]
+        meta = json.loads(data[_META.size:_META.size + size])
+        return Page(meta["url"], meta["status_code"], meta["headers"], data[_META.size + size:])
+
+    def get(self, url:str):
+        """Returns the latest page stored for url, or None."""
+        number = self._latest.get(url)
+        return None if number is None else self.read(number)
+
+    def fetched_at(self, url:str):
+        """Returns when the latest page for url was fetched, or None."""
+        number = self._latest.get(url)
+        return None if number is None else self._entries[number]["fetched_at"]
+
+    def urls(self) -> list:
+        """Returns every url in the archive."""
+        return list(self._latest)
+
+    def latest(self, kind:str=None):
+        """Yields the latest successful page of every url, in the order
+        they were first stored.
+
+        Parameters
+        ----------
+            kind (str) (optional): Only yield the detail pages of "anime"
+                or "manga".
+        """
+        for url, number in list(self._latest.items()):
+            if kind is not None and page_kind(url) != kind: continue
+            if self._entries[number]["status_code"] >= 400: continue
+            yield self.read(number)
+
+    def stats(self) -> dict:
+        """Returns the number of records and urls and the stored and
+        compressed sizes."""
+        return {
+            "records": len(self._entries), "urls": len(self._latest),
+            "stored_bytes": self.stored_bytes, "compressed_bytes": self.compressed_bytes,
+        }
+
+    def replay(self) -> "ArchiveReplay":
+        """Returns a driver for download that answers from the archive
+        instead of the network."""
+        return ArchiveReplay(self)
+
+
+class ArchiveReplay:
+    """Serves the pages of a PageArchive in place of a session, for
+    offline runs and tests. Urls that aren't archived are answered with
+    a 404.
+
+    Attributes
+    ----------
+        archive (PageArchive): The archive pages are read from.
+        requests (int): The number of requests answered.
+        missing (int): The number of requests for urls not archived.
+    """
+
+    __slots__ = ("archive", "requests", "missing", "_lock")
+
+    def __init__(self, archive:PageArchive) -> None:
+        self.archive = archive
+        self.requests = 0
+        self.missing = 0
+        self._lock = threading.Lock()
+
+    def get(self, url:str, headers=None, **kwargs) -> Page:
+        """Returns the archived page for url."""
+        page = self.archive.get(url)
+        with self._lock:
+            self.requests += 1
+            if page is None: self.missing += 1
+        return page if page is not None else Page(url, 404)
+
+    def head(self, url:str, **kwargs) -> Page:
+        """Returns the status and headers of the archived page for url."""
+        page = self.get(url, **kwargs)
+        return Page(url, page.status_code, page.headers)
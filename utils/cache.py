@@ -0,0 +1,233 @@
+import json
+import sqlite3
+import threading
+import time
+
+from .download import Page
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def _header(headers, name:str):
+    # Header names are case-insensitive, but a Page's headers may be a
+    # plain dict
+    value = headers.get(name)
+    if value is not None: return value
+
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name: return value
+    return None
+
+
+class ResponseCache:
+    """A persistent, SQLite backed cache of downloaded pages.
+
+    Entries younger than their ttl are served without touching the
+    network. Older entries are revalidated with a conditional GET using
+    the stored ETag/Last-Modified headers, so an unchanged page only
+    costs a 304. The total size of the stored bodies is capped and the
+    least recently used entries are evicted first.
+
+    Attributes
+    ----------
+        path (str): The location of the database (":memory:" for none).
+        ttl (int/float): The default number of seconds an entry is fresh.
+            None means entries are always revalidated.
+        max_size (int): The maximum number of body bytes to keep. None
+            means unbounded.
+        hits (int): Requests served from a fresh entry.
+        misses (int): Requests that needed a full download.
+        revalidated (int): Requests answered with a 304.
+        evictions (int): Entries removed to stay under max_size.
+    """
+
+    __slots__ = ("path", "ttl", "max_size", "hits", "misses", "revalidated",
+                "evictions", "_conn", "_lock", "_clock")
+
+    def __init__(self, path:str=":memory:", ttl:float=None, max_size:int=None, clock=time.time) -> None:
+        """
+        The constructor of the ResponseCache class.
+
+        Parameters
+        ----------
+            path (str) (optional): The location of the database file.
+            ttl (int/float) (optional): The default freshness of an entry
+                in seconds.
+            max_size (int) (optional): The maximum number of body bytes to
+                keep before evicting entries.
+            clock (callable) (optional): The wall clock used for expiry.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __contains__(self, url:str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM responses WHERE url = ?", (url,)).fetchone() is not None
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self._conn.close()
+
+    def size(self) -> int:
+        """Returns the number of body bytes currently stored."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters."""
+        return {
+            "hits": self.hits, "misses": self.misses,
+            "revalidated": self.revalidated, "evictions": self.evictions,
+        }
+
+    def get_fresh(self, url:str):
+        """Returns the cached Page for url if it has not expired,
+        otherwise None."""
+        now = self._clock()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status_code, headers, content, expires_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+            if row is None or row[3] is None or row[3] <= now:
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+            self.hits += 1
+
+        return Page(url, row[0], json.loads(row[1]), row[2])
+
+    def conditional_headers(self, url:str) -> dict:
+        """Returns the If-None-Match/If-Modified-Since headers to send
+        when revalidating url."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+        if row is None: return {}
+
+        headers = {}
+        if row[0]: headers["If-None-Match"] = row[0]
+        if row[1]: headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def store(self, url:str, response, ttl:float=None) -> Page:
+        """Stores a successful response and returns it as a Page.
+
+        Parameters
+        ----------
+            url (str): The url the response was requested from.
+            response (requests.Response|Page): The downloaded page.
+            ttl (int/float) (optional): The freshness of this entry in
+                seconds. Defaults to the cache's ttl.
+        """
+        now = self._clock()
+        ttl = self.ttl if ttl is None else ttl
+        etag = _header(response.headers, "ETag")
+        last_modified = _header(response.headers, "Last-Modified")
+        headers = dict(response.headers)
+        page = Page(url, response.status_code, headers, response.content)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, page.status_code, json.dumps(headers), page.content, len(page.content),
+                etag, last_modified, now, None if ttl is None else now + ttl, now),
+            )
+            self.misses += 1
+            self._evict()
+            self._conn.commit()
+
+        return page
+
+    def refresh(self, url:str, response, ttl:float=None):
+        """Handles a 304 for url by extending the stored entry and
+        returns the cached Page. Returns None if the entry is gone."""
+        now = self._clock()
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status_code, headers, content FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+            if row is None: return None
+
+            # A 304 may carry newer validators
+            headers = json.loads(row[1])
+            for key in ("ETag", "Last-Modified", "Cache-Control", "Expires"):
+                value = _header(response.headers, key)
+                if value is None: continue
+
+                for old in [old for old in headers if old.lower() == key.lower()]: del headers[old]
+                headers[key] = value
+
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, etag = ?, last_modified = ?, "
+                "expires_at = ?, last_access = ? WHERE url = ?",
+                (json.dumps(headers), _header(headers, "ETag"), _header(headers, "Last-Modified"),
+                None if ttl is None else now + ttl, now, url),
+            )
+            self._conn.commit()
+            self.revalidated += 1
+
+        return Page(url, row[0], headers, row[2])
+
+    def invalidate(self, url:str) -> None:
+        """Removes the entry for url."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Must be called while holding the lock
+        if self.max_size is None: return
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size: return
+
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_size: break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.evictions += 1
@@ -1,8 +1,281 @@
 import time
 
-import requests
+from . import transport
+from .parsing import related_end, related_table, sidebar_end
 
-def download(url, driver=requests.session(), wait_time=2):
-    req = driver.get(url)
-    time.sleep(wait_time)
-    return req
\ No newline at end of file
+# The size of the chunks read from streamed responses
+STREAM_CHUNK_SIZE = 16384
+
+_default_session = None
+
+
+def default_session() -> "requests.Session":
+    """Returns the session shared by calls to download that don't pass
+    a driver. It is created on first use."""
+    global _default_session
+    if _default_session is None:
+        import requests
+
+        _default_session = requests.session()
+    return _default_session
+
+
+class Page:
+    """A downloaded page that can be parsed in place of a
+    requests.Response.
+
+    Attributes
+    ----------
+        url (str): The url of the page.
+        status_code (int): The HTTP status code of the response.
+        headers (dict): The response headers.
+        content (bytes): The body of the response.
+    """
+
+    __slots__ = ("url", "status_code", "headers", "content")
+
+    def __init__(self, url:str, status_code:int=200, headers=None, content:bytes=b"") -> None:
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers if headers is not None else {}
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        """Whether the status code is below 400."""
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        """The body of the response decoded as utf-8."""
+        return self.content.decode("utf-8", errors="replace")
+
+
+class SidebarReader:
+    """Collects the chunks of a streamed MAL page until the info sidebar
+    and the related entries table of the right-hand side have been
+    read. Pages without a related entries table are read to the end.
+
+    Attributes
+    ----------
+        content (bytes): The page up to the end of the related entries
+            table once done, or everything fed so far.
+        done (bool): Whether the rest of the page can be left unread.
+    """
+
+    __slots__ = ("_buffer", "_sidebar", "_related", "content", "done")
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._sidebar = -1
+        self._related = -1
+        self.content = b""
+        self.done = False
+
+    def feed(self, chunk:bytes) -> bool:
+        """Adds a chunk and returns whether everything that is parsed
+        has been read."""
+        # The markers may straddle two chunks
+        start = max(0, len(self._buffer) - 64)
+        self._buffer += chunk
+
+        if self._sidebar < 0: self._sidebar = sidebar_end(self._buffer, start)
+        if self._sidebar < 0: return False
+
+        if self._related < 0: self._related = related_table(self._buffer, max(self._sidebar, start))
+        if self._related < 0: return False
+
+        end = related_end(self._buffer, self._related, complete=False)
+        if end >= 0:
+            self.content = bytes(self._buffer[:end])
+            self.done = True
+        return self.done
+
+    def finish(self) -> bytes:
+        """Returns the content read, the whole page when the related
+        entries table was never found."""
+        if not self.done: self.content = bytes(self._buffer)
+        return self.content
+
+
+def read_sidebar(chunks) -> tuple:
+    """Reads the chunks of a MAL page until the related entries table
+    has been read (see SidebarReader).
+
+    Returns
+    -------
+        tuple: (content, complete) where complete is False when the
+            rest of the page was left unread.
+    """
+    reader = SidebarReader()
+    for chunk in chunks:
+        if reader.feed(chunk): break
+    return reader.finish(), not reader.done
+
+
+async def read_sidebar_async(chunks) -> tuple:
+    """The asynchronous counterpart of read_sidebar."""
+    reader = SidebarReader()
+    async for chunk in chunks:
+        if reader.feed(chunk): break
+    return reader.finish(), not reader.done
+
+
+def _streamed(req, driver) -> Page:
+    # Reads a response requested with stream=True up to the related
+    # entries and closes the connection if anything was left unread.
+    if req.status_code == 200:
+        content, complete = read_sidebar(req.iter_content(STREAM_CHUNK_SIZE))
+    else:
+        content, complete = req.content, True
+
+    raw = getattr(req, "raw", None)
+    received = getattr(driver, "received", None)
+    if received is not None:
+        wire = raw.tell() if raw is not None and hasattr(raw, "tell") else 0
+        received(wire or len(content), len(content))
+
+    if not complete: req.close()
+    return Page(req.url, req.status_code, req.headers, content)
+
+
+def _send(url:str, request, wait_time:float, limiter, metrics, retry, **fields):
+    # Sends a request under the rate limiter (or sleeps wait_time after
+    # it without one), reports every attempt to the limiter and metrics
+    # and retries connection errors and retry.statuses. request returns
+    # the response and its elapsed time (or None).
+    attempt = 0
+    while True:
+        waited = 0.0
+        if limiter is not None: waited = limiter.acquire()
+
+        start = time.perf_counter()
+        try:
+            req, elapsed = request()
+        except transport.RETRY_ERRORS as e:
+            if retry is None or attempt + 1 >= retry.attempts: raise
+            if metrics is not None: metrics.emit("retry", url=url, error=repr(e))
+            time.sleep(retry.delay(attempt))
+            attempt += 1
+            continue
+        seconds = time.perf_counter() - start
+
+        if limiter is None:
+            time.sleep(wait_time)
+        else:
+            limiter.feedback(req.status_code, req.headers.get("Retry-After"))
+
+        if metrics is not None:
+            ttfb = elapsed.total_seconds() if elapsed is not None else None
+            metrics.emit(
+                "request", url=url, **fields, status=req.status_code, bytes=len(req.content),
+                rate_wait=waited, ttfb=ttfb, transfer=None if ttfb is None else max(0.0, seconds - ttfb),
+                seconds=seconds,
+            )
+
+        if retry is None or attempt + 1 >= retry.attempts or req.status_code not in retry.statuses:
+            return req
+
+        if metrics is not None: metrics.emit("retry", url=url, status=req.status_code)
+        time.sleep(retry.delay(attempt))
+        attempt += 1
+
+
+def download(url, driver=None, wait_time=2, limiter=None, cache=None, metrics=None, retry=None,
+            stream=False, archive=None):
+    """Downloads the given url.
+
+    When a limiter (utils.ratelimit.TokenBucket) is given, a token is
+    taken before the request starts and the response is reported back
+    to it. Otherwise the call sleeps wait_time seconds afterwards.
+
+    When a cache (utils.cache.ResponseCache) is given, fresh entries are
+    returned without a request and stale ones are revalidated with a
+    conditional GET. Cached pages are returned as Page objects.
+
+    When metrics (utils.metrics.Metrics) are given, a "request" event is
+    emitted for every attempt and a "cache" event for the cache lookup.
+
+    When a retry policy (utils.transport.RetryPolicy) is given, connection
+    errors and retryable status codes are retried after a jittered
+    backoff. Every attempt takes its own token from the limiter.
+
+    When stream is True, the body is read in chunks and the connection
+    is closed as soon as the info sidebar and the related entries have
+    been received, so the reviews, recommendations and comments of large
+    pages are never downloaded (pages without related entries are read
+    to the end). The page is returned as a Page holding only the part
+    that was read, which parses into the same Anime/Manga objects.
+
+    When an archive (utils.archive.PageArchive) is given, every page
+    received from the network that was found (or answered with a 404)
+    is appended to it. Pages answered from the cache and throttling or
+    server errors left after the retries are not.
+    """
+    if driver is None: driver = default_session()
+
+    headers = {}
+    if cache is not None:
+        page = cache.get_fresh(url)
+        if page is not None:
+            if metrics is not None: metrics.emit("cache", url=url, result="hit")
+            return page
+
+        headers = cache.conditional_headers(url)
+
+    def request():
+        if stream:
+            resp = driver.get(url, headers=headers or None, stream=True)
+            return _streamed(resp, driver), getattr(resp, "elapsed", None)
+
+        req = driver.get(url, headers=headers) if headers else driver.get(url)
+        return req, getattr(req, "elapsed", None)
+
+    req = _send(url, request, wait_time, limiter, metrics, retry)
+
+    if cache is not None and req.status_code == 304:
+        page = cache.refresh(url, req)
+        if page is not None:
+            if metrics is not None: metrics.emit("cache", url=url, result="revalidated")
+            return page
+
+        # The entry was evicted or invalidated after its validators were
+        # read, so the 304 has nothing to refer to. Ask for the page.
+        headers = {}
+        req = _send(url, request, wait_time, limiter, metrics, retry)
+
+    if archive is not None and (req.ok and req.status_code != 304 or req.status_code == 404):
+        archive.append(url, req)
+
+    if cache is not None and req.ok and req.status_code != 304:
+        if metrics is not None: metrics.emit("cache", url=url, result="miss")
+        return cache.store(url, req)
+
+    return req
+
+
+def head(url:str, driver=None, limiter=None, metrics=None, retry=None):
+    """Sends a HEAD request under the same rate limiting and retries as
+    download. Tells whether a page exists without downloading it.
+
+    Parameters
+    ----------
+        url (str): The url to request.
+        driver (optional): Anything with a head method (Transport,
+            requests.Session, ArchiveReplay).
+        limiter (TokenBucket) (optional): Shared rate limiter.
+        metrics (Metrics) (optional): Receives a request event.
+        retry (RetryPolicy) (optional): How connection errors, 429s and
+            5xx responses are retried.
+
+    Returns
+    -------
+        requests.Response: The response, without a body.
+    """
+    if driver is None: driver = default_session()
+
+    def request():
+        req = driver.head(url, allow_redirects=True)
+        return req, getattr(req, "elapsed", None)
+
+    return _send(url, request, 0, limiter, metrics, retry, method="HEAD")
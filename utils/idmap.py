@@ -0,0 +1,230 @@
+import base64
+import json
+import os
+import threading
+import time
+import zlib
+
+# Dead ids are refreshed per block of this many ids
+BLOCK_SIZE = 1024
+
+# How long a dead id is trusted before it is requested again
+DEAD_TTL = 30 * 24 * 3600
+
+
+class Bitmap:
+    """A growable bitmap of non-negative ints, e.g. ids."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data:bytes=b"") -> None:
+        self.data = bytearray(data)
+
+    def __getitem__(self, id:int) -> bool:
+        if id < 0: raise ValueError(f"Negative id {id}")
+        byte = id >> 3
+        return byte < len(self.data) and bool(self.data[byte] >> (id & 7) & 1)
+
+    def __setitem__(self, id:int, value:bool) -> None:
+        if id < 0: raise ValueError(f"Negative id {id}")
+        byte = id >> 3
+        if byte >= len(self.data):
+            if not value: return
+            self.data.extend(bytes(byte + 1 - len(self.data)))
+
+        if value:
+            self.data[byte] |= 1 << (id & 7)
+        else:
+            self.data[byte] &= ~(1 << (id & 7)) & 0xFF
+
+    def count(self) -> int:
+        """Returns the number of set bits."""
+        # int.bit_count is newer than the oldest python supported (3.7)
+        return bin(int.from_bytes(self.data, "little")).count("1")
+
+    def ids(self, start:int=0, end:int=None):
+        """Yields the set ids between start and end."""
+        end = len(self.data) * 8 if end is None else min(end, len(self.data) * 8)
+        return (id for id in range(start, end) if self[id])
+
+    def dump(self) -> str:
+        """Returns the bitmap compressed and base64 encoded."""
+        return base64.b64encode(zlib.compress(bytes(self.data))).decode("ascii")
+
+    @classmethod
+    def load(cls, value:str) -> "Bitmap":
+        """The inverse of dump."""
+        return cls(zlib.decompress(base64.b64decode(value)))
+
+
+class _KindMap:
+    # The bitmaps and dead check times of one kind, and when the ids of
+    # the expired blocks have been requested again
+
+    __slots__ = ("valid", "dead", "checked", "rechecked")
+
+    def __init__(self, valid:Bitmap=None, dead:Bitmap=None, checked:dict=None, rechecked:dict=None) -> None:
+        self.valid = valid or Bitmap()
+        self.dead = dead or Bitmap()
+        self.checked = checked or {}
+        self.rechecked = rechecked or {}
+
+
+class IdMap:
+    """The ids known to exist or to be missing, per kind.
+
+    Two bitmaps are kept for each kind (anime, manga): ids that returned
+    a page and ids that returned a 404. Ids in neither are unknown. The
+    id space is sparse, so skipping the known missing ids saves a large
+    share of the requests of a full crawl.
+
+    Ids can be deleted and added again, so missing ids are only trusted
+    for dead_ttl seconds, counted per block of BLOCK_SIZE ids from the
+    first time a missing id of the block was seen. After that the block's
+    missing ids are unknown again (see stale) until they are requested,
+    and the block is trusted for another dead_ttl once all of them have
+    been.
+
+    The map is saved as JSON holding the compressed bitmaps, a few KB
+    for the whole id space.
+
+    Attributes
+    ----------
+        path (str): The file the map is loaded from and saved to, or None.
+        dead_ttl (int/float): How long missing ids are trusted in seconds.
+    """
+
+    __slots__ = ("path", "dead_ttl", "_kinds", "_clock", "_lock")
+
+    def __init__(self, path:str=None, dead_ttl:float=DEAD_TTL, clock=time.time) -> None:
+        """
+        The constructor of the IdMap class.
+
+        Parameters
+        ----------
+            path (str) (optional): The file to load the map from when it
+                exists, and to save it to.
+            dead_ttl (int/float) (optional): How long missing ids are
+                trusted in seconds.
+            clock (callable) (optional): The wall clock used to expire
+                missing ids.
+        """
+        self.path = path
+        self.dead_ttl = dead_ttl
+        self._kinds = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path): self._load(path)
+
+    def _load(self, path:str) -> None:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+
+        for kind, data in state["kinds"].items():
+            self._kinds[kind] = _KindMap(
+                Bitmap.load(data["valid"]), Bitmap.load(data["dead"]),
+                {int(block): checked for block, checked in data["checked"].items()},
+                {int(block): {int(id): checked for id, checked in ids.items()}
+                 for block, ids in data.get("rechecked", {}).items()},
+            )
+
+    def save(self, path:str=None) -> None:
+        """Writes the map to path, or to the path it was loaded from."""
+        path = path or self.path
+        if path is None: raise ValueError("IdMap has no path to save to")
+
+        with self._lock:
+            state = {"version": 1, "block_size": BLOCK_SIZE, "kinds": {
+                kind: {"valid": m.valid.dump(), "dead": m.dead.dump(),
+                       "checked": m.checked, "rechecked": m.rechecked}
+                for kind, m in self._kinds.items()
+            }}
+
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def _map(self, kind:str) -> _KindMap:
+        m = self._kinds.get(kind)
+        if m is None: m = self._kinds[kind] = _KindMap()
+        return m
+
+    def _fresh(self, m:_KindMap, block:int, now:float) -> bool:
+        checked = m.checked.get(block)
+        return checked is not None and now - checked < self.dead_ttl
+
+    def _trusted(self, m:_KindMap, id:int, now:float) -> bool:
+        # Whether a missing id is still known to be missing
+        block = id // BLOCK_SIZE
+        if self._fresh(m, block, now): return True
+
+        checked = m.rechecked.get(block, {}).get(id)
+        return checked is not None and now - checked < self.dead_ttl
+
+    def state(self, kind:str, id:int):
+        """Returns "valid", "dead" or None when the id is unknown (or
+        its block of missing ids has expired)."""
+        id = int(id)
+        with self._lock:
+            m = self._kinds.get(kind)
+            if m is None: return None
+            if m.valid[id]: return "valid"
+            if m.dead[id] and self._trusted(m, id, self._clock()): return "dead"
+            return None
+
+    def is_dead(self, kind:str, id:int) -> bool:
+        """Whether the id is known to be missing."""
+        return self.state(kind, id) == "dead"
+
+    def mark(self, kind:str, id:int, exists:bool) -> None:
+        """Records whether the id exists."""
+        id = int(id)
+        with self._lock:
+            m = self._map(kind)
+            m.valid[id] = exists
+            m.dead[id] = not exists
+
+            block = id // BLOCK_SIZE
+            now = self._clock()
+            if self._fresh(m, block, now): return
+
+            if block not in m.checked:
+                if not exists: m.checked[block] = now
+                return
+
+            # The block has expired. Its other missing ids haven't been
+            # checked, so it is only trusted again once they have been,
+            # from the oldest of those checks.
+            rechecked = m.rechecked.setdefault(block, {})
+            rechecked[id] = now
+            if all(dead in rechecked for dead in m.dead.ids(block * BLOCK_SIZE, (block + 1) * BLOCK_SIZE)):
+                m.checked[block] = min(rechecked.values())
+                del m.rechecked[block]
+
+    def unknown(self, kind:str, ids):
+        """Yields the ids that are neither known to exist nor known to be
+        missing."""
+        return (id for id in ids if self.state(kind, id) is None)
+
+    def stale(self, kind:str) -> list:
+        """Returns the missing ids whose block has expired, to be checked
+        again."""
+        with self._lock:
+            m = self._kinds.get(kind)
+            if m is None: return []
+
+            now = self._clock()
+            return [
+                id for block in sorted(m.checked) if not self._fresh(m, block, now)
+                for id in m.dead.ids(block * BLOCK_SIZE, (block + 1) * BLOCK_SIZE)
+                if not self._trusted(m, id, now)
+            ]
+
+    def stats(self, kind:str) -> dict:
+        """Returns the number of valid, missing and expired missing ids."""
+        stale = len(self.stale(kind))
+        with self._lock:
+            m = self._kinds.get(kind) or _KindMap()
+            return {"valid": m.valid.count(), "dead": m.dead.count() - stale, "stale": stale}
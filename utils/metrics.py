@@ -0,0 +1,158 @@
+import math
+import threading
+from collections import deque
+
+# Event fields that are durations in seconds
+TIMINGS = {
+    "request": ("rate_wait", "ttfb", "transfer", "seconds"),
+    "parse": ("seconds",),
+}
+
+
+def _percentile(values:list, fraction:float) -> float:
+    # The nearest-rank percentile, values must be sorted
+    if not values: return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class Metrics:
+    """Collects events from MyAnimeList and download.
+
+    Events are passed to every subscribed callback as (event, fields)
+    and aggregated into counters and timing samples that can be
+    summarized or exported in the Prometheus text format. Clients only
+    build events when they have a Metrics object, so leaving it out
+    costs nothing.
+
+    Events
+    ------
+        request: url, status, bytes, rate_wait (time spent waiting on
+            the rate limiter), ttfb (time until the response headers
+            arrived, including DNS and connecting), transfer (time spent
+            reading the body) and seconds (the whole request).
+        parse: kind, seconds.
+        cache: result ("hit", "miss" or "revalidated").
+        records: kind, id, result ("hit", "miss" or "coalesced") of a
+            RecordCache lookup.
+
+    Attributes
+    ----------
+        counters (dict): (name, labels) -> count.
+        samples (dict): (event, field) -> the most recent timings.
+        totals (dict): (event, field) -> [count, sum] of every timing.
+    """
+
+    __slots__ = ("counters", "samples", "totals", "max_samples", "_callbacks", "_lock")
+
+    def __init__(self, max_samples:int=10000) -> None:
+        """
+        The constructor of the Metrics class.
+
+        Parameters
+        ----------
+            max_samples (int) (optional): The number of recent timings
+                kept per field for the percentiles.
+        """
+        self.counters = {}
+        self.samples = {}
+        self.totals = {}
+        self.max_samples = max_samples
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback) -> None:
+        """Calls callback(event, fields) for every event."""
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        """Stops calling callback."""
+        self._callbacks.remove(callback)
+
+    def _count(self, name:str, labels:tuple=(), amount:float=1) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def emit(self, event:str, **fields) -> None:
+        """Records an event and passes it on to the subscribers."""
+        with self._lock:
+            if event == "request":
+                self._count("requests_total", (("status", str(fields.get("status"))),))
+                self._count("bytes_received_total", amount=fields.get("bytes") or 0)
+            elif event == "parse":
+                self._count("parses_total", (("kind", fields.get("kind")),))
+            elif event == "cache":
+                self._count("cache_total", (("result", fields.get("result")),))
+            elif event == "records":
+                self._count("records_total", (("result", fields.get("result")),))
+            else:
+                self._count(f"{event}_total")
+
+            for field in TIMINGS.get(event, ()):
+                value = fields.get(field)
+                if value is None: continue
+
+                samples = self.samples.get((event, field))
+                if samples is None:
+                    samples = self.samples[(event, field)] = deque(maxlen=self.max_samples)
+                samples.append(value)
+
+                totals = self.totals.setdefault((event, field), [0, 0.0])
+                totals[0] += 1
+                totals[1] += value
+
+        for callback in self._callbacks: callback(event, fields)
+
+    def summary(self) -> dict:
+        """Returns the counters and, for every timing, the count and mean
+        of all the values and the 50/90/99th percentiles of the most
+        recent ones."""
+        with self._lock:
+            counters = dict(self.counters)
+            samples = {key: sorted(values) for key, values in self.samples.items()}
+            totals = {key: tuple(value) for key, value in self.totals.items()}
+
+        timings = {}
+        for (event, field), values in samples.items():
+            count, total = totals[(event, field)]
+            timings[f"{event}_{field}"] = {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                "p50": _percentile(values, 0.5),
+                "p90": _percentile(values, 0.9),
+                "p99": _percentile(values, 0.99),
+            }
+
+        return {
+            "counters": {name + "".join(f"[{k}={v}]" for k, v in labels): value
+                        for (name, labels), value in counters.items()},
+            "timings": timings,
+        }
+
+    def to_prometheus(self, prefix:str="myanimelist") -> str:
+        """Exports the counters and timing percentiles in the
+        Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            samples = {key: sorted(values) for key, values in self.samples.items()}
+            totals = {key: tuple(value) for key, value in self.totals.items()}
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value:.10g}" if label_text else f"{metric} {value:.10g}")
+
+        for (event, field), values in sorted(samples.items()):
+            metric = f"{prefix}_{event}_{field}"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in (0.5, 0.9, 0.99):
+                lines.append(f'{metric}{{quantile="{quantile}"}} {_percentile(values, quantile):.10g}')
+            count, total = totals[(event, field)]
+            lines.append(f"{metric}_sum {total:.10g}")
+            lines.append(f"{metric}_count {count}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,118 @@
+import re
+
+# The engines that can be passed to make_soup
+ENGINES = ("html.parser", "lxml", "sidebar")
+
+# Markers for the parts of a MAL page that hold the data we extract
+_TITLE_START = b"<h1"
+_TITLE_END = b"</h1>"
+_SIDEBAR_START = b'<div class="leftside"'
+_SIDEBAR_END = b'class="rightside'
+_RELATED_START = b'<table class="anime_detail_related_anime'
+_RELATED_END = b"</table>"
+
+# Links to related entries, e.g. /manga/173/Cowboy_Bebop
+_RELATED_LINK = re.compile(r"/(anime|manga)/(\d+)")
+
+
+def sidebar_html(content) -> bytes:
+    """Returns only the title heading, the left-hand info sidebar and
+    the related entries table of a MAL page. Falls back to the whole
+    page when the markers cannot be found."""
+    if isinstance(content, str): content = content.encode("utf-8")
+
+    start = content.find(_SIDEBAR_START)
+    if start < 0: return content
+
+    end = sidebar_end(content)
+    sidebar = content[start:end] if end >= 0 else content[start:]
+
+    title_start = content.find(_TITLE_START)
+    title_end = content.find(_TITLE_END, title_start)
+    if title_start < 0 or title_end < 0 or title_start > start: return content
+
+    related = b""
+    if end >= 0:
+        table = related_table(content, end)
+        if table >= 0: related = content[table:related_end(content, table)]
+
+    return content[title_start:title_end + len(_TITLE_END)] + sidebar + related
+
+
+def related_table(content, start:int=0) -> int:
+    """Returns the offset of the related entries table, searching from
+    start, or -1 when there is none (or it hasn't been read yet)."""
+    return content.find(_RELATED_START, start)
+
+
+def related_end(content, start:int, complete:bool=True) -> int:
+    """Returns the offset just after the related entries table found
+    after start, or start when there is none. The table sits in the
+    right-hand side, after the score, synopsis and background of the
+    page, so it is searched for without a size limit. When complete is
+    False (content is still being read), returns -1 until the end of the
+    table has been read."""
+    table = related_table(content, start)
+    if table < 0:
+        return start if complete else -1
+
+    end = content.find(_RELATED_END, table)
+    if end < 0: return len(content) if complete else -1
+    return end + len(_RELATED_END)
+
+
+def sidebar_end(content, start:int=0) -> int:
+    """Returns the offset of the tag that opens the right-hand side of a
+    MAL page (reviews, recommendations, comments...), searching from
+    start, or -1 when it hasn't been reached yet. Everything the
+    schemas extract comes before it."""
+    sidebar = content.find(_SIDEBAR_START)
+    if sidebar < 0: return -1
+
+    marker = content.find(_SIDEBAR_END, max(start, sidebar))
+    if marker < 0: return -1
+    return content.rfind(b"<", 0, marker)
+
+
+def make_soup(content, engine:str="html.parser") -> "BeautifulSoup":
+    """Builds a BeautifulSoup tree for a MAL page.
+
+    Parameters
+    ----------
+        content (bytes|str): The html of the page.
+        engine (str) (optional): "html.parser" parses the whole page
+            with the standard library parser, "lxml" parses the whole
+            page with lxml (must be installed) and "sidebar" only parses
+            the title and the info sidebar.
+
+    Returns
+    -------
+        BeautifulSoup: The parsed document.
+    """
+    from bs4 import BeautifulSoup
+
+    if engine == "html.parser":
+        return BeautifulSoup(content, "html.parser")
+    elif engine == "lxml":
+        return BeautifulSoup(content, "lxml")
+    elif engine == "sidebar":
+        return BeautifulSoup(sidebar_html(content), "html.parser")
+
+    raise ValueError(f"Unknown parser engine {engine!r}, expected one of {ENGINES}")
+
+
+def related_links(soup) -> list:
+    """Returns the entries linked from the related entries table of a
+    parsed page as "anime/<id>" and "manga/<id>" strings, in page order
+    and without duplicates."""
+    links = []
+    table = soup.find("table", class_="anime_detail_related_anime")
+    if table is None: return links
+
+    for a in table.find_all("a", href=True):
+        match = _RELATED_LINK.search(a["href"])
+        if match is None: continue
+
+        link = f"{match.group(1)}/{match.group(2)}"
+        if link not in links: links.append(link)
+    return links
@@ -0,0 +1,169 @@
+import threading
+import time
+
+# Status codes that mean the server wants us to slow down
+THROTTLE_CODES = (429, 503)
+
+
+def parse_retry_after(value) -> float:
+    """Converts a Retry-After header (seconds or an HTTP date) into
+    the number of seconds to wait. Returns 0 for missing or
+    malformed values."""
+    if not value:
+        return 0.0
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        from email.utils import parsedate_to_datetime
+
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """A thread-safe token bucket used to space out requests.
+
+    Each call to acquire takes one token before a request starts, so the
+    time spent waiting on the server counts towards the rate limit.
+    The bucket slows down on its own when it is told about throttling
+    responses and climbs back to its configured rate on success.
+
+    Attributes
+    ----------
+        rate (float): The current number of tokens added per second.
+        max_rate (float): The configured (and highest) refill rate.
+        min_rate (float): The lowest rate the bucket will back off to.
+        burst (int): The maximum number of tokens the bucket can hold.
+    """
+
+    __slots__ = ("rate", "max_rate", "min_rate", "burst", "_tokens",
+                "_last", "_blocked_until", "_lock", "_clock", "_sleep")
+
+    def __init__(self, rate:float, burst:int=1, min_rate:float=None,
+                clock=time.monotonic, sleep=time.sleep) -> None:
+        """
+        The constructor of the TokenBucket class.
+
+        Parameters
+        ----------
+            rate (float): The number of requests allowed per second.
+            burst (int) (optional): The number of requests that may be
+                sent back to back after the bucket has been idle.
+            min_rate (float) (optional): The lowest rate to back off to.
+                Defaults to a tenth of rate.
+            clock (callable) (optional): A monotonic clock in seconds.
+            sleep (callable) (optional): The function used to wait.
+        """
+        if rate <= 0: raise ValueError("rate must be positive")
+        if burst < 1: raise ValueError("burst must be at least 1")
+
+        self.rate = float(rate)
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 10
+        self.burst = int(burst)
+
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last = clock()
+        self._blocked_until = 0.0
+
+    @classmethod
+    def from_interval(cls, interval:float, burst:int=1, **kwargs) -> "TokenBucket":
+        """Builds a bucket that allows one request every interval seconds."""
+        return cls(1 / interval, burst, **kwargs)
+
+    def _refill(self, now:float) -> None:
+        # Nothing is added while the bucket is paused (_last is then the
+        # end of the pause)
+        if now <= self._last: return
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def _reserve(self) -> tuple:
+        # The wait and the end of the pause it was computed against
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(0.0, self._last - now) + wait, self._blocked_until
+
+    def _paused_since(self, blocked_until:float) -> bool:
+        # Whether a pause started after a reservation was made. Its slot
+        # may be inside the pause, so it has to be taken again.
+        with self._lock:
+            return self._blocked_until != blocked_until
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long the caller must wait
+        before using it. Callers that reserve later wait longer, so
+        waiting threads are served in order, also when they reserve
+        during a Retry-After pause."""
+        return self._reserve()[0]
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent. Returns the time waited.
+
+        Callers still waiting when a Retry-After pause starts wait for
+        the pause to end and are spaced out after it."""
+        waited = 0.0
+        while True:
+            wait, blocked_until = self._reserve()
+            if wait > 0:
+                self._sleep(wait)
+                waited += wait
+            if not self._paused_since(blocked_until): return waited
+
+    async def acquire_async(self) -> float:
+        """Waits without blocking the event loop until a request may be
+        sent. Returns the time waited."""
+        waited = 0.0
+        while True:
+            wait, blocked_until = self._reserve()
+            if wait > 0:
+                import asyncio
+
+                await asyncio.sleep(wait)
+                waited += wait
+            if not self._paused_since(blocked_until): return waited
+
+    def feedback(self, status_code:int, retry_after=None) -> None:
+        """Adjusts the rate using the response to a request.
+
+        Throttling responses halve the rate and pause the bucket for
+        Retry-After seconds (or one interval when missing). Any other
+        response slowly raises the rate back to max_rate.
+
+        Parameters
+        ----------
+            status_code (int): The status code of the response.
+            retry_after (str) (optional): The Retry-After header value.
+        """
+        delay = parse_retry_after(retry_after)
+
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+
+            if status_code in THROTTLE_CODES or delay:
+                if status_code in THROTTLE_CODES:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                # Don't let the tokens saved up during a burst skip the
+                # pause: one request may go when it ends, the next ones
+                # are spaced out from there. Callers queued before the
+                # pause take their token again (see acquire).
+                self._tokens = 1.0
+                self._blocked_until = max(self._blocked_until, now + (delay or 1 / self.rate))
+                self._last = max(self._last, self._blocked_until)
+            elif self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
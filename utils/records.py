@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    # A load in progress that other callers can wait on
+
+    __slots__ = ("done", "record", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.record = None
+        self.error = None
+
+
+class RecordCache:
+    """An in-memory cache of parsed Anime/Manga objects with
+    single-flight loading.
+
+    Entries expire after ttl seconds and the least recently used ones
+    are evicted beyond max_entries. When a key is requested while it is
+    already being loaded, the caller waits for that load instead of
+    starting another one, so a hot id costs one request per ttl however
+    many threads ask for it. Errors are passed to every waiting caller
+    but not cached.
+
+    Cached objects are shared between callers; copy them before
+    changing them.
+
+    Attributes
+    ----------
+        max_entries (int): The number of records kept.
+        ttl (int/float): How long a record is kept in seconds, or None.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that loaded the record.
+        coalesced (int): Lookups that waited on another caller's load.
+        evictions (int): Records dropped to stay under max_entries.
+    """
+
+    __slots__ = ("max_entries", "ttl", "hits", "misses", "coalesced", "evictions",
+                "_entries", "_flights", "_clock", "_lock")
+
+    def __init__(self, max_entries:int=1024, ttl:float=300.0, clock=time.monotonic) -> None:
+        """
+        The constructor of the RecordCache class.
+
+        Parameters
+        ----------
+            max_entries (int) (optional): The number of records kept.
+            ttl (int/float) (optional): How long a record is kept in
+                seconds. None keeps records until they are evicted.
+            clock (callable) (optional): Returns the current time.
+        """
+        if max_entries < 1: raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the cached record for key, or None when it is missing
+        or expired. Doesn't count as a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= self._clock()): return None
+            return entry[0]
+
+    def get_or_load(self, key, load):
+        """Returns the record for key, calling load() to fetch it when
+        it isn't cached. Concurrent callers for the same key share one
+        call to load.
+
+        Parameters
+        ----------
+            key: A hashable key such as ("anime", 1).
+            load (callable): Returns the record or raises.
+        """
+        return self.lookup(key, load)[0]
+
+    def lookup(self, key, load) -> tuple:
+        """Like get_or_load, but returns (record, result) where result
+        is "hit", "miss" or "coalesced"."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], "hit"
+                del self._entries[key]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None: raise flight.error
+            return flight.record, "coalesced"
+
+        try:
+            flight.record = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            self._store(key, flight.record)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.record, "miss"
+
+    def _store(self, key, record) -> None:
+        with self._lock:
+            expires = None if self.ttl is None else self._clock() + self.ttl
+            self._entries[key] = (record, expires)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key) -> None:
+        """Drops the record for key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops every record."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit, miss, coalesced and eviction counts and the
+        number of records kept."""
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "evictions": self.evictions, "entries": len(self._entries),
+            }
@@ -0,0 +1,176 @@
+# Values MAL uses to mark missing data
+UNKNOWN_VALUES = ("None found", "None", "N/A", "No genres have been added yet.")
+
+
+class Field:
+    """Describes how one labelled row of the info sidebar is extracted.
+
+    Attributes
+    ----------
+        attrs (str|tuple): The attribute the value is stored as. A tuple
+            of attributes requires normalize to return a tuple of values.
+        many (bool): Whether a plain text value is stored as a list.
+        links (tuple): Href prefixes of the links whose texts make up the
+            value. When none match, the text of the row is used instead.
+        normalize (callable): An optional function applied to the value.
+            Returning None drops the field.
+    """
+
+    __slots__ = ("attrs", "many", "links", "normalize")
+
+    def __init__(self, attrs, many:bool=False, links:tuple=(), normalize=None) -> None:
+        self.attrs = attrs
+        self.many = many
+        self.links = links
+        self.normalize = normalize
+
+
+class Schema:
+    """A compiled description of the data extracted from a MAL page.
+
+    Every `div.spaceit_pad` row in the sidebar is visited once. Its
+    `span.dark_text` label is looked up in the schema and only known
+    labels are extracted, so parsing is linear in the size of the page.
+
+    The selectors are compiled on the first extract, so defining a
+    schema doesn't import soupsieve.
+
+    Attributes
+    ----------
+        title (str): The css selector for the title.
+        fields (dict): A mapping of lower case labels (without the colon)
+            to Field objects.
+        defaults (dict): The value of every attribute when it is missing
+            from the page.
+        unknown (str): The value stored for text marked as unknown.
+        rstrip (str): Characters stripped from the end of text values.
+        strip_links (bool): Whether link texts are stripped.
+    """
+
+    __slots__ = ("title", "fields", "defaults", "unknown", "rstrip", "strip_links",
+                "_title", "_rows")
+
+    def __init__(self, title:str, fields:dict, defaults:dict, unknown:str="",
+                rstrip:str="", strip_links:bool=False) -> None:
+        """
+        The constructor of the Schema class.
+
+        Parameters
+        ----------
+            title (str): A css selector for the element holding the title.
+            fields (dict): A mapping of labels to Field objects.
+            defaults (dict): The default value of every attribute.
+            unknown (str) (optional): The value for data marked as unknown.
+            rstrip (str) (optional): Characters stripped from the end of
+                text values.
+            strip_links (bool) (optional): Whether link texts are stripped.
+        """
+        self.title = title
+        self.fields = {label.lower(): field for label, field in fields.items()}
+        self.defaults = defaults
+        self.unknown = unknown
+        self.rstrip = rstrip
+        self.strip_links = strip_links
+        self._title = None
+        self._rows = None
+
+    @property
+    def attrs(self) -> tuple:
+        """The attributes set by this schema, in order."""
+        return tuple(self.defaults)
+
+    def _compile(self) -> None:
+        import soupsieve
+
+        self._title = soupsieve.compile(self.title)
+        self._rows = soupsieve.compile("div[class='spaceit_pad']")
+
+    def _text(self, label:"Tag"):
+        from bs4.element import NavigableString
+
+        # The first non-blank piece of content after the label
+        for sibling in label.next_siblings:
+            if isinstance(sibling, NavigableString):
+                text = sibling.strip()
+                if text: return text
+            else:
+                return sibling.text
+        return None
+
+    def _row(self, elem:"Tag", field:Field, label:"Tag"):
+        if field.links:
+            links = [a.text for a in elem.find_all("a", href=True)
+                     if a["href"].startswith(field.links)]
+            if links:
+                return [link.strip() for link in links] if self.strip_links else links
+
+        value = self._text(label)
+        if value is None: return None
+
+        value = value.rstrip(self.rstrip) if self.rstrip else value
+        if value in UNKNOWN_VALUES:
+            return [] if field.many else self.unknown
+
+        return [value] if field.many else value
+
+    def extract(self, soup) -> dict:
+        """Extracts the title and every field in the schema from a
+        parsed page. Fields that are missing from the page are left out.
+        """
+        if self._rows is None: self._compile()
+        data = {}
+
+        title = self._title.select_one(soup)
+        if title is not None: data["title"] = title.text
+
+        for elem in self._rows.select(soup):
+            label = elem.find("span", class_="dark_text")
+            if label is None: continue
+
+            field = self.fields.get(label.text.replace(":", "").strip().lower())
+            if field is None: continue
+
+            value = self._row(elem, field, label)
+            if field.normalize is not None and value is not None:
+                value = field.normalize(value)
+            if value is None: continue
+
+            if isinstance(field.attrs, tuple):
+                data.update(zip(field.attrs, value))
+            else:
+                data[field.attrs] = value
+
+        return data
+
+    def load(self, obj, data:dict) -> None:
+        """Sets every attribute of obj from data, using the schema's
+        defaults for anything missing."""
+        obj.id = data.get("id")
+        for attr, default in self.defaults.items():
+            value = data.get(attr, default)
+            # Don't share mutable defaults between objects
+            setattr(obj, attr, list(value) if isinstance(value, list) else value)
+
+    def update(self, obj, data:dict) -> dict:
+        """Sets only the attributes of obj that differ from data (using
+        the schema's defaults for anything missing). data is a full
+        page, so obj is no longer partial.
+
+        Returns
+        -------
+            dict: The changed attributes mapped to (old, new) pairs.
+        """
+        changes = {}
+        for attr in ("id",) + self.attrs:
+            new = data.get(attr, self.defaults.get(attr))
+            old = getattr(obj, attr, None)
+
+            # Ids parsed from urls are strings
+            if attr == "id" and str(old) == str(new): continue
+
+            if old != new:
+                changes[attr] = (old, new)
+                setattr(obj, attr, list(new) if isinstance(new, list) else new)
+
+        obj.partial = False
+        return changes
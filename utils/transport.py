@@ -0,0 +1,207 @@
+import random
+import threading
+
+# Responses worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def __getattr__(name:str):
+    # RETRY_ERRORS is built on first use so that importing this module
+    # doesn't import requests
+    if name == "RETRY_ERRORS":
+        import requests.exceptions as rex
+
+        # Errors worth retrying
+        value = globals()[name] = (rex.ConnectionError, rex.Timeout, rex.ChunkedEncodingError)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def accept_encoding() -> str:
+    """Returns the encodings urllib3 can decode, preferring brotli when
+    one of the brotli packages is installed."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return "gzip, deflate"
+    return "br, gzip, deflate"
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for failed requests.
+
+    Attributes
+    ----------
+        attempts (int): The total number of attempts per request.
+        backoff (float): The base delay in seconds.
+        max_backoff (float): The longest delay in seconds.
+        statuses (tuple): The status codes that are retried.
+    """
+
+    __slots__ = ("attempts", "backoff", "max_backoff", "statuses", "_random")
+
+    def __init__(self, attempts:int=4, backoff:float=0.5, max_backoff:float=30.0,
+                statuses:tuple=RETRY_STATUSES, seed=None) -> None:
+        if attempts < 1: raise ValueError("attempts must be at least 1")
+
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self._random = random.Random(seed)
+
+    def delay(self, attempt:int) -> float:
+        """Returns how long to wait before retrying after the given
+        (zero based) attempt. Uses "full jitter" so that concurrent
+        workers don't retry in lockstep."""
+        return self._random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class Transport:
+    """A pooled, keep-alive HTTP transport that negotiates compression
+    and keeps track of what pooling and compression saved.
+
+    It can be passed to download as the driver. The session (and
+    requests itself) is only set up on the first request.
+
+    A session passed in is used as it is: its adapters and headers are
+    left alone, so pool_size and compression only apply to the session
+    the transport creates.
+
+    Attributes
+    ----------
+        session (requests.Session): The underlying session.
+        timeout (float): The connect/read timeout in seconds.
+        requests (int): The number of requests sent.
+        wire_bytes (int): The bytes received on the wire (compressed).
+        body_bytes (int): The bytes of the decoded bodies.
+        pool_size (int): The number of connections kept open per host.
+        compression (bool): Whether gzip/brotli is asked for.
+    """
+
+    __slots__ = ("timeout", "requests", "wire_bytes", "body_bytes", "pool_size",
+                "compression", "_session", "_owned", "_lock")
+
+    def __init__(self, session=None, pool_size:int=10, compression:bool=True,
+                timeout:float=30.0) -> None:
+        """
+        The constructor of the Transport class.
+
+        Parameters
+        ----------
+            session (requests.Session) (optional): The session to use,
+                left unchanged. A new one is created when missing.
+            pool_size (int) (optional): The number of connections kept
+                open per host. reserve grows it to the number of workers
+                of a batch.
+            compression (bool) (optional): Whether to ask for gzip/brotli.
+            timeout (float) (optional): The connect/read timeout.
+        """
+        self.timeout = timeout
+        self.requests = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.pool_size = pool_size
+        self.compression = compression
+        self._session = session
+        self._owned = False
+        self._lock = threading.Lock()
+
+    def _mount(self, session) -> None:
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    @property
+    def session(self) -> "requests.Session":
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+
+                    session = requests.session()
+                    self._mount(session)
+                    if self.compression: session.headers["Accept-Encoding"] = accept_encoding()
+                    self._owned = True
+                    self._session = session
+        return self._session
+
+    def reserve(self, connections:int) -> None:
+        """Grows the pool to keep at least this many connections open per
+        host, e.g. the number of workers of a batch. Otherwise the
+        connections of the workers beyond pool_size are closed after
+        every request."""
+        with self._lock:
+            if connections <= self.pool_size: return
+            self.pool_size = connections
+            if not self._owned: return
+
+            # Requests in flight finish on the old adapter, whose
+            # connections are then closed
+            old = self._session.get_adapter("https://")
+            self._mount(self._session)
+            old.close()
+
+    def get(self, url:str, headers=None, **kwargs) -> "requests.Response":
+        """Sends a single GET request."""
+        kwargs.setdefault("timeout", self.timeout)
+        resp = self.session.get(url, headers=headers, **kwargs)
+
+        if kwargs.get("stream"):
+            # The caller reads the body and reports it with received
+            with self._lock: self.requests += 1
+            return resp
+
+        # urllib3 counts the bytes read before decoding
+        raw = getattr(resp, "raw", None)
+        wire = raw.tell() if raw is not None and hasattr(raw, "tell") else len(resp.content)
+
+        with self._lock:
+            self.requests += 1
+            self.wire_bytes += wire or len(resp.content)
+            self.body_bytes += len(resp.content)
+
+        return resp
+
+    def received(self, wire:int, body:int) -> None:
+        """Counts the bytes read from a response requested with
+        stream=True."""
+        with self._lock:
+            self.wire_bytes += wire
+            self.body_bytes += body
+
+    def head(self, url:str, **kwargs) -> "requests.Response":
+        """Sends a HEAD request."""
+        kwargs.setdefault("timeout", self.timeout)
+        resp = self.session.head(url, **kwargs)
+        with self._lock: self.requests += 1
+        return resp
+
+    def connections(self) -> int:
+        """Returns the number of connections opened so far."""
+        if self._session is None: return 0
+
+        opened = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                opened += getattr(pools.get(key), "num_connections", 0)
+        return opened
+
+    def stats(self) -> dict:
+        """Returns the requests sent, connections opened and the bytes
+        and round-trips saved by compression and keep-alive."""
+        connections = self.connections()
+        return {
+            "requests": self.requests,
+            "connections": connections,
+            "round_trips_saved": max(0, self.requests - connections),
+            "wire_bytes": self.wire_bytes,
+            "body_bytes": self.body_bytes,
+            "bytes_saved": max(0, self.body_bytes - self.wire_bytes),
+        }